@@ -0,0 +1,112 @@
+import argparse
+import json
+import sqlite3
+import sys
+
+from app.config import settings
+from app.core.migrations import LATEST_VERSION, MIGRATIONS, get_schema_version, run_migrations
+
+# Uso: python -m app.commands.db_diagnostics [--db RUTA] [--migrate]
+#
+# Reporta la versión del esquema, los índices de cada tabla y el plan de ejecución de
+# las consultas frecuentes. Un plan con "SCAN <tabla>" indica que la consulta recorre
+# la tabla completa en lugar de usar un índice.
+
+HOT_QUERIES = {
+    "verification_por_email": (
+        "SELECT * FROM verification WHERE email = ? ORDER BY created_at DESC, rowid DESC LIMIT 1", ("x@example.com",)
+    ),
+    "users_por_email": ("SELECT * FROM users WHERE email = ? LIMIT 1", ("x@example.com",)),
+    "users_por_id": ("SELECT * FROM users WHERE user_id = ?", (0,)),
+    "tokens_por_token": ("SELECT * FROM tokens WHERE token = ?", ("x",)),
+    "revocaciones_nuevas": (
+        "SELECT token, expires_at, revocation_seq FROM tokens WHERE revocation_seq > ? ORDER BY revocation_seq", (0,)
+    ),
+    "outbox_siguiente_trabajo": (
+        """
+        SELECT id FROM outbox
+        WHERE (status = ? AND next_attempt_at <= ?) OR (status = ? AND locked_until < ?)
+        ORDER BY next_attempt_at, id
+        LIMIT 1
+        """,
+        ("pending", 0, "processing", 0),
+    ),
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Diagnóstico del esquema e índices de la base SQLite local.")
+    parser.add_argument("--db", default=settings.SQLITE_PATH, help="Ruta de la base SQLite")
+    parser.add_argument("--migrate", action="store_true", help="Aplicar las migraciones pendientes antes del reporte")
+    return parser.parse_args(argv)
+
+
+def _tables(conn: sqlite3.Connection) -> dict:
+    tables = {}
+    names = [row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    )]
+    for name in names:
+        indexes = {}
+        for _, index_name, unique, *_ in conn.execute(f'PRAGMA index_list("{name}")'):
+            columns = [row[2] for row in conn.execute(f'PRAGMA index_info("{index_name}")')]
+            indexes[index_name] = {"columns": columns, "unique": bool(unique)}
+        tables[name] = {
+            "rows": conn.execute(f'SELECT COUNT(*) FROM "{name}"').fetchone()[0],
+            "indexes": indexes,
+        }
+    return tables
+
+
+def _query_plans(conn: sqlite3.Connection) -> dict:
+    plans = {}
+    for name, (query, params) in HOT_QUERIES.items():
+        try:
+            steps = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+        except sqlite3.OperationalError as e:
+            plans[name] = {"error": str(e)}
+            continue
+        # "SCAN tabla" sin índice es un recorrido completo; "USING TEMP B-TREE" es un ordenamiento extra
+        full_scan = any(step.startswith("SCAN") and "INDEX" not in step for step in steps)
+        plans[name] = {"plan": steps, "full_scan": full_scan, "temp_sort": any("TEMP B-TREE" in step for step in steps)}
+    return plans
+
+
+def diagnose(path: str) -> dict:
+    conn = sqlite3.connect(path)
+    try:
+        version = get_schema_version(conn)
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        tables = _tables(conn)
+        return {
+            "database": path,
+            "schema_version": version,
+            "latest_version": LATEST_VERSION,
+            "pending_migrations": [
+                f"{m.version}: {m.description}" for m in MIGRATIONS if m.version > version
+            ],
+            "journal_mode": conn.execute("PRAGMA journal_mode").fetchone()[0],
+            # 0 = NONE, 1 = FULL, 2 = INCREMENTAL (el que usa el job de retención)
+            "auto_vacuum": conn.execute("PRAGMA auto_vacuum").fetchone()[0],
+            "size_bytes": conn.execute("PRAGMA page_count").fetchone()[0] * page_size,
+            "free_bytes": conn.execute("PRAGMA freelist_count").fetchone()[0] * page_size,
+            "tables": tables,
+            "query_plans": _query_plans(conn),
+        }
+    finally:
+        conn.close()
+
+
+def main(args) -> int:
+    if args.migrate:
+        run_migrations(args.db)
+    report = diagnose(args.db)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    # Código 2 si quedan migraciones pendientes o alguna consulta frecuente recorre su tabla completa
+    if report["pending_migrations"] or any(plan.get("full_scan") for plan in report["query_plans"].values()):
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
@@ -0,0 +1,54 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from app.config import settings
+from app.core.database import close_odoo_pool, init_odoo_pool
+from app.core.locks import try_lock
+from app.core.odoo_jsonrpc import close_odoo_jsonrpc_client, init_odoo_jsonrpc_client, is_jsonrpc_enabled
+from app.services.odoo_service import init_odoo_executor, shutdown_odoo_executor
+from app.services.reconciliation_service import LOCK_FILE, run_reconciliation
+
+# Uso: python -m app.commands.reconcile [--batch-size N] [--concurrency N] [--limit N] [--output-dir DIR]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Concilia usuarios de SQLite con las facturas de Odoo y el estado en Pontis.")
+    parser.add_argument("--batch-size", type=int, default=settings.RECONCILE_BATCH_SIZE, help="Usuarios por lote")
+    parser.add_argument("--concurrency", type=int, default=settings.RECONCILE_PONTIS_CONCURRENCY, help="Consultas simultáneas a Pontis (máximo RECONCILE_PONTIS_CONCURRENCY)")
+    parser.add_argument("--limit", type=int, default=None, help="Procesar solo los primeros N usuarios")
+    parser.add_argument("--output-dir", default=settings.RECONCILE_REPORT_DIR, help="Carpeta del reporte CSV/JSON")
+    return parser.parse_args(argv)
+
+
+async def main(args) -> int:
+    lock = try_lock(os.path.join(settings.RECONCILE_REPORT_DIR, LOCK_FILE))
+    if lock is None:
+        print("Ya hay una conciliación en curso.", file=sys.stderr)
+        return 1
+
+    init_odoo_pool()
+    init_odoo_executor()
+    if is_jsonrpc_enabled():
+        await init_odoo_jsonrpc_client()
+    try:
+        summary = await run_reconciliation(
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+            limit=args.limit,
+            report_dir=args.output_dir,
+        )
+    finally:
+        await close_odoo_jsonrpc_client()
+        shutdown_odoo_executor()
+        close_odoo_pool()
+        lock.release()
+
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -0,0 +1,75 @@
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+
+from app.config import settings
+from app.core.database import close_sqlite_connections
+from app.core.locks import try_lock
+from app.core.migrations import run_migrations
+from app.services.retention_service import LOCK_FILE, run_retention
+
+# Uso: python -m app.commands.retention [--batch-size N] [--grace-days N] [--vacuum-pages N] [--pause S]
+#      python -m app.commands.retention --enable-incremental-vacuum   (una sola vez, con la API detenida)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Borra tokens y códigos de verificación que ya no se usan y compacta la base SQLite.")
+    parser.add_argument("--batch-size", type=int, default=settings.RETENTION_BATCH_SIZE, help="Filas por lote de borrado")
+    parser.add_argument("--grace-days", type=float, default=settings.RETENTION_TOKEN_GRACE_DAYS, help="Días que se conservan los tokens vencidos")
+    parser.add_argument("--vacuum-pages", type=int, default=settings.RETENTION_VACUUM_PAGES, help="Páginas liberadas por paso de incremental_vacuum")
+    parser.add_argument("--pause", type=float, default=settings.RETENTION_BATCH_PAUSE_SECONDS, help="Pausa en segundos entre lotes")
+    parser.add_argument(
+        "--enable-incremental-vacuum", action="store_true",
+        help="Cambia auto_vacuum a INCREMENTAL con un VACUUM completo (bloquea la base mientras dura)"
+    )
+    return parser.parse_args(argv)
+
+
+def enable_incremental_vacuum(path: str) -> dict:
+    conn = sqlite3.connect(path, timeout=settings.SQLITE_BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+    try:
+        before = os.path.getsize(path)
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        # Reescribe la base completa: solo así cambia el modo de una base existente
+        conn.execute("VACUUM")
+        # En WAL el VACUUM queda en el -wal hasta el checkpoint
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return {
+            "auto_vacuum": conn.execute("PRAGMA auto_vacuum").fetchone()[0],
+            "bytes_before": before,
+            "bytes_after": os.path.getsize(path),
+        }
+    finally:
+        conn.close()
+
+
+async def main(args) -> int:
+    lock = try_lock(os.path.join(os.path.dirname(settings.SQLITE_PATH) or ".", LOCK_FILE))
+    if lock is None:
+        print("Ya hay una retención en curso.", file=sys.stderr)
+        return 1
+
+    try:
+        run_migrations()
+        if args.enable_incremental_vacuum:
+            summary = await asyncio.to_thread(enable_incremental_vacuum, settings.SQLITE_PATH)
+        else:
+            summary = await run_retention(
+                batch_size=args.batch_size,
+                token_grace_days=args.grace_days,
+                vacuum_pages=args.vacuum_pages,
+                pause=args.pause,
+            )
+    finally:
+        close_sqlite_connections()
+        lock.release()
+
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(parse_args())))
@@ -7,6 +7,24 @@ class Settings(BaseSettings):
 	ODOO_DB: str
 	ODOO_USERNAME: str
 	ODOO_PASSWORD: str
+	ODOO_POOL_SIZE: int = Field(32, env="ODOO_POOL_SIZE")
+	ODOO_POOL_ACQUIRE_TIMEOUT_SECONDS: float = Field(10, env="ODOO_POOL_ACQUIRE_TIMEOUT_SECONDS")
+	ODOO_RPC_PROTOCOL: str = Field("xmlrpc", env="ODOO_RPC_PROTOCOL")  # 'xmlrpc' o 'jsonrpc'
+	ODOO_CONNECT_TIMEOUT: float = Field(5, env="ODOO_CONNECT_TIMEOUT")
+	ODOO_READ_TIMEOUT: float = Field(30, env="ODOO_READ_TIMEOUT")
+	ODOO_MAX_CONCURRENCY: int = Field(32, env="ODOO_MAX_CONCURRENCY")
+
+	# SQLite local (usuarios, tokens, verificación, outbox)
+	SQLITE_PATH: str = Field("storage/verification.db", env="SQLITE_PATH")
+	SQLITE_BUSY_TIMEOUT_MS: int = Field(5000, env="SQLITE_BUSY_TIMEOUT_MS")
+	# Cada cuánto cada worker trae los tokens revocados en los demás workers
+	REVOCATION_SYNC_INTERVAL_SECONDS: float = Field(1, env="REVOCATION_SYNC_INTERVAL_SECONDS")
+
+	# Caché de datos de referencia de Odoo (grupos, países, productos, diarios)
+	REF_CACHE_TTL_SECONDS: int = Field(3600, env="REF_CACHE_TTL_SECONDS")
+	REF_CACHE_PRODUCTS_TTL_SECONDS: int = Field(300, env="REF_CACHE_PRODUCTS_TTL_SECONDS")
+	REF_CACHE_COUNTRIES_TTL_SECONDS: int = Field(86400, env="REF_CACHE_COUNTRIES_TTL_SECONDS")
+	REF_CACHE_MAXSIZE: int = Field(512, env="REF_CACHE_MAXSIZE")
 
 	# Configuración para JWT
 	JWT_SECRET_KEY: str
@@ -22,6 +40,46 @@ class Settings(BaseSettings):
 	URL_BASE_API_PONTIS: str = Field(..., env="URL_BASE_API_PONTIS")
 	EMAIL_FROM: str = Field(..., env="EMAIL_FROM")
 	SENDGRID_API_KEY: str = Field(..., env="SENDGRID_API_KEY")
+
+	# Timeouts y bulkhead de Pontis y SendGrid
+	PONTIS_CONNECT_TIMEOUT: float = Field(5, env="PONTIS_CONNECT_TIMEOUT")
+	PONTIS_READ_TIMEOUT: float = Field(20, env="PONTIS_READ_TIMEOUT")
+	PONTIS_MAX_CONCURRENCY: int = Field(20, env="PONTIS_MAX_CONCURRENCY")
+	PONTIS_MAX_CONNECTIONS: int = Field(20, env="PONTIS_MAX_CONNECTIONS")
+	PONTIS_MAX_KEEPALIVE_CONNECTIONS: int = Field(10, env="PONTIS_MAX_KEEPALIVE_CONNECTIONS")
+	PONTIS_HTTP2: bool = Field(False, env="PONTIS_HTTP2")  # requiere httpx[http2]
+	PONTIS_SESSION_TTL_SECONDS: int = Field(1800, env="PONTIS_SESSION_TTL_SECONDS")
+	PONTIS_SESSION_REFRESH_MARGIN_SECONDS: int = Field(60, env="PONTIS_SESSION_REFRESH_MARGIN_SECONDS")
+	PONTIS_CUSTOMER_CACHE_TTL_SECONDS: int = Field(60, env="PONTIS_CUSTOMER_CACHE_TTL_SECONDS")
+	SENDGRID_TIMEOUT: float = Field(10, env="SENDGRID_TIMEOUT")
+	SENDGRID_MAX_CONCURRENCY: int = Field(10, env="SENDGRID_MAX_CONCURRENCY")
+
+	# Circuit breaker: fallos seguidos para abrir y segundos antes de reintentar
+	CIRCUIT_FAILURE_THRESHOLD: int = Field(5, env="CIRCUIT_FAILURE_THRESHOLD")
+	CIRCUIT_RECOVERY_SECONDS: float = Field(30, env="CIRCUIT_RECOVERY_SECONDS")
+	BULKHEAD_ACQUIRE_TIMEOUT_SECONDS: float = Field(5, env="BULKHEAD_ACQUIRE_TIMEOUT_SECONDS")
+
+	# Outbox: efectos secundarios del checkout (Pontis, correos, pago) ejecutados en segundo plano
+	OUTBOX_CONCURRENCY: int = Field(4, env="OUTBOX_CONCURRENCY")
+	OUTBOX_POLL_INTERVAL_SECONDS: float = Field(2, env="OUTBOX_POLL_INTERVAL_SECONDS")
+	OUTBOX_MAX_ATTEMPTS: int = Field(8, env="OUTBOX_MAX_ATTEMPTS")
+	OUTBOX_BACKOFF_BASE_SECONDS: float = Field(5, env="OUTBOX_BACKOFF_BASE_SECONDS")
+	OUTBOX_BACKOFF_MAX_SECONDS: float = Field(600, env="OUTBOX_BACKOFF_MAX_SECONDS")
+	OUTBOX_LEASE_SECONDS: float = Field(300, env="OUTBOX_LEASE_SECONDS")
+
+	# Conciliación usuarios / facturas de Odoo / Pontis (0 desactiva la ejecución programada)
+	RECONCILE_INTERVAL_SECONDS: float = Field(86400, env="RECONCILE_INTERVAL_SECONDS")
+	RECONCILE_BATCH_SIZE: int = Field(500, env="RECONCILE_BATCH_SIZE")
+	# Tope de consultas simultáneas a Pontis del job, con pool y circuito propios
+	RECONCILE_PONTIS_CONCURRENCY: int = Field(4, env="RECONCILE_PONTIS_CONCURRENCY")
+	RECONCILE_REPORT_DIR: str = Field("storage/reconciliation", env="RECONCILE_REPORT_DIR")
+
+	# Retención de tokens y códigos de verificación en SQLite (0 desactiva la ejecución programada)
+	RETENTION_INTERVAL_SECONDS: float = Field(3600, env="RETENTION_INTERVAL_SECONDS")
+	RETENTION_BATCH_SIZE: int = Field(500, env="RETENTION_BATCH_SIZE")
+	RETENTION_BATCH_PAUSE_SECONDS: float = Field(0.05, env="RETENTION_BATCH_PAUSE_SECONDS")
+	RETENTION_TOKEN_GRACE_DAYS: float = Field(7, env="RETENTION_TOKEN_GRACE_DAYS")
+	RETENTION_VACUUM_PAGES: int = Field(1000, env="RETENTION_VACUUM_PAGES")
 	
 	class Config:
 		env_file = ".env"
@@ -1,34 +1,487 @@
+import asyncio
+import http.client
 import os
 import sqlite3
+import threading
+import time
 import xmlrpc.client
+from contextlib import asynccontextmanager, contextmanager
+
+import aiosqlite
+
 from app.config import settings
+from app.core.logging_config import logger
+
+# Códigos de error XML-RPC que Odoo usa para credenciales/sesión inválidas
+ODOO_ACCESS_DENIED_FAULT_CODE = 3
+ODOO_SESSION_ERROR_MARKERS = ("AccessDenied", "Access Denied", "SessionExpired", "Session expired")
+
+
+def is_odoo_session_error(exc: Exception) -> bool:
+    """
+    Indica si el error devuelto por Odoo se debe a credenciales o sesión inválidas,
+    es decir, si tiene sentido volver a autenticarse y reintentar.
+    """
+    if not isinstance(exc, xmlrpc.client.Fault):
+        return False
+    if exc.faultCode == ODOO_ACCESS_DENIED_FAULT_CODE:
+        return True
+    return any(marker in str(exc.faultString) for marker in ODOO_SESSION_ERROR_MARKERS)
+
+
+class _TimeoutTransportMixin:
+    """
+    Transporte XML-RPC con timeout de conexión y de lectura separados
+    (xmlrpc.client no expone timeouts por sí mismo).
+    """
+
+    def __init__(self, connect_timeout: float, read_timeout: float, **kwargs):
+        super().__init__(**kwargs)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+    def make_connection(self, host):
+        connection = super().make_connection(host)
+        connection.timeout = self.connect_timeout
+        return connection
+
+    def send_request(self, host, handler, request_body, debug):
+        connection = super().send_request(host, handler, request_body, debug)
+        # La petición ya se envió (conexión establecida): a partir de aquí rige el timeout de lectura
+        if connection.sock is not None:
+            connection.sock.settimeout(self.read_timeout)
+        return connection
+
+
+class _TimeoutTransport(_TimeoutTransportMixin, xmlrpc.client.Transport):
+    pass
+
+
+class _TimeoutSafeTransport(_TimeoutTransportMixin, xmlrpc.client.SafeTransport):
+    pass
+
+
+def _make_transport(url: str) -> xmlrpc.client.Transport:
+    transport_cls = _TimeoutSafeTransport if url.startswith("https") else _TimeoutTransport
+    return transport_cls(settings.ODOO_CONNECT_TIMEOUT, settings.ODOO_READ_TIMEOUT)
+
+
+class _OdooClient:
+    """
+    Par de proxies XML-RPC ('common' y 'object') con su propio transporte.
+    El transporte de xmlrpc.client mantiene la conexión HTTP/1.1 abierta entre
+    llamadas, por lo que reutilizar el cliente evita un handshake por petición.
+    Un cliente no es thread-safe: solo lo usa un hilo a la vez (ver OdooConnectionPool).
+    """
+
+    def __init__(self, url: str):
+        self.common = xmlrpc.client.ServerProxy(f"{url}/xmlrpc/2/common", transport=_make_transport(url))
+        self.models = xmlrpc.client.ServerProxy(f"{url}/xmlrpc/2/object", transport=_make_transport(url))
+
+    def close(self):
+        self.common("close")()
+        self.models("close")()
+
+
+class _PooledProxy:
+    """
+    Proxy compatible con `xmlrpc.client.ServerProxy` que toma un cliente del pool
+    en cada llamada. Permite seguir usando `conn['models'].execute_kw(...)` y
+    `conn['common'].authenticate(...)` sin cambiar los handlers.
+    """
+
+    def __init__(self, pool: "OdooConnectionPool", endpoint: str):
+        self._pool = pool
+        self._endpoint = endpoint
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def _call(*args):
+            # Solo con las credenciales del pool (uid None = aún sin sesión) se usa el uid
+            # en caché y la reautenticación; otras credenciales se envían tal cual
+            if self._endpoint == "models" and name == "execute_kw" and self._pool.owns_credentials(*args[:3]):
+                return self._pool.execute_kw(*args[3:])
+            with self._pool.client() as client:
+                return getattr(getattr(client, self._endpoint), name)(*args)
+
+        return _call
+
+
+class OdooConnectionPool:
+    """
+    Pool de conexiones XML-RPC a Odoo compartido por todo el proceso.
+      - Se autentica una sola vez y guarda el `uid`.
+      - Reutiliza los transportes (keep-alive) entre peticiones.
+      - Vuelve a autenticarse solo cuando Odoo responde con un error de acceso/sesión.
+    """
+
+    def __init__(
+        self, url: str, db: str, username: str, password: str, size: int = 32, acquire_timeout: float = 10.0
+    ):
+        self.url = url
+        self.db = db
+        self.username = username
+        self.password = password
+        self.size = max(1, size)
+        self.acquire_timeout = acquire_timeout
+        self._uid = None
+        self._auth_generation = 0
+        self._auth_lock = threading.Lock()
+        # Clientes libres (LIFO) y creados; la condición avisa a quien espera cuando
+        # se devuelve un cliente o se descarta uno (queda cupo para crear otro)
+        self._idle = []
+        self._created = 0
+        self._available = threading.Condition()
+        self._closed = False
+
+    # ------------------------------------------------------------------
+    # Gestión de clientes
+    # ------------------------------------------------------------------
+    def _acquire(self) -> _OdooClient:
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._available:
+            while not self._idle and self._created >= self.size:
+                # Todos los clientes están en uso => esperar a que se libere o descarte uno
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(
+                        f"Pool de Odoo agotado: ningún cliente libre en {self.acquire_timeout}s ({self.size} en uso)"
+                    )
+                self._available.wait(remaining)
+            if self._idle:
+                return self._idle.pop()
+            self._created += 1
+        try:
+            return _OdooClient(self.url)
+        except Exception:
+            self._forget_client()
+            raise
+
+    def _forget_client(self):
+        with self._available:
+            self._created -= 1
+            self._available.notify()
+
+    def _release(self, client: _OdooClient, discard: bool = False):
+        if discard or self._closed:
+            try:
+                client.close()
+            finally:
+                self._forget_client()
+            return
+        with self._available:
+            self._idle.append(client)
+            self._available.notify()
+
+    @contextmanager
+    def client(self):
+        """
+        Presta un cliente del pool. Si la llamada falla a nivel de transporte
+        (conexión caída, timeout...) el cliente se descarta en lugar de reutilizarse.
+        """
+        client = self._acquire()
+        discard = False
+        try:
+            yield client
+        except (OSError, xmlrpc.client.ProtocolError, http.client.HTTPException):
+            discard = True
+            raise
+        finally:
+            self._release(client, discard=discard)
+
+    # ------------------------------------------------------------------
+    # Autenticación
+    # ------------------------------------------------------------------
+    @property
+    def uid(self) -> int:
+        if self._uid is None:
+            return self.authenticate()
+        return self._uid
+
+    def authenticate(self, force: bool = False, seen_generation: int = None) -> int:
+        """
+        Autentica el usuario técnico de la API en Odoo y guarda el uid.
+        Con `force=True` descarta el uid en caché y vuelve a autenticarse, salvo que
+        otro hilo ya lo haya hecho después de `seen_generation`.
+        """
+        if seen_generation is None:
+            seen_generation = self._auth_generation
+        with self._auth_lock:
+            # Otro hilo ya renovó la sesión mientras esperábamos el lock
+            if self._uid is not None and (not force or self._auth_generation != seen_generation):
+                return self._uid
+            with self.client() as client:
+                uid = client.common.authenticate(self.db, self.username, self.password, {})
+            if not uid:
+                self._uid = None
+                raise Exception("Autenticación fallida en Odoo")
+            self._uid = uid
+            self._auth_generation += 1
+            logger.info("Autenticado en Odoo como uid=%s", uid)
+            return uid
+
+    def owns_credentials(self, db: str, uid: int, password: str) -> bool:
+        """
+        Indica si db/uid/password son los del usuario técnico del pool.
+        """
+        return db == self.db and password == self.password and uid in (None, self._uid)
+
+    # ------------------------------------------------------------------
+    # Ejecución
+    # ------------------------------------------------------------------
+    def execute_kw(self, model: str, method: str, args: list, kwargs: dict = None):
+        """
+        Ejecuta `execute_kw` con el uid en caché. Si Odoo rechaza la sesión,
+        se vuelve a autenticar una vez y se reintenta la llamada.
+        """
+        if kwargs is None:
+            kwargs = {}
+        uid = self.uid
+        generation = self._auth_generation
+        try:
+            with self.client() as client:
+                return client.models.execute_kw(self.db, uid, self.password, model, method, args, kwargs)
+        except xmlrpc.client.Fault as fault:
+            if not is_odoo_session_error(fault):
+                raise
+            logger.warning("Sesión de Odoo rechazada (%s). Reautenticando...", fault.faultString)
+            uid = self.authenticate(force=True, seen_generation=generation)
+            with self.client() as client:
+                return client.models.execute_kw(self.db, uid, self.password, model, method, args, kwargs)
+
+    def connection(self) -> dict:
+        """
+        Devuelve el dict de conexión que usan los handlers y `execute_odoo_method`.
+        No se autentica: se llama desde el event loop, y la autenticación (bloqueante)
+        la hace `execute_kw` en el executor de Odoo y bajo `odoo_guard`. "uid" es el
+        uid en caché o None si aún no hay sesión.
+        """
+        return {
+            "common": _PooledProxy(self, "common"),
+            "db": self.db,
+            "uid": self._uid,
+            "password": self.password,
+            "models": _PooledProxy(self, "models"),
+            "pool": self,
+        }
+
+    def close(self):
+        self._closed = True
+        with self._available:
+            idle, self._idle = self._idle, []
+        for client in idle:
+            self._release(client, discard=True)
+
+
+_odoo_pool = None
+_odoo_pool_lock = threading.Lock()
+
+
+def _create_odoo_pool() -> OdooConnectionPool:
+    global _odoo_pool
+    with _odoo_pool_lock:
+        if _odoo_pool is None:
+            _odoo_pool = OdooConnectionPool(
+                settings.ODOO_URL,
+                settings.ODOO_DB,
+                settings.ODOO_USERNAME,
+                settings.ODOO_PASSWORD,
+                size=settings.ODOO_POOL_SIZE,
+                acquire_timeout=settings.ODOO_POOL_ACQUIRE_TIMEOUT_SECONDS,
+            )
+        return _odoo_pool
+
+
+def init_odoo_pool() -> OdooConnectionPool:
+    """
+    Crea el pool de Odoo del proceso e intenta autenticarse. Si Odoo no está
+    disponible al arrancar, la autenticación se reintenta en la primera petición.
+    """
+    pool = _create_odoo_pool()
+    try:
+        pool.authenticate()
+    except Exception as e:
+        logger.warning("No se pudo autenticar en Odoo al iniciar: %s", str(e))
+    return pool
+
+
+def close_odoo_pool():
+    global _odoo_pool
+    with _odoo_pool_lock:
+        if _odoo_pool is not None:
+            _odoo_pool.close()
+            _odoo_pool = None
+
+
+def get_odoo_pool() -> OdooConnectionPool:
+    # Sin autenticar: la primera llamada a `execute_kw` lo hace en el executor
+    if _odoo_pool is None:
+        return _create_odoo_pool()
+    return _odoo_pool
+
 
 def get_odoo_connection():
-    common = xmlrpc.client.ServerProxy(f"{settings.ODOO_URL}/xmlrpc/2/common")
-    uid = common.authenticate(settings.ODOO_DB, settings.ODOO_USERNAME, settings.ODOO_PASSWORD, {})
-    
-    if not uid:
-        raise Exception("Autenticación fallida en Odoo")
-    
-    models = xmlrpc.client.ServerProxy(f"{settings.ODOO_URL}/xmlrpc/2/object")
-    
-    return {
-        "common": common,  
-        'db': settings.ODOO_DB,
-        'uid': uid,
-        'password': settings.ODOO_PASSWORD,
-        'models': models
-    }
+    # Si Odoo no respondió al autenticar, el error aparece en la primera llamada
+    # (dentro del executor y del circuit breaker), no aquí en el event loop
+    return get_odoo_pool().connection()
 
 # Conexión a SQLite
+#
+# Cada hilo del worker (event loop, asyncio.to_thread, threadpool de FastAPI) mantiene
+# una conexión persistente a storage/verification.db en lugar de abrir y cerrar una por
+# función. La base usa WAL: los 3 workers de uvicorn leen en paralelo mientras uno escribe,
+# y las escrituras concurrentes esperan hasta SQLITE_BUSY_TIMEOUT_MS en vez de fallar
+# con "database is locked".
+
+class _ThreadSqliteConnection:
+    """
+    Envoltorio de la conexión persistente del hilo con la misma interfaz que
+    `sqlite3.Connection`. `close()` no cierra la conexión: descarta una transacción
+    que haya quedado abierta y la deja lista para la siguiente llamada del hilo.
+    """
+
+    def __init__(self, connection: sqlite3.Connection):
+        object.__setattr__(self, "_connection", connection)
+
+    def close(self):
+        if self._connection.in_transaction:
+            self._connection.rollback()
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._connection, name, value)
+
+    def __enter__(self):
+        self._connection.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._connection.__exit__(exc_type, exc, tb)
+
+
+_sqlite_local = threading.local()
+_sqlite_connections = []
+_sqlite_lock = threading.Lock()
+
+
+def _open_sqlite_connection() -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(settings.SQLITE_PATH) or ".", exist_ok=True)
+    connection = sqlite3.connect(
+        settings.SQLITE_PATH,
+        timeout=settings.SQLITE_BUSY_TIMEOUT_MS / 1000,
+        # Solo la usa su hilo; close_sqlite_connections() la cierra desde el hilo principal
+        check_same_thread=False,
+    )
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    return connection
+
+
 def get_sqlite_connection():
-    try:
-        # Construir la ruta al archivo de la base de datos en la carpeta 'storage'
-        db_directory = "storage"
-        os.makedirs(db_directory, exist_ok=True)  # Asegura que el directorio exista
-        db_path = os.path.join(db_directory, "verification.db")
-        
-        connection = sqlite3.connect(db_path)
+    """
+    Conexión SQLite persistente del hilo actual (se abre en el primer uso).
+    Las filas son `sqlite3.Row`: se leen por índice o por nombre de columna.
+    """
+    pid = os.getpid()
+    connection = getattr(_sqlite_local, "connection", None)
+    # Un proceso hijo (fork) no hereda conexiones del padre
+    if connection is None or _sqlite_local.pid != pid:
+        try:
+            connection = _open_sqlite_connection()
+        except sqlite3.Error as e:
+            raise Exception(f"Error al conectar con SQLite: {e}")
+        _sqlite_local.connection = connection
+        _sqlite_local.pid = pid
+        with _sqlite_lock:
+            _sqlite_connections.append(connection)
+    return _ThreadSqliteConnection(connection)
+
+
+def close_sqlite_connections():
+    """
+    Cierra las conexiones SQLite abiertas por los hilos del proceso (al apagar la app).
+    """
+    with _sqlite_lock:
+        connections = list(_sqlite_connections)
+        _sqlite_connections.clear()
+    for connection in connections:
+        try:
+            connection.close()
+        except sqlite3.Error as e:
+            logger.warning("No se pudo cerrar una conexión SQLite: %s", e)
+    _sqlite_local.__dict__.clear()
+
+
+# Conexión SQLite asíncrona
+#
+# Las rutas y los jobs async usan una única conexión aiosqlite por worker: las consultas
+# corren en el hilo propio de aiosqlite y el event loop no se bloquea con I/O de disco.
+# Las escrituras pasan por `sqlite_transaction()`, que las serializa con un lock para que
+# dos coroutines no mezclen sentencias dentro de la misma transacción.
+
+_async_sqlite = None
+_async_sqlite_open_lock = asyncio.Lock()
+_async_sqlite_write_lock = asyncio.Lock()
+
+
+async def init_async_sqlite():
+    """
+    Abre la conexión aiosqlite compartida del worker (se llama al iniciar la app).
+    """
+    global _async_sqlite
+    async with _async_sqlite_open_lock:
+        if _async_sqlite is not None:
+            return _async_sqlite
+        os.makedirs(os.path.dirname(settings.SQLITE_PATH) or ".", exist_ok=True)
+        try:
+            connection = await aiosqlite.connect(
+                settings.SQLITE_PATH, timeout=settings.SQLITE_BUSY_TIMEOUT_MS / 1000
+            )
+            connection.row_factory = aiosqlite.Row
+            await connection.execute("PRAGMA journal_mode=WAL")
+            await connection.execute("PRAGMA synchronous=NORMAL")
+            await connection.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        except sqlite3.Error as e:
+            raise Exception(f"Error al conectar con SQLite: {e}")
+        _async_sqlite = connection
+        logger.info("Conexión SQLite asíncrona abierta en %s", settings.SQLITE_PATH)
         return connection
-    except sqlite3.Error as e:
-        raise Exception(f"Error al conectar con SQLite: {e}")
+
+
+async def get_async_sqlite() -> aiosqlite.Connection:
+    """
+    Conexión aiosqlite compartida; la abre en el primer uso si la app no lo hizo
+    (comandos de consola, scripts).
+    """
+    if _async_sqlite is None:
+        return await init_async_sqlite()
+    return _async_sqlite
+
+
+@asynccontextmanager
+async def sqlite_transaction():
+    """
+    Transacción de escritura sobre la conexión compartida: confirma al salir del bloque
+    y hace rollback si hubo una excepción.
+    """
+    connection = await get_async_sqlite()
+    async with _async_sqlite_write_lock:
+        try:
+            yield connection
+            await connection.commit()
+        except BaseException:
+            await connection.rollback()
+            raise
+
+
+async def close_async_sqlite():
+    global _async_sqlite
+    connection, _async_sqlite = _async_sqlite, None
+    if connection is not None:
+        await connection.close()
@@ -0,0 +1,79 @@
+import fcntl
+import os
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.core.logging_config import logger
+
+
+class FileLock:
+    """
+    Lock exclusivo entre procesos basado en flock sobre un archivo. Sirve para que un
+    trabajo programado corra en un solo worker de uvicorn (o en el CLI) a la vez.
+    El sistema operativo libera el lock si el proceso muere.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+
+    def acquire(self, blocking: bool = False) -> bool:
+        if self._fd is not None:
+            return True
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is None:
+            return
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        if not self.acquire(blocking=True):
+            raise RuntimeError(f"No se pudo obtener el lock {self.path}")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+def try_lock(path: str) -> Optional[FileLock]:
+    """
+    Intenta tomar el lock sin esperar. Retorna el FileLock tomado o None si otro proceso lo tiene.
+    """
+    lock = FileLock(path)
+    if lock.acquire(blocking=False):
+        return lock
+    logger.info("El lock %s está tomado por otro proceso.", path)
+    return None
+
+
+def seconds_since_mark(path: str) -> Optional[float]:
+    """
+    Segundos desde la última vez que se marcó `path` con `mark_now` (None si nunca).
+    Los trabajos programados la usan para respetar su intervalo entre todos los workers.
+    """
+    try:
+        return time.time() - os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def mark_now(path: str):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(datetime.now(timezone.utc).isoformat())
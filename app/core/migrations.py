@@ -0,0 +1,164 @@
+import os
+import sqlite3
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from app.config import settings
+from app.core.logging_config import logger
+
+# Migraciones del esquema de storage/verification.db. La versión aplicada se guarda en
+# PRAGMA user_version; al iniciar, cada worker aplica las pendientes en orden dentro de
+# una transacción BEGIN IMMEDIATE, así dos workers que arrancan a la vez no las repiten.
+# Las migraciones ya publicadas no se editan: los cambios van en una migración nueva.
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    statements: Tuple[str, ...]
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Tablas base (users, tokens, verification, outbox)", (
+        # Las tablas pueden existir desde antes de las migraciones: IF NOT EXISTS
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER PRIMARY KEY,
+            first_name TEXT,
+            last_name TEXT,
+            email TEXT,
+            mobile TEXT,
+            password TEXT,
+            service_policies_accepted INTEGER NOT NULL DEFAULT 0,
+            service_policies_acceptance_date TIMESTAMP,
+            street TEXT,
+            ci TEXT
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS tokens (
+            token TEXT NOT NULL,
+            user_id INTEGER NOT NULL,
+            token_type TEXT NOT NULL,
+            expires_at TEXT,
+            client_ip TEXT,
+            user_agent TEXT,
+            revoked_at TIMESTAMP,
+            used INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS verification (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT NOT NULL,
+            code TEXT NOT NULL,
+            status INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            dedupe_key TEXT,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            max_attempts INTEGER NOT NULL,
+            next_attempt_at REAL NOT NULL,
+            locked_until REAL,
+            last_error TEXT,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        )
+        """,
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_outbox_dedupe_key ON outbox (dedupe_key)",
+        "CREATE INDEX IF NOT EXISTS ix_outbox_status_next_attempt ON outbox (status, next_attempt_at)",
+    )),
+    Migration(2, "Índices de las consultas por token y por email", (
+        # Dos logins del mismo usuario en el mismo segundo generan el mismo JWT: se deja
+        # una sola fila por token antes de exigir unicidad
+        "DELETE FROM tokens WHERE rowid NOT IN (SELECT MIN(rowid) FROM tokens GROUP BY token)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_tokens_token ON tokens (token)",
+        "CREATE INDEX IF NOT EXISTS ix_verification_email_created_at ON verification (email, created_at)",
+        "CREATE INDEX IF NOT EXISTS ix_users_email ON users (email)",
+    )),
+    Migration(3, "Índices del job de retención", (
+        "CREATE INDEX IF NOT EXISTS ix_tokens_expires_at ON tokens (expires_at)",
+        # Parcial: solo los tokens de restablecimiento ya usados
+        "CREATE INDEX IF NOT EXISTS ix_tokens_used ON tokens (used) WHERE used = 1",
+    )),
+    Migration(4, "Secuencia de revocación de tokens", (
+        "ALTER TABLE tokens ADD COLUMN revocation_seq INTEGER",
+        # Contador propio: no retrocede cuando la retención borra la fila con la secuencia mayor
+        """
+        CREATE TABLE IF NOT EXISTS token_revocation_seq (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            value INTEGER NOT NULL
+        )
+        """,
+        # Los tokens revocados antes de esta migración también entran al índice
+        "UPDATE tokens SET revocation_seq = rowid WHERE revoked_at IS NOT NULL",
+        "INSERT INTO token_revocation_seq (id, value) SELECT 1, COALESCE(MAX(revocation_seq), 0) FROM tokens",
+        "CREATE INDEX IF NOT EXISTS ix_tokens_revocation_seq ON tokens (revocation_seq) WHERE revocation_seq IS NOT NULL",
+    )),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # isolation_level=None: las transacciones se abren explícitamente con BEGIN IMMEDIATE
+    connection = sqlite3.connect(path, timeout=settings.SQLITE_BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+    # Tiene que ir antes que journal_mode: el cambio a WAL inicializa el archivo y, desde
+    # ahí, auto_vacuum solo cambia con un VACUUM completo. En una base existente no hace
+    # nada (`python -m app.commands.retention --enable-incremental-vacuum`). Permite que
+    # el job de retención devuelva páginas libres con incremental_vacuum.
+    connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    connection.execute("PRAGMA journal_mode=WAL")
+    return connection
+
+
+def get_schema_version(connection: sqlite3.Connection) -> int:
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+
+def run_migrations(path: str = None) -> int:
+    """
+    Aplica las migraciones pendientes y retorna la versión final del esquema.
+    """
+    path = path or settings.SQLITE_PATH
+    is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+    connection = _connect(path)
+    try:
+        # 2 = INCREMENTAL: una base creada aquí siempre debe quedar así
+        if is_new and connection.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            raise RuntimeError(f"La base nueva {path} no quedó con auto_vacuum=INCREMENTAL.")
+        pending = [m for m in MIGRATIONS if m.version > get_schema_version(connection)]
+        for migration in pending:
+            # El lock de escritura se toma antes de leer la versión: otro worker pudo
+            # aplicar la migración mientras este esperaba
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                if get_schema_version(connection) >= migration.version:
+                    connection.execute("ROLLBACK")
+                    continue
+                for statement in migration.statements:
+                    connection.execute(statement)
+                connection.execute(f"PRAGMA user_version = {migration.version}")
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                logger.exception("Error al aplicar la migración %s (%s)", migration.version, migration.description)
+                raise
+            logger.info("Migración %s aplicada en %s: %s", migration.version, path, migration.description)
+
+        version = get_schema_version(connection)
+        if version > LATEST_VERSION:
+            logger.warning("El esquema de %s está en la versión %s, posterior a la última conocida (%s).",
+                           path, version, LATEST_VERSION)
+        return version
+    finally:
+        connection.close()
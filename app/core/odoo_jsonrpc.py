@@ -0,0 +1,163 @@
+import asyncio
+import itertools
+
+import httpx
+
+from app.config import settings
+from app.core.logging_config import logger
+from app.core.resilience import odoo_timeout
+
+# Excepciones de Odoo que indican credenciales o sesión inválidas
+ODOO_SESSION_ERROR_NAMES = (
+    "odoo.exceptions.AccessDenied",
+    "odoo.http.SessionExpiredException",
+)
+
+
+class OdooJsonRpcError(Exception):
+    """
+    Error devuelto por el endpoint /jsonrpc de Odoo (campo 'error' de la respuesta).
+    """
+
+    def __init__(self, error: dict):
+        self.error = error or {}
+        data = self.error.get("data") or {}
+        self.name = data.get("name", "")
+        self.odoo_message = data.get("message") or self.error.get("message", "")
+        super().__init__(f"{self.name}: {self.odoo_message}" if self.name else self.odoo_message)
+
+    @property
+    def is_session_error(self) -> bool:
+        return self.name in ODOO_SESSION_ERROR_NAMES
+
+
+class OdooJsonRpcClient:
+    """
+    Cliente asíncrono para el endpoint /jsonrpc de Odoo sobre un `httpx.AsyncClient`
+    compartido (keep-alive). Mismo contrato que el pool XML-RPC: se autentica una
+    vez, guarda el uid y reautentica solo ante errores de acceso/sesión.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        db: str,
+        username: str,
+        password: str,
+        client: httpx.AsyncClient = None,
+        max_connections: int = 32,
+    ):
+        self.url = url.rstrip("/")
+        self.db = db
+        self.username = username
+        self.password = password
+        self._client = client
+        self._owns_client = client is None
+        self._max_connections = max_connections
+        self._ids = itertools.count(1)
+        self._uid = None
+        self._auth_generation = 0
+        self._auth_lock = asyncio.Lock()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=odoo_timeout(),
+                limits=httpx.Limits(
+                    max_connections=self._max_connections,
+                    max_keepalive_connections=self._max_connections,
+                )
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None and self._owns_client:
+            await self._client.aclose()
+        self._client = None
+
+    async def call(self, service: str, method: str, *args):
+        """
+        Llama `service.method(*args)` a través de /jsonrpc y retorna el campo 'result'.
+        """
+        payload = {
+            "jsonrpc": "2.0",
+            "method": "call",
+            "params": {"service": service, "method": method, "args": list(args)},
+            "id": next(self._ids),
+        }
+        response = await self.client.post(f"{self.url}/jsonrpc", json=payload)
+        response.raise_for_status()
+        data = response.json()
+        if data.get("error"):
+            raise OdooJsonRpcError(data["error"])
+        return data.get("result")
+
+    async def authenticate(self, force: bool = False, seen_generation: int = None) -> int:
+        if seen_generation is None:
+            seen_generation = self._auth_generation
+        async with self._auth_lock:
+            if self._uid is not None and (not force or self._auth_generation != seen_generation):
+                return self._uid
+            uid = await self.call("common", "authenticate", self.db, self.username, self.password, {})
+            if not uid:
+                self._uid = None
+                raise Exception("Autenticación fallida en Odoo")
+            self._uid = uid
+            self._auth_generation += 1
+            logger.info("Autenticado en Odoo (JSON-RPC) como uid=%s", uid)
+            return uid
+
+    async def execute_kw(self, model: str, method: str, args: list, kwargs: dict = None):
+        if kwargs is None:
+            kwargs = {}
+        uid = self._uid if self._uid is not None else await self.authenticate()
+        generation = self._auth_generation
+        try:
+            return await self.call("object", "execute_kw", self.db, uid, self.password, model, method, args, kwargs)
+        except OdooJsonRpcError as e:
+            if not e.is_session_error:
+                raise
+            logger.warning("Sesión de Odoo rechazada (%s). Reautenticando...", e.odoo_message)
+            uid = await self.authenticate(force=True, seen_generation=generation)
+            return await self.call("object", "execute_kw", self.db, uid, self.password, model, method, args, kwargs)
+
+
+_jsonrpc_client = None
+
+
+def is_jsonrpc_enabled() -> bool:
+    return settings.ODOO_RPC_PROTOCOL.lower() == "jsonrpc"
+
+
+async def init_odoo_jsonrpc_client() -> OdooJsonRpcClient:
+    """
+    Crea el cliente JSON-RPC del worker e intenta autenticarse. Igual que el pool
+    XML-RPC, si Odoo no responde al arrancar se autentica en la primera llamada.
+    """
+    client = get_odoo_jsonrpc_client()
+    try:
+        await client.authenticate()
+    except Exception as e:
+        logger.warning("No se pudo autenticar en Odoo (JSON-RPC) al iniciar: %s", str(e))
+    return client
+
+
+async def close_odoo_jsonrpc_client():
+    global _jsonrpc_client
+    if _jsonrpc_client is not None:
+        await _jsonrpc_client.close()
+        _jsonrpc_client = None
+
+
+def get_odoo_jsonrpc_client() -> OdooJsonRpcClient:
+    global _jsonrpc_client
+    if _jsonrpc_client is None:
+        _jsonrpc_client = OdooJsonRpcClient(
+            settings.ODOO_URL,
+            settings.ODOO_DB,
+            settings.ODOO_USERNAME,
+            settings.ODOO_PASSWORD,
+            max_connections=settings.ODOO_POOL_SIZE,
+        )
+    return _jsonrpc_client
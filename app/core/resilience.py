@@ -0,0 +1,235 @@
+import asyncio
+import http.client
+import socket
+import threading
+import time
+import xmlrpc.client
+from contextlib import asynccontextmanager, contextmanager
+
+import httpx
+from fastapi import HTTPException
+
+from app.config import settings
+from app.core.logging_config import logger
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class UpstreamUnavailable(HTTPException):
+    """
+    503 devuelto sin llamar al upstream: circuito abierto o bulkhead saturado.
+    """
+
+    def __init__(self, upstream: str, reason: str):
+        super().__init__(status_code=503, detail=f"Servicio {upstream} no disponible temporalmente: {reason}")
+        self.upstream = upstream
+
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    """
+    Errores que indican que el upstream no está sano (caído, lento o con 5xx).
+    Los errores de negocio (Fault de Odoo, 4xx de Pontis) no abren el circuito.
+    """
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    if isinstance(exc, xmlrpc.client.ProtocolError):
+        return exc.errcode >= 500
+    if isinstance(exc, HTTPException):
+        return False
+    status_code = getattr(exc, "status_code", None)
+    if isinstance(status_code, int):
+        # p. ej. python_http_client.exceptions.HTTPError (SendGrid)
+        return status_code >= 500
+    return isinstance(exc, (
+        OSError,
+        TimeoutError,
+        socket.timeout,
+        asyncio.TimeoutError,
+        http.client.HTTPException,
+        httpx.TransportError,
+    ))
+
+
+class UpstreamGuard:
+    """
+    Protección por upstream (Odoo, Pontis, SendGrid):
+      - Bulkhead: máximo `max_concurrency` llamadas simultáneas; si no hay cupo en
+        `acquire_timeout` segundos se responde 503 en lugar de encolar sin límite.
+      - Circuit breaker: tras `failure_threshold` fallos seguidos el circuito se abre
+        y las llamadas fallan de inmediato con 503 durante `recovery_timeout` segundos;
+        luego se deja pasar una llamada de prueba (half-open).
+    Ofrece `acall()` para código async y `call()` para código síncrono (hilos).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        acquire_timeout: float = 5.0,
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.acquire_timeout = acquire_timeout
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.total_calls = 0
+        self.total_failures = 0
+        self.rejected = 0
+        self._in_flight = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self._async_semaphore = asyncio.Semaphore(max_concurrency)
+        self._sync_semaphore = threading.BoundedSemaphore(max_concurrency)
+
+    # --- Circuit breaker -----------------------------------------------------
+
+    def _before_call(self) -> bool:
+        """
+        Registra el inicio de una llamada. Retorna True si es la llamada de prueba del
+        half-open: solo esa decide, al terminar, si el circuito se cierra o se vuelve a abrir.
+        """
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.recovery_timeout:
+                    self.rejected += 1
+                    raise UpstreamUnavailable(self.name, "circuito abierto")
+                self.state = HALF_OPEN
+                logger.info("Circuito de %s en half-open: se permite una llamada de prueba.", self.name)
+            is_probe = False
+            if self.state == HALF_OPEN:
+                if self._probe_in_flight:
+                    self.rejected += 1
+                    raise UpstreamUnavailable(self.name, "circuito en prueba")
+                self._probe_in_flight = True
+                is_probe = True
+            self.total_calls += 1
+            self._in_flight += 1
+            return is_probe
+
+    def _after_call(self, is_probe: bool, exc: BaseException = None):
+        with self._lock:
+            self._in_flight -= 1
+            if is_probe:
+                self._probe_in_flight = False
+            if isinstance(exc, asyncio.CancelledError):
+                # El llamador se canceló: no dice nada sobre la salud del upstream
+                return
+            failed = exc is not None and is_upstream_failure(exc)
+            if failed:
+                self.total_failures += 1
+            # Una llamada que empezó antes de abrirse el circuito y termina durante la
+            # prueba no cambia el estado: eso lo decide solo la llamada de prueba
+            if not is_probe and self.state != CLOSED:
+                return
+            if failed:
+                self.consecutive_failures += 1
+                if is_probe or self.consecutive_failures >= self.failure_threshold:
+                    if self.state != OPEN:
+                        logger.error(
+                            "Circuito de %s abierto tras %s fallos seguidos: %s",
+                            self.name, self.consecutive_failures, exc
+                        )
+                    self.state = OPEN
+                    self.opened_at = time.monotonic()
+                return
+            if self.state != CLOSED:
+                logger.info("Circuito de %s cerrado: el upstream respondió correctamente.", self.name)
+            self.state = CLOSED
+            self.consecutive_failures = 0
+
+    # --- Bulkhead ------------------------------------------------------------
+
+    @asynccontextmanager
+    async def acall(self):
+        try:
+            await asyncio.wait_for(self._async_semaphore.acquire(), timeout=self.acquire_timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.rejected += 1
+            raise UpstreamUnavailable(self.name, "demasiadas peticiones en curso")
+        try:
+            is_probe = self._before_call()
+            try:
+                yield
+            except BaseException as e:
+                self._after_call(is_probe, e)
+                raise
+            else:
+                self._after_call(is_probe)
+        finally:
+            self._async_semaphore.release()
+
+    @contextmanager
+    def call(self):
+        if not self._sync_semaphore.acquire(timeout=self.acquire_timeout):
+            with self._lock:
+                self.rejected += 1
+            raise UpstreamUnavailable(self.name, "demasiadas peticiones en curso")
+        try:
+            is_probe = self._before_call()
+            try:
+                yield
+            except BaseException as e:
+                self._after_call(is_probe, e)
+                raise
+            else:
+                self._after_call(is_probe)
+        finally:
+            self._sync_semaphore.release()
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "in_flight": self._in_flight,
+                "max_concurrency": self.max_concurrency,
+                "total_calls": self.total_calls,
+                "total_failures": self.total_failures,
+                "rejected": self.rejected,
+                "open_for_seconds": (
+                    round(time.monotonic() - self.opened_at, 1) if self.state != CLOSED and self.opened_at else 0
+                ),
+            }
+
+
+def _guard(name: str, max_concurrency: int) -> UpstreamGuard:
+    return UpstreamGuard(
+        name,
+        max_concurrency=max_concurrency,
+        failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+        recovery_timeout=settings.CIRCUIT_RECOVERY_SECONDS,
+        acquire_timeout=settings.BULKHEAD_ACQUIRE_TIMEOUT_SECONDS,
+    )
+
+
+odoo_guard = _guard("odoo", settings.ODOO_MAX_CONCURRENCY)
+pontis_guard = _guard("pontis", settings.PONTIS_MAX_CONCURRENCY)
+# La conciliación masiva usa su propio bulkhead y circuito: no ocupa cupos del tráfico
+# en vivo y sus fallos no abren el circuito de "pontis"
+pontis_reconcile_guard = _guard("pontis-reconcile", settings.RECONCILE_PONTIS_CONCURRENCY)
+sendgrid_guard = _guard("sendgrid", settings.SENDGRID_MAX_CONCURRENCY)
+
+
+def upstreams_status() -> list:
+    return [guard.status() for guard in (odoo_guard, pontis_guard, pontis_reconcile_guard, sendgrid_guard)]
+
+
+def httpx_timeout(connect: float, read: float) -> httpx.Timeout:
+    return httpx.Timeout(connect=connect, read=read, write=read, pool=connect)
+
+
+def pontis_timeout() -> httpx.Timeout:
+    return httpx_timeout(settings.PONTIS_CONNECT_TIMEOUT, settings.PONTIS_READ_TIMEOUT)
+
+
+def odoo_timeout() -> httpx.Timeout:
+    return httpx_timeout(settings.ODOO_CONNECT_TIMEOUT, settings.ODOO_READ_TIMEOUT)
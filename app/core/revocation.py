@@ -0,0 +1,111 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from app.config import settings
+from app.core.database import get_async_sqlite
+from app.core.logging_config import logger
+
+# Índice de tokens revocados compartido entre los workers de uvicorn.
+#
+# Cada revocación (logout) guarda en `tokens` un `revocation_seq` creciente, tomado del
+# contador `token_revocation_seq`. Cada worker mantiene en memoria los tokens revocados
+# que aún no vencen y, cada REVOCATION_SYNC_INTERVAL_SECONDS, lee solo las revocaciones
+# con secuencia mayor a la última que vio. `is_revoked` responde con una búsqueda en un
+# dict, sin ir a la base. Un token revocado en otro worker se rechaza aquí a más tardar
+# tras un intervalo de sincronización; en el worker que lo revoca, de inmediato.
+
+# token -> expires_at (ISO local, como lo guarda `store_token`)
+_revoked: Dict[str, Optional[str]] = {}
+_last_seq = 0
+_last_prune = 0.0
+_sync_lock = asyncio.Lock()
+
+# Cada cuánto se descartan de memoria los tokens revocados que ya vencieron
+PRUNE_INTERVAL_SECONDS = 60
+
+
+def is_revoked(token: str) -> bool:
+    return token in _revoked
+
+
+def mark_revoked(token: str, expires_at: Optional[str], seq: int = None):
+    """
+    Registra una revocación hecha por este worker sin esperar a la próxima sincronización.
+    """
+    global _last_seq
+    _revoked[token] = expires_at
+    # Solo se avanza si no hay huecos: las revocaciones intermedias de otros workers
+    # llegan en la siguiente sincronización
+    if seq is not None and seq == _last_seq + 1:
+        _last_seq = seq
+
+
+def _prune(now: float):
+    global _last_prune
+    if now - _last_prune < PRUNE_INTERVAL_SECONDS:
+        return
+    _last_prune = now
+    cutoff = datetime.now().isoformat()
+    for token in [token for token, expires_at in _revoked.items() if expires_at and expires_at < cutoff]:
+        del _revoked[token]
+
+
+async def sync_revocations() -> int:
+    """
+    Trae las revocaciones nuevas de SQLite. Retorna cuántas se agregaron.
+    """
+    global _last_seq
+    async with _sync_lock:
+        conn = await get_async_sqlite()
+        async with conn.execute(
+            "SELECT token, expires_at, revocation_seq FROM tokens WHERE revocation_seq > ? ORDER BY revocation_seq",
+            (_last_seq,)
+        ) as cursor:
+            rows = await cursor.fetchall()
+        for row in rows:
+            _revoked[row["token"]] = row["expires_at"]
+        if rows:
+            _last_seq = max(_last_seq, rows[-1]["revocation_seq"])
+        _prune(time.monotonic())
+        return len(rows)
+
+
+def revocation_stats() -> dict:
+    return {"revoked_in_memory": len(_revoked), "last_seq": _last_seq}
+
+
+async def _sync_loop(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            added = await sync_revocations()
+            if added:
+                logger.debug("Revocaciones sincronizadas: %s nuevas (secuencia %s).", added, _last_seq)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Error al sincronizar las revocaciones de tokens.")
+
+
+_sync_task = None
+
+
+async def start_revocation_sync():
+    """
+    Carga las revocaciones vigentes y lanza la sincronización periódica.
+    """
+    global _sync_task
+    await sync_revocations()
+    logger.info("Índice de revocaciones cargado: %s", revocation_stats())
+    if _sync_task is None:
+        _sync_task = asyncio.create_task(_sync_loop(settings.REVOCATION_SYNC_INTERVAL_SECONDS))
+
+
+async def stop_revocation_sync():
+    global _sync_task
+    if _sync_task is not None:
+        _sync_task.cancel()
+        await asyncio.gather(_sync_task, return_exceptions=True)
+        _sync_task = None
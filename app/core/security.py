@@ -3,9 +3,9 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from datetime import datetime, timedelta, timezone
 from app.config import settings
+from app.core.revocation import is_revoked
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
-blacklisted_tokens = set()
 
 def create_access_token(user_id: int, contact_id: int, expires_delta: timedelta = None):
     to_encode = {
@@ -36,10 +36,10 @@ def create_password_reset_token(user_id: int, expires_minutes: int = 15) -> str:
 def verify_token(token: str = Depends(oauth2_scheme)):
     """
     Verifica el token de acceso y retorna el payload completo.
-    Se rechaza el token si está en la lista negra o si faltan campos obligatorios.
+    Se rechaza el token si fue revocado (logout en cualquier worker) o si faltan campos obligatorios.
     """
     try:
-        if token in blacklisted_tokens:
+        if is_revoked(token):
             raise HTTPException(status_code=401, detail="Token inválido o expirado")
         payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
         user_id = payload.get("user_id")
@@ -2,6 +2,7 @@ from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail
 from app.config import settings
 from app.core.logging_config import logger
+from app.core.resilience import sendgrid_guard
 
 
 
@@ -14,7 +15,9 @@ def send_email_sendgrid(to_email: str, subject: str, html_content: str):
     )
     try:
         sg = SendGridAPIClient(settings.SENDGRID_API_KEY)
-        response = sg.send(message)
+        sg.client.timeout = settings.SENDGRID_TIMEOUT
+        with sendgrid_guard.call():
+            response = sg.send(message)
         logger.info("Correo enviado a %s, status code: %s", to_email, response.status_code)
         return response
     except Exception as e:
@@ -0,0 +1,60 @@
+import asyncio
+import copy
+import json
+
+
+class _Call:
+    __slots__ = ("task", "joiners")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.joiners = 0
+
+
+class SingleFlight:
+    """
+    Agrupa llamadas concurrentes idénticas: mientras una llamada con la misma clave
+    está en curso, los demás llamadores esperan su resultado en lugar de repetirla.
+
+    Si la llamada se compartió, cada llamador recibe su propia copia del resultado
+    para que nadie modifique lo que ven los demás. Un llamador cancelado no cancela
+    la llamada compartida.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.shared = 0
+        self._inflight = {}
+
+    async def do(self, key, factory):
+        call = self._inflight.get(key)
+        if call is None:
+            self.calls += 1
+            call = _Call(asyncio.ensure_future(factory()))
+            self._inflight[key] = call
+            call.task.add_done_callback(lambda _task: self._forget(key, call))
+        else:
+            self.shared += 1
+            call.joiners += 1
+
+        result = await asyncio.shield(call.task)
+        # Con el task terminado ya no se suman llamadores: `joiners` es definitivo
+        return copy.deepcopy(result) if call.joiners else result
+
+    def _forget(self, key, call: _Call):
+        if self._inflight.get(key) is call:
+            del self._inflight[key]
+        # Marca la excepción como recuperada aunque todos los llamadores se hayan cancelado
+        if not call.task.cancelled():
+            call.task.exception()
+
+    def stats(self) -> dict:
+        return {"name": self.name, "inflight": len(self._inflight), "calls": self.calls, "shared": self.shared}
+
+
+def make_key(*parts) -> str:
+    """
+    Clave estable para argumentos tipo JSON (listas, tuplas, dicts, escalares).
+    """
+    return json.dumps(parts, sort_keys=True, default=str)
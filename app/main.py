@@ -1,9 +1,61 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.core.migrations import run_migrations
+from app.core.database import close_async_sqlite, close_odoo_pool, close_sqlite_connections, init_async_sqlite, init_odoo_pool
+from app.core.revocation import start_revocation_sync, stop_revocation_sync
+from app.core.odoo_jsonrpc import close_odoo_jsonrpc_client, init_odoo_jsonrpc_client, is_jsonrpc_enabled
+from app.services.api_service import close_pontis_client, init_pontis_client
+from app.services.odoo_service import init_odoo_executor, shutdown_odoo_executor
+from app.services.outbox_service import start_outbox_worker, stop_outbox_worker
+from app.services.reconciliation_service import start_reconciliation_scheduler, stop_reconciliation_scheduler
+from app.services.retention_service import start_retention_scheduler, stop_retention_scheduler
+from app.services.reference_data import warm_reference_data
 from app.routes import auth, contacts, email, groups, invoices, system, users
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Esquema e índices de storage/verification.db al día antes de atender peticiones
+    run_migrations()
+    # Pool de Odoo compartido por el worker: se autentica una sola vez al iniciar
+    init_odoo_pool()
+    # Executor acotado para que las llamadas XML-RPC no bloqueen el event loop
+    init_odoo_executor()
+    if is_jsonrpc_enabled():
+        await init_odoo_jsonrpc_client()
+    # Cliente HTTP de Pontis compartido (keep-alive)
+    init_pontis_client()
+    # Conexión aiosqlite compartida (usuarios, tokens y códigos de verificación)
+    await init_async_sqlite()
+    # Tokens revocados (logout) en memoria, sincronizados entre workers por secuencia
+    await start_revocation_sync()
+    # Grupos, productos de planes, diarios, etc. quedan en memoria desde el arranque
+    await warm_reference_data()
+    # Worker del outbox: pasos del checkout que se ejecutan después de responder
+    start_outbox_worker()
+    # Conciliación diaria de suscripciones (un solo worker la ejecuta por intervalo)
+    start_reconciliation_scheduler()
+    # Limpieza de tokens y códigos de verificación que ya no se usan
+    start_retention_scheduler()
+    try:
+        yield
+    finally:
+        await stop_retention_scheduler()
+        await stop_reconciliation_scheduler()
+        await stop_outbox_worker()
+        await close_pontis_client()
+        await close_odoo_jsonrpc_client()
+        shutdown_odoo_executor()
+        close_odoo_pool()
+        await stop_revocation_sync()
+        await close_async_sqlite()
+        close_sqlite_connections()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # CORS Configuration
 origins = [
@@ -1,4 +1,3 @@
-import aiosqlite
 from app.core.logging_config import logger
 from fastapi import APIRouter, HTTPException, Request, Depends, Response
 from jose import jwt, JWTError
@@ -6,13 +5,15 @@ from datetime import datetime, timedelta
 from app.core.security import settings 
 from app.core.email_utils import send_reset_password_email
 from app.core.email_validation import is_valid_email
-from app.core.security import create_access_token, create_password_reset_token, verify_token, oauth2_scheme, blacklisted_tokens
+from app.core.security import create_access_token, create_password_reset_token, verify_token, oauth2_scheme
 from app.core.database import get_odoo_connection
+from app.services.odoo_service import authenticate_odoo_user, execute_odoo_method_async
+from app.services.reference_data import get_group_id
 from app.routes.users import _is_valid_password
 from app.services.api_service import update_customer_password_in_pontis
 from app.services.sqlite_service import update_user_password
 from app.services.token_service import get_token_record, mark_token_as_used, revoke_token, store_token
-from app.services.verification_service import handle_verification_request, verify_code_and_email
+from app.services.verification_service import get_user_info, handle_verification_request, verify_code_and_email
 
 router = APIRouter(tags=["authentication"])
 
@@ -37,13 +38,13 @@ async def login(request: Request, response: Response):
             raise HTTPException(status_code=500, detail="Error en la conexión con Odoo.")
 
         # Autenticar usuario en Odoo
-        user_id = conn["common"].authenticate(conn["db"], email, password, {})
+        user_id = await authenticate_odoo_user(conn, email, password)
         if not user_id:
             raise HTTPException(status_code=401, detail="Credenciales inválidas.")
 
         # Obtener información del usuario
-        users = conn["models"].execute_kw(
-            conn["db"], conn["uid"], conn["password"],
+        users = await execute_odoo_method_async(
+            conn,
             "res.users", "search_read", [[["id", "=", user_id]]],
             {"fields": ["id", "name", "login", "email", "partner_id"]}
         )
@@ -57,7 +58,7 @@ async def login(request: Request, response: Response):
 
         # Almacenar el token en la tabla 'tokens'
         # (Puedes obtener client_ip y user_agent del request si lo deseas)
-        store_token(access_token, user["id"], "access", expires_at)
+        await store_token(access_token, user["id"], "access", expires_at)
 
         # Configurar respuesta con cookie
         response = JSONResponse(
@@ -107,13 +108,13 @@ async def login_internal(request: Request, response: Response):
             raise HTTPException(status_code=500, detail="Error en la conexión con Odoo.")
 
         # Autenticar usuario en Odoo
-        user_id = conn["common"].authenticate(conn["db"], email, password, {})
+        user_id = await authenticate_odoo_user(conn, email, password)
         if not user_id:
             raise HTTPException(status_code=401, detail="Credenciales inválidas.")
 
         # Obtener información del usuario, incluyendo grupos (agregamos groups_id)
-        user_data = conn["models"].execute_kw(
-            conn["db"], conn["uid"], conn["password"],
+        user_data = await execute_odoo_method_async(
+            conn,
             "res.users", "search_read", [[["id", "=", user_id]]],
             {"fields": ["id", "name", "login", "email", "partner_id", "groups_id"]}
         )
@@ -122,15 +123,9 @@ async def login_internal(request: Request, response: Response):
         user = user_data[0]
 
         # Obtener el ID del grupo interno "base.group_user"
-        internal_group = conn["models"].execute_kw(
-            conn["db"], conn["uid"], conn["password"],
-            "ir.model.data", "search_read",
-            [[('model', '=', 'res.groups'), ('module', '=', 'base'), ('name', '=', 'group_user')]],
-            {"fields": ["res_id"], "limit": 1}
-        )
-        if not internal_group:
+        internal_group_id = await get_group_id(conn, 'group_user')
+        if not internal_group_id:
             raise HTTPException(status_code=500, detail="No se encontró el grupo interno.")
-        internal_group_id = internal_group[0]["res_id"]
 
         # Verificar que el usuario pertenezca al grupo interno
         # Los grupos se retornan como una lista de IDs.
@@ -142,7 +137,7 @@ async def login_internal(request: Request, response: Response):
         expires_at = (datetime.now() + timedelta(minutes=settings.JWT_EXPIRATION_MINUTES)).isoformat()
 
         # Almacenar el token en la tabla 'tokens'
-        store_token(access_token, user["id"], "access", expires_at)
+        await store_token(access_token, user["id"], "access", expires_at)
 
         # Configurar respuesta con cookie
         response = JSONResponse(
@@ -171,7 +166,7 @@ async def login_internal(request: Request, response: Response):
 
 
 @router.post("/logout/{id_user}")
-def logout(id_user: int, response: Response, token: str = Depends(oauth2_scheme)):
+async def logout(id_user: int, response: Response, token: str = Depends(oauth2_scheme)):
     """
     Cierra la sesión del usuario.
     Se recibe el 'id_user' por ruta y se compara con el 'user_id' del token.
@@ -185,7 +180,7 @@ def logout(id_user: int, response: Response, token: str = Depends(oauth2_scheme)
         raise HTTPException(status_code=403, detail="No autorizado para cerrar sesión de otro usuario.")
     
     # Obtener el registro del token de la base de datos
-    token_record = get_token_record(token)
+    token_record = await get_token_record(token)
     if token_record is None:
         raise HTTPException(status_code=401, detail="Token no encontrado.")
     if token_record.get("revoked_at") is not None:
@@ -193,7 +188,7 @@ def logout(id_user: int, response: Response, token: str = Depends(oauth2_scheme)
 
     # Revocar el token
     try:
-        revoke_token(token)
+        await revoke_token(token)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al revocar token: {str(e)}")
     
@@ -216,8 +211,8 @@ async def verify_email(request: Request):
     
     # Verificar que el correo sea unico en los contactos de odoo, es decir que no exista
     conn = get_odoo_connection()
-    contacts = conn['models'].execute_kw(
-        conn['db'], conn['uid'], conn['password'],
+    contacts = await execute_odoo_method_async(
+        conn,
         'res.partner', 'search_read', [[['email', '=', email]]]
     )   
     if contacts:
@@ -225,7 +220,7 @@ async def verify_email(request: Request):
     
     # Manejar la lógica de verificación
     try:
-        result = handle_verification_request(email)
+        result = await handle_verification_request(email)
         if "error" in result:
             raise HTTPException(status_code=400, detail=result["error"])
         return result
@@ -243,7 +238,7 @@ async def verify_code(request: Request):
         raise HTTPException(status_code=400, detail="Los campos 'email' y 'code' son obligatorios.")
 
     # Lógica de verificación
-    result = verify_code_and_email(email, code)
+    result = await verify_code_and_email(email, code)
     if "error" in result:
         raise HTTPException(status_code=400, detail=result["error"])
 
@@ -261,12 +256,8 @@ async def forgot_password(request: Request):
         if not email:
             raise HTTPException(status_code=400, detail="El campo 'email' es obligatorio.")
 
-        # Verificar si el usuario existe en la base de datos 'users' (usando aiosqlite)
-        user = None
-        async with aiosqlite.connect("verification.db") as conn:
-            conn.row_factory = aiosqlite.Row
-            async with conn.execute("SELECT user_id, email FROM users WHERE email = ?", (email,)) as cursor:
-                user = await cursor.fetchone()
+        # Verificar si el usuario existe en la tabla 'users'
+        user = await get_user_info(email)
         generic_response = {"detail": "Si existe una cuenta asociada, se han enviado instrucciones al correo."}
         if not user:
             return generic_response
@@ -277,7 +268,7 @@ async def forgot_password(request: Request):
         expires_at = (datetime.now() + timedelta(minutes=15)).isoformat()
 
         # Almacenar el token de restablecimiento en la tabla 'tokens'
-        store_token(reset_token, user_id, "password_reset", expires_at)
+        await store_token(reset_token, user_id, "password_reset", expires_at)
 
         # Construir el enlace de restablecimiento (ajusta la URL a tu frontend)
         reset_link = f"https://maplenet.com.bo/reset-password?token={reset_token}"
@@ -357,7 +348,7 @@ async def reset_password(request: Request):
             raise HTTPException(status_code=401, detail="Token inválido: falta 'user_id'.")
 
         logger.debug("Verificando estado del token en la base de datos...")
-        token_record = get_token_record(reset_token)
+        token_record = await get_token_record(reset_token)
         if token_record is None:
             logger.warning("Token no encontrado en la base de datos.")
             raise HTTPException(status_code=401, detail="Token no encontrado.")
@@ -370,8 +361,8 @@ async def reset_password(request: Request):
 
         logger.info("Actualizando contraseña en Odoo para user_id=%s", user_id)
         odoo_conn = get_odoo_connection()
-        update_success = odoo_conn['models'].execute_kw(
-            odoo_conn['db'], odoo_conn['uid'], odoo_conn['password'],
+        update_success = await execute_odoo_method_async(
+            odoo_conn,
             'res.users', 'write', [[user_id], {'password': new_password}]
         )
         if not update_success:
@@ -379,7 +370,7 @@ async def reset_password(request: Request):
             raise HTTPException(status_code=500, detail="No se pudo actualizar la contraseña en Odoo.")
 
         logger.debug("Actualizando contraseña en SQLite para user_id=%s", user_id)
-        update_user_password(user_id, new_password)
+        await update_user_password(user_id, new_password)
 
         logger.debug("Actualizando contraseña en Pontis para MAP0%s", user_id)
         pontis_customer_id = "MAP0" + str(user_id)
@@ -387,7 +378,7 @@ async def reset_password(request: Request):
         logger.debug("Respuesta de Pontis: %s", response_pontis)
 
         logger.debug("Marcando el token como usado en la base de datos...")
-        mark_token_as_used(reset_token)
+        await mark_token_as_used(reset_token)
 
         logger.info("Contraseña restablecida exitosamente para user_id=%s", user_id)
         return {
@@ -3,7 +3,8 @@ from app.core.email_validation import is_valid_email
 from app.core.security import verify_token
 from app.core.database import get_odoo_connection
 from app.core.email_utils import send_final_match_email
-from app.services.odoo_service import execute_odoo_method
+from app.services.odoo_service import execute_odoo_method_async
+from app.services.reference_data import find_countries
 
 import logging
 
@@ -46,7 +47,7 @@ async def search_contacts(
     conn = get_odoo_connection()
     
     # Buscar contactos cuyo correo contenga (ilike) el valor proporcionado
-    contacts = execute_odoo_method(
+    contacts = await execute_odoo_method_async(
         conn,
         'res.partner',
         'search_read',
@@ -64,7 +65,7 @@ async def search_contacts(
     contact_ids = [contact["id"] for contact in contacts]
     
     # Buscar en res.users todos los usuarios cuyo partner_id esté en la lista de contact_ids
-    associated_users = execute_odoo_method(
+    associated_users = await execute_odoo_method_async(
         conn,
         'res.users',
         'search_read',
@@ -191,7 +192,7 @@ async def update_contact(
         # Conectar a Odoo
         conn = get_odoo_connection()
         logger.info("Actualizando contacto en Odoo con ID=%s", contact_id)
-        result = execute_odoo_method(
+        result = await execute_odoo_method_async(
             conn, 'res.partner', 'write',
             [[contact_id], update_fields]
         )
@@ -205,7 +206,7 @@ async def update_contact(
         logger.debug("Sincronizando datos en SQLite para user_id=%s", user_id)
 
         try:
-            update_user_record(
+            await update_user_record(
                 user_id=user_id,
                 first_name=first_name,
                 last_name=last_name,
@@ -266,7 +267,7 @@ async def create_contact(request: Request):
         conn = get_odoo_connection()
 
         # Validar que el correo no exista ya en Odoo
-        existing_contacts = execute_odoo_method(
+        existing_contacts = await execute_odoo_method_async(
             conn,
             'res.partner',
             'search_read',
@@ -278,20 +279,14 @@ async def create_contact(request: Request):
         logger.debug("Correo validado, no existe registro previo con el mismo correo.")
 
         # Buscar el país en Odoo usando el nombre (ilike para búsqueda flexible)
-        country_records = execute_odoo_method(
-            conn,
-            'res.country',
-            'search_read',
-            [[('name', 'ilike', pais)]],
-            {'fields': ['id', 'name']}
-        )
+        country_records = await find_countries(conn, pais)
         if not country_records:
             raise HTTPException(status_code=404, detail=f"País '{pais}' no encontrado en Odoo.")
         country_id = country_records[0]['id']
         logger.info("País encontrado: %s con ID: %s", country_records[0]['name'], country_id)
 
         # Validar que el correo no exista ya en Odoo
-        existing_contacts = execute_odoo_method(
+        existing_contacts = await execute_odoo_method_async(
             conn,
             'res.partner',
             'search_read',
@@ -311,7 +306,7 @@ async def create_contact(request: Request):
                 "mobile": phone
             }
             logger.debug("Payload para actualizar contacto existente: %s", update_payload)
-            update_result = execute_odoo_method(
+            update_result = await execute_odoo_method_async(
                 conn,
                 'res.partner',
                 'write',
@@ -322,7 +317,7 @@ async def create_contact(request: Request):
                 raise HTTPException(status_code=500, detail="No se pudo actualizar el contacto en Odoo.")
             
             # Leer los datos actualizados del contacto
-            updated_contact = execute_odoo_method(conn, "res.partner", "read", [[contact_id]])
+            updated_contact = await execute_odoo_method_async(conn, "res.partner", "read", [[contact_id]])
             if not updated_contact:
                 raise HTTPException(status_code=500, detail="Error al leer el contacto actualizado.")
             logger.debug("Datos del contacto actualizado: %s", updated_contact[0]['id'])
@@ -350,13 +345,13 @@ async def create_contact(request: Request):
                 "country_id": country_id  # Campo 'country_id'
             }
             logger.debug("Payload para crear contacto en Odoo: %s", contact_payload)
-            new_contact_id = execute_odoo_method(conn, "res.partner", "create", [contact_payload])
+            new_contact_id = await execute_odoo_method_async(conn, "res.partner", "create", [contact_payload])
             logger.info("ID de nuevo contacto creado en Odoo: %s", new_contact_id)
             if not new_contact_id:
                 raise HTTPException(status_code=500, detail="No se pudo crear el contacto en Odoo.")
 
             # Leer los datos del contacto recién creado
-            created_contact = execute_odoo_method(conn, "res.partner", "read", [[new_contact_id]])
+            created_contact = await execute_odoo_method_async(conn, "res.partner", "read", [[new_contact_id]])
             if not created_contact:
                 raise HTTPException(status_code=500, detail="Error al leer el contacto creado.")
             logger.debug("Datos del contacto creado: %s", created_contact[0]['id'])
@@ -404,7 +399,7 @@ async def get_contact_details(
     conn = get_odoo_connection()
     
     # Obtener todos los campos del contacto (lista vacía => todos)
-    contact_data = execute_odoo_method(
+    contact_data = await execute_odoo_method_async(
         conn,
         'res.partner',
         'read',
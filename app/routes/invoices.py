@@ -4,7 +4,8 @@ from app.core.security import verify_token
 from app.core.database import get_odoo_connection
 from datetime import date
 
-from app.services.odoo_service import execute_odoo_method
+from app.services.odoo_service import execute_odoo_method_async
+from app.services import reference_data
 
 
 router = APIRouter(prefix="/invoices", tags=["invoices"])
@@ -22,8 +23,8 @@ async def get_invoice(invoice_id: int, token: str = Depends(verify_token)):
     conn = get_odoo_connection()
     try:
         # Obtener los datos de la factura
-        invoice_data = conn['models'].execute_kw(
-            conn['db'], conn['uid'], conn['password'],
+        invoice_data = await execute_odoo_method_async(
+            conn,
             'account.move', 'read', [invoice_id]
         )
 
@@ -32,8 +33,8 @@ async def get_invoice(invoice_id: int, token: str = Depends(verify_token)):
 
         # obtenemos el invoice_line_ids
         invoice_line_ids = invoice_data[0]['invoice_line_ids']
-        invoice_lines = conn['models'].execute_kw(
-            conn['db'], conn['uid'], conn['password'],
+        invoice_lines = await execute_odoo_method_async(
+            conn,
             'account.move.line', 'read', [invoice_line_ids], {'fields': ['product_id', 'quantity', 'price_unit']}
         )
 
@@ -43,6 +44,8 @@ async def get_invoice(invoice_id: int, token: str = Depends(verify_token)):
             "invoice_lines": invoice_lines
         }
 
+    except HTTPException as http_err:
+        raise http_err
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener la factura: {str(e)}")
     
@@ -72,8 +75,8 @@ async def create_draft_invoice(request: Request, token: str = Depends(verify_tok
     try:
         # Paso 1: Verificar que el partner exista
         logger.info(f"Verificando la existencia del partner con ID {partner_id}...")
-        partner_data = conn['models'].execute_kw(
-            conn['db'], conn['uid'], conn['password'],
+        partner_data = await execute_odoo_method_async(
+            conn,
             'res.partner', 'read', [partner_id], {'fields': ['name']}
         )
         if not partner_data:
@@ -89,8 +92,8 @@ async def create_draft_invoice(request: Request, token: str = Depends(verify_tok
 
         # Paso 2: Obtener el precio de venta del producto
         logger.info(f"Obteniendo el precio de venta del producto con ID {product_id}...")
-        product_data = conn['models'].execute_kw(
-            conn['db'], conn['uid'], conn['password'],
+        product_data = await execute_odoo_method_async(
+            conn,
             'product.product', 'read', [product_id], {'fields': ['list_price']}
         )
         if not product_data:
@@ -117,8 +120,8 @@ async def create_draft_invoice(request: Request, token: str = Depends(verify_tok
 
 
         # Obtener la información pertinente del contacto para la factura
-        partner_data = conn['models'].execute_kw(
-            conn['db'], conn['uid'], conn['password'],
+        partner_data = await execute_odoo_method_async(
+            conn,
             'res.partner', 'read', [partner_id], {'fields': [
                 'name',                                 # Nombre
                 'vat',                                  # NIT
@@ -150,8 +153,8 @@ async def create_draft_invoice(request: Request, token: str = Depends(verify_tok
 
    
         # Crear la factura en estado de borrador llenando los campos necesarios con la información del contacto y el producto
-        invoice_id = conn['models'].execute_kw(
-            conn['db'], conn['uid'], conn['password'],
+        invoice_id = await execute_odoo_method_async(
+            conn,
             'account.move', 'create', [{
                 'move_type': 'out_invoice',
                 'partner_id': [partner_id, partner_name],
@@ -225,8 +228,8 @@ async def confirm_invoice(request: Request, token: str = Depends(verify_token)):
     try:
         # Paso 1: Verificar que la factura exista y esté en estado draft
         logger.info(f"Verificando la existencia de la factura con ID {invoice_id}...")
-        invoice_data = conn['models'].execute_kw(
-            conn['db'], conn['uid'], conn['password'],
+        invoice_data = await execute_odoo_method_async(
+            conn,
             'account.move', 'read', [invoice_id], {'fields': ['state']}
         )
         if not invoice_data:
@@ -253,8 +256,8 @@ async def confirm_invoice(request: Request, token: str = Depends(verify_token)):
 
         # Paso 2: Confirmar la factura
         logger.info("Confirmando la factura...")
-        conn['models'].execute_kw(
-            conn['db'], conn['uid'], conn['password'],
+        await execute_odoo_method_async(
+            conn,
             'account.move', 'action_post', [[invoice_id]]
         )
         logger.info(f"Factura con ID {invoice_id} confirmada exitosamente.")
@@ -316,8 +319,8 @@ async def register_payment(request: Request, token: str = Depends(verify_token))
 
     # --------------------------------
 
-    payment_methods_for_journal = conn['models'].execute_kw(
-        conn['db'], conn['uid'], conn['password'],
+    payment_methods_for_journal = await execute_odoo_method_async(
+        conn,
         'account.payment.method.line', 'search_read',
         [[['journal_id', '=', journal_id]]],  # Filtrar por el diario seleccionado
         {'fields': ['id', 'name']}
@@ -328,8 +331,8 @@ async def register_payment(request: Request, token: str = Depends(verify_token))
 
 
     # Consultar los métodos de pago disponibles y sus diarios
-    payment_methods = conn['models'].execute_kw(
-        conn['db'], conn['uid'], conn['password'],
+    payment_methods = await execute_odoo_method_async(
+        conn,
         'account.payment.method.line', 'search_read', [[['id', '=', payment_method_line_id]]],
         {'fields': ['id', 'name', 'journal_id']}
     )
@@ -376,8 +379,8 @@ async def register_payment(request: Request, token: str = Depends(verify_token))
     try:
         # Paso 1: Verificar que la factura exista y esté confirmada
         logger.info(f"Verificando la existencia de la factura con ID {invoice_id}...")
-        invoice_data = conn['models'].execute_kw(
-            conn['db'], conn['uid'], conn['password'],
+        invoice_data = await execute_odoo_method_async(
+            conn,
             'account.move', 'read', [invoice_id], {'fields': ['state', 'amount_residual', 'partner_id']}
         )
         if not invoice_data:
@@ -417,8 +420,8 @@ async def register_payment(request: Request, token: str = Depends(verify_token))
 
         # Paso 3: Validar que el método de pago exista
         logger.info(f"Validando el método de pago con ID {payment_method_line_id}...")
-        payment_method = conn['models'].execute_kw(
-            conn['db'], conn['uid'], conn['password'],
+        payment_method = await execute_odoo_method_async(
+            conn,
             'account.payment.method.line', 'read', [payment_method_line_id], {'fields': ['name']}
         )
         if not payment_method:
@@ -445,8 +448,8 @@ async def register_payment(request: Request, token: str = Depends(verify_token))
             'currency_id': 1,  # ID de la moneda
         }
                 # Registrar el pago en Odoo con el metodo action_register_payment, sin usar action_invoice_sent, y usando los valores de journal_id y payment_method_line_id
-        payment_id = conn['models'].execute_kw(
-            conn['db'], conn['uid'], conn['password'],
+        payment_id = await execute_odoo_method_async(
+            conn,
             'account.payment', 'create', [payment_data]
         )
     
@@ -538,11 +541,7 @@ async def get_payment_methods(token: str = Depends(verify_token)):
     """
     conn = get_odoo_connection()
     try:
-        payment_methods = conn['models'].execute_kw(
-            conn['db'], conn['uid'], conn['password'],
-            'account.payment.method', 'search_read', [],
-            {'fields': ['id', 'name']}
-        )
+        payment_methods = await reference_data.get_payment_methods(conn)
 
         if not payment_methods:
             raise HTTPException(status_code=404, detail="No se encontraron métodos de pago en el sistema.")
@@ -552,6 +551,8 @@ async def get_payment_methods(token: str = Depends(verify_token)):
             "payment_methods": payment_methods
         }
 
+    except HTTPException as http_err:
+        raise http_err
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener métodos de pago: {str(e)}")
 
@@ -564,11 +565,7 @@ async def get_journals(token: str = Depends(verify_token)):
     """
     conn = get_odoo_connection()
     try:
-        journals = conn['models'].execute_kw(
-            conn['db'], conn['uid'], conn['password'],
-            'account.journal', 'search_read', [],
-            {'fields': ['id', 'name', 'type']}
-        )
+        journals = await reference_data.get_journals(conn)
 
         if not journals:
             raise HTTPException(status_code=404, detail="No se encontraron diarios en el sistema.")
@@ -578,6 +575,8 @@ async def get_journals(token: str = Depends(verify_token)):
             "journals": journals
         }
 
+    except HTTPException as http_err:
+        raise http_err
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al obtener diarios: {str(e)}")
 
@@ -591,7 +590,7 @@ async def confirm_invoice(invoice_id: int):
         conn = get_odoo_connection()
 
         # Leer la factura para verificar su estado
-        invoice_data = execute_odoo_method(
+        invoice_data = await execute_odoo_method_async(
             conn,
             'account.move',
             'read',
@@ -606,7 +605,7 @@ async def confirm_invoice(invoice_id: int):
             raise HTTPException(status_code=400, detail="La factura no está en estado borrador.")
 
         # Confirmar (publicar) la factura en Odoo
-        post_result = execute_odoo_method(
+        post_result = await execute_odoo_method_async(
             conn,
             'account.move',
             'action_post',
@@ -614,13 +613,13 @@ async def confirm_invoice(invoice_id: int):
         )
 
         # Volver a leer la factura para verificar el nuevo estado
-        updated_invoice = execute_odoo_method(
+        updated_invoice = (await execute_odoo_method_async(
             conn,
             'account.move',
             'read',
             [[invoice_id]],
             {'fields': ['id', 'state']}
-        )[0]
+        ))[0]
 
         return {"success": True, "invoice": updated_invoice}
 
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, HTTPException
-from app.core.database import get_odoo_connection
-from app.config import settings
-import xmlrpc.client
-
-from app.services.odoo_service import execute_odoo_method
+from fastapi import APIRouter, Depends, HTTPException
+from app.core.database import get_odoo_pool
+from app.core.resilience import odoo_guard, upstreams_status
+from app.core.security import verify_token
+from app.services.api_service import get_pontis_client
+from app.services.outbox_service import outbox_stats
+from app.services.reference_data import reference_cache_stats
 
 router = APIRouter(tags=["system"])
 
@@ -14,12 +15,33 @@ def read_root():
 @router.get("/version")
 def get_odoo_version():
     try:
-        # Crear conexión al cliente 'common' de Odoo
-        common = xmlrpc.client.ServerProxy(f"{settings.ODOO_URL}/xmlrpc/2/common")
-        
-        # Llamar al método 'version' para obtener información del sistema
-        version = common.version()
+        # Usar un cliente 'common' del pool de Odoo
+        with odoo_guard.call(), get_odoo_pool().client() as client:
+            # Llamar al método 'version' para obtener información del sistema
+            version = client.common.version()
         
         return {"version": version}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/status/upstreams")
+def get_upstreams_status(token=Depends(verify_token)):
+    """
+    Estado interno de Odoo, Pontis y SendGrid: circuito, llamadas en curso y rechazos,
+    junto con los contadores de las cachés en memoria.
+    """
+    return {
+        "upstreams": upstreams_status(),
+        "caches": reference_cache_stats() + [get_pontis_client().customer_cache_stats()],
+    }
+
+
+@router.get("/status/outbox")
+async def get_outbox_status(token=Depends(verify_token)):
+    """
+    Trabajos del outbox por estado y antigüedad del pendiente más viejo.
+    """
+    return await outbox_stats()
@@ -1,17 +1,24 @@
+import asyncio
 import random
 import string
 from fastapi import APIRouter, HTTPException, Depends, Request, Query
 import re
 from app.core.email_validation import is_valid_email
 from app.core.security import verify_token
-from app.core.database import get_odoo_connection, get_sqlite_connection
+from app.core.database import get_odoo_connection
 from app.core.email_utils import send_pontis_credentials_email, send_pontis_credentials_email_v2
 from datetime import datetime, timedelta, timezone
-from app.services.api_service import build_customer_data, build_update_customer_data, check_customer_in_pontis, check_subscribe_services_expiration, create_customer_in_pontis, delete_packages_in_pontis, login_to_external_api, update_customer_in_pontis, update_customer_password_in_pontis
-from app.services.odoo_service import execute_odoo_method
+from app.services.api_service import build_customer_data, check_customer_in_pontis, check_subscribe_services_expiration, create_customer_in_pontis, get_pontis_client, update_customer_password_in_pontis
+from app.services.checkout_jobs import PONTIS_ACTIVATION, checkout_jobs
+from app.services.outbox_service import enqueue, find_active_job
+from app.services.pontis_sync import sync_customer_services
+from app.services.invoice_query import PLAN_VR_ESTADOS, find_latest_plan_invoice, get_latest_plan_invoice, has_plan_invoice_posted_on, today_str
+from app.services.odoo_service import execute_odoo_method_async
+from app.services.reference_data import get_group_id, get_products
 from app.services.sqlite_service import get_decrypted_password, get_user_record, insert_user_record, update_user_password
 from app.services.sqlite_service import update_user_policies  # Asegúrate de importar la función
-from app.utils.plans import PRODUCTS
+from app.services.verification_service import get_latest_verification_code
+from app.utils.plans import PRODUCTS, is_event_plan
 from app.core.logging_config import logger
 
 
@@ -26,7 +33,6 @@ def _is_valid_password(password: str) -> bool:
 
 @router.post("/create")
 async def create_user(request: Request):
-    sqlite_conn = None  # Declaramos la variable por adelantado
     try:
         body = await request.json()
         first_name = body.get("first_name")
@@ -64,36 +70,27 @@ async def create_user(request: Request):
         
         is_valid_email(email)  # Lanza una excepción si el correo no es válido
 
-        sqlite_conn = get_sqlite_connection()
-        cursor = sqlite_conn.cursor()
-
         # Verificar el correo en la tabla de verification
-        cursor.execute("SELECT * FROM verification WHERE email = ? ORDER BY id DESC LIMIT 1", (email,))
-        verification_record = cursor.fetchone()
+        verification_record = await get_latest_verification_code(email)
 
         if not verification_record:
             raise HTTPException(status_code=400, detail="The email has not been registered for verification.")
 
-        status = verification_record[2]
+        status = verification_record["status"]
         if status == 0:
             raise HTTPException(status_code=400, detail="The email has not been verified.")
 
         odoo_conn = get_odoo_connection()
 
-        existing_user = execute_odoo_method(odoo_conn, 'res.users', 'search_count', [[('login', '=', email)]])
+        existing_user = await execute_odoo_method_async(odoo_conn, 'res.users', 'search_count', [[('login', '=', email)]])
         if existing_user:
             raise HTTPException(status_code=400, detail="The email is already registered in the system.")
 
-        group_portal = execute_odoo_method(
-            odoo_conn, 'ir.model.data', 'search_read',
-            [[('model', '=', 'res.groups'), ('module', '=', 'base'), ('name', '=', 'group_portal')]],
-            {'fields': ['res_id'], 'limit': 1}
-        )
-        if not group_portal:
+        group_portal_id = await get_group_id(odoo_conn, 'group_portal')
+        if not group_portal_id:
             raise HTTPException(status_code=500, detail="The Portal group was not found in Odoo.")
-        group_portal_id = group_portal[0]['res_id']
 
-        user_id = execute_odoo_method(
+        user_id = await execute_odoo_method_async(
             odoo_conn, 'res.users', 'create', [{
                 'login': email,
                 'name': first_name + " " + last_name,
@@ -107,7 +104,7 @@ async def create_user(request: Request):
         )
 
         # Insertar el registro del usuario en SQLite (la contraseña se encripta automáticamente)
-        insert_user_record(user_id, first_name, last_name, email, mobile, password)
+        await insert_user_record(user_id, first_name, last_name, email, mobile, password)
 
         return {"detail": "Successful process", "id": user_id}
 
@@ -115,9 +112,6 @@ async def create_user(request: Request):
         raise http_error
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal error:: {str(e)}")
-    finally:
-        if sqlite_conn is not None:  # Solo cerrar si se asignó
-            sqlite_conn.close()
 
 @router.patch("/change_password")
 async def change_password(request: Request, token_payload: dict = Depends(verify_token)):
@@ -152,7 +146,7 @@ async def change_password(request: Request, token_payload: dict = Depends(verify
 
         # Obtener y desencriptar la contraseña almacenada en SQLite
         try:
-            stored_password = get_decrypted_password(user_id)
+            stored_password = await get_decrypted_password(user_id)
         except Exception as ex:
             raise HTTPException(status_code=404, detail=str(ex))
 
@@ -162,15 +156,15 @@ async def change_password(request: Request, token_payload: dict = Depends(verify
 
         # Actualizar la contraseña en Odoo
         odoo_conn = get_odoo_connection()
-        update_success = odoo_conn['models'].execute_kw(
-            odoo_conn['db'], odoo_conn['uid'], odoo_conn['password'],
+        update_success = await execute_odoo_method_async(
+            odoo_conn,
             'res.users', 'write', [[user_id], {'password': new_password}]
         )
         if not update_success:
             raise HTTPException(status_code=500, detail="Could not update password in Odoo.")
 
         # Actualizar la contraseña en SQLite
-        update_user_password(user_id, new_password)
+        await update_user_password(user_id, new_password)
 
         # --- NUEVO: Actualizar la contraseña en Pontis ----
         # Construir el customer_id para Pontis
@@ -202,6 +196,9 @@ async def get_user_with_service(
          * Si existe, se revisa si su plan está activo con `check_subscribe_services_expiration`.
              - Si plan activo => devolvemos la última factura de Odoo que tenga un producto permitido.
              - Si plan expirado => devolvemos un objeto 'service' con status=False y mensaje de caducidad.
+
+    SQLite, Odoo (res.users) y Pontis no dependen entre sí y se consultan en paralelo;
+    solo la búsqueda de la factura espera al partner_id y al estado del plan.
     """
     logger.info("Iniciando get_user_with_service para user_id=%s", user_id)
 
@@ -211,24 +208,32 @@ async def get_user_with_service(
         logger.error("user_id=%s no coincide con token_user_id=%s", user_id, token_user_id)
         raise HTTPException(status_code=403, detail="No está autorizado para consultar otro usuario.")
 
-    # 2) Obtener datos del usuario en SQLite
-    try:
-        user_record = get_user_record(user_id)
-    except Exception as e:
-        logger.exception("Error al obtener user_record para user_id=%s", user_id)
-        raise HTTPException(status_code=404, detail=str(e))
-
-    # 3) Conectar a Odoo y obtener datos del usuario (res.users) => partner_id
     odoo_conn = get_odoo_connection()
+    # "MAP0{user_id}" como ID de Pontis
+    pontis_customer_id = f"MAP0{user_id}"
+
+    # 2) Lanzar en paralelo: SQLite, res.users en Odoo y el customer en Pontis
+    user_record_task = asyncio.create_task(get_user_record(user_id))
+    odoo_user_task = asyncio.create_task(execute_odoo_method_async(
+        odoo_conn,
+        'res.users',
+        'read',
+        [[user_id]],
+        {'fields': ['email', 'name', 'password', 'mobile', 'l10n_bo_district', 'partner_id']}
+    ))
+    pontis_task = asyncio.create_task(check_customer_in_pontis(pontis_customer_id))
+    tasks = (user_record_task, odoo_user_task, pontis_task)
+
     try:
-        logger.debug("Obteniendo datos de res.users en Odoo para user_id=%s", user_id)
-        user_data = execute_odoo_method(
-            odoo_conn,
-            'res.users',
-            'read',
-            [[user_id]],
-            {'fields': ['email', 'name', 'password', 'mobile', 'l10n_bo_district', 'partner_id']}
-        )
+        # 3) Datos del usuario en SQLite
+        try:
+            user_record = await user_record_task
+        except Exception as e:
+            logger.exception("Error al obtener user_record para user_id=%s", user_id)
+            raise HTTPException(status_code=404, detail=str(e))
+
+        # 4) Datos del usuario en Odoo => partner_id
+        user_data = await odoo_user_task
         if not user_data:
             raise HTTPException(status_code=404, detail="Usuario no encontrado en Odoo.")
 
@@ -240,35 +245,20 @@ async def get_user_with_service(
         
         logger.info("partner_id obtenido para user_id=%s => %s", user_id, partner_id)
 
-        # 4) Revisar Pontis para saber si el plan está activo
-        #    - "MAP0{user_id}" como ID de Pontis
-        pontis_customer_id = f"MAP0{user_id}"
-
-        # 4.1) Autenticarse en Pontis
-        await login_to_external_api()
-        logger.debug("Autenticado en Pontis correctamente.")
-
-        # 4.2) Consultar si existe en Pontis
-        pontis_data = await check_customer_in_pontis(pontis_customer_id)
-        logger.debug("Respuesta de Pontis para MAP0%s: %s", user_id, pontis_data)
-
-        if pontis_data.get("response"):
-            # Extraer el customerId del objeto "customer"
-            pontis_response = pontis_data["response"].get("customer", {}).get("customerId")
-        else:
-            pontis_response = None
-        logger.debug("Valor de pontis_response para MAP0%s: %s", user_id, pontis_response)
+        # 5) Revisar Pontis para saber si el plan está activo
+        pontis_customer = await pontis_task
+        logger.debug("Customer de Pontis para MAP0%s: %s", user_id, pontis_customer)
 
         # --- Lógica para determinar 'service' ---
         service = {}
 
-        if pontis_response is None:
+        if not pontis_customer.exists:
             # Significa que NO existe en Pontis => no hay plan => service vacío
             logger.info("El usuario MAP0%s no existe en Pontis => sin plan => service={}", user_id)
             service = {}
         else:
             # Existe => verificar si el plan está activo
-            plan_activo = check_subscribe_services_expiration(pontis_response)
+            plan_activo = check_subscribe_services_expiration(pontis_customer)
             if not plan_activo:
                 # => Plan expirado
                 logger.info("El plan en Pontis para MAP0%s ha caducado.", user_id)
@@ -279,7 +269,7 @@ async def get_user_with_service(
             else:
                 # => Plan sigue activo => devolvemos la última factura en Odoo con un producto permitido
                 logger.info("El plan en Pontis para MAP0%s sigue activo. Obteniendo última factura en Odoo.", user_id)
-                last_invoice = _get_last_invoice_with_valid_product(odoo_conn, partner_id)
+                last_invoice = await _get_last_invoice_with_valid_product(odoo_conn, partner_id)
                 if not last_invoice:
                     logger.warning("No se encontró ninguna factura con productos permitidos para partner_id=%s", partner_id)
                     service = {
@@ -291,7 +281,7 @@ async def get_user_with_service(
                     service = last_invoice
                     service["status"] = True
         
-        # 5) Construir la respuesta combinada
+        # 6) Construir la respuesta combinada
         response_data = {
             "user": {
                 "id": user_record.get("user_id"),
@@ -312,13 +302,49 @@ async def get_user_with_service(
     except Exception as e:
         logger.exception("Error interno en get_user_with_service:")
         raise HTTPException(status_code=500, detail=f"Error interno: {e}")
+    finally:
+        _discard_tasks(tasks)
+
+
+def _discard_tasks(tasks):
+    """
+    Si una rama falló antes, no dejar las demás corriendo sin que nadie las espere.
+    """
+    for task in tasks:
+        if not task.done():
+            task.cancel()
+        elif not task.cancelled():
+            task.exception()  # evita el aviso "exception was never retrieved"
 
 
-def _get_last_invoice_with_valid_product(odoo_conn, partner_id: int):
+async def _read_user_partner_id(conn, id_user: int) -> int:
+    """
+    res.users -> res.partner del usuario. Retorna el partner_id o lanza 404.
+    """
+    user = await execute_odoo_method_async(conn, 'res.users', 'read', [[id_user], ['partner_id']])
+    if not user:
+        logger.error("No se encontró usuario con ID=%s en Odoo.", id_user)
+        raise HTTPException(status_code=404, detail="El usuario no existe.")
+
+    # Solo se necesita confirmar que el contacto existe: el contacto completo se lee tras actualizarlo
+    contact = await execute_odoo_method_async(
+        conn, 'res.partner', 'read', [[user[0]['partner_id'][0]]], {'fields': ['id']}
+    )
+    if not contact:
+        logger.error("Contacto asociado al usuario con ID=%s no existe en Odoo.", id_user)
+        raise HTTPException(status_code=404, detail="El contacto asociado al usuario no existe.")
+    return contact[0]['id']
+
+
+async def _get_last_invoice_with_valid_product(odoo_conn, partner_id: int):
     """
     Retorna la información de la última factura (account.move) pagada 
     que contenga un product_id en la lista de PRODUCTS permitidos.
     Si no encuentra nada, retorna None.
+
+    La línea de plan se busca con `find_latest_plan_invoice` (la línea ya trae el
+    nombre del producto), más un read de la factura para el monto: siempre 2 RPCs,
+    sin importar el historial.
     
     Retorna un dict con la info, por ejemplo:
     {
@@ -331,88 +357,41 @@ def _get_last_invoice_with_valid_product(odoo_conn, partner_id: int):
     }
     """
     logger.debug("Buscando última factura válida para partner_id=%s", partner_id)
-    allowed_plan_ids = set(PRODUCTS.values())  # {11, 13, 14, 22, ...}
 
-    # Buscar facturas pagadas con vr_estado en ('send_and_confirm','pending') 
-    # (según tu filtro original) y orden desc
-    invoices = execute_odoo_method(
+    # Factura pagada más reciente con producto permitido y vr_estado en ('send_and_confirm','pending')
+    invoice = await find_latest_plan_invoice(
+        odoo_conn, partner_id, vr_estados=PLAN_VR_ESTADOS
+    )
+    if not invoice:
+        logger.debug("No se encontró ninguna factura con productos permitidos para partner_id=%s", partner_id)
+        return None
+
+    invoice_id = invoice["id"]
+    product_id_found, product_name = invoice["plan_id"], invoice["product_name"]
+
+    invoice_data = await execute_odoo_method_async(
         odoo_conn,
         'account.move',
-        'search_read',
-        [[
-            ('partner_id', '=', partner_id),
-            ('payment_state', 'in', ['paid', 'in_payment']),
-            '|', ('vr_estado', '=', 'send_and_confirm'), ('vr_estado', '=', 'pending')
-        ]],
-        {
-            'fields': ['id', 'invoice_date', 'amount_total', 'invoice_line_ids'],
-            'order': 'invoice_date desc',
-            'limit': 20  # Podemos traer varias y filtrar
-        }
+        'read',
+        [[invoice_id]],
+        {'fields': ['amount_total']}
     )
-
-    if not invoices:
-        logger.debug("No se encontraron facturas pagadas para partner_id=%s", partner_id)
+    if not invoice_data:
+        logger.warning("Factura %s no encontrada al leer su detalle.", invoice_id)
         return None
 
-    # Recorrer facturas en orden desc y la primera que contenga product_id válido, la retornamos
-    for inv in invoices:
-        line_ids = inv.get('invoice_line_ids', [])
-        if not line_ids:
-            continue
-        
-        # Leer la(s) línea(s)
-        lines = execute_odoo_method(
-            odoo_conn,
-            'account.move.line',
-            'read',
-            [line_ids],
-            {'fields': ['product_id']}
-        )
-        # Ver si alguna línea tiene product_id en allowed_plan_ids
-        product_id_found = None
-        for line in lines:
-            product = line.get('product_id')
-            if product and product[0] in allowed_plan_ids:
-                product_id_found = product[0]
-                break
-        
-        if product_id_found:
-            # => Construir la info final
-            invoice_id = inv["id"]
-            amount_total = inv["amount_total"]
-            invoice_date_str = inv["invoice_date"]
-            if not invoice_date_str:
-                # Factura sin fecha => no se puede
-                logger.warning("Factura %s no tiene invoice_date.", invoice_id)
-                continue
-            # Convertir la fecha
-            invoice_date = datetime.strptime(invoice_date_str, "%Y-%m-%d").replace(tzinfo=timezone.utc)
-            date_expiration = invoice_date + timedelta(days=30)
-
-            # Obtener el nombre del producto
-            product_data = execute_odoo_method(
-                odoo_conn,
-                'product.product',
-                'read',
-                [[product_id_found]],
-                {'fields': ['name']}
-            )
-            product_name = product_data[0]["name"] if product_data else "Desconocido"
-
-            return {
-                "id": invoice_id,
-                "id_service": product_id_found,
-                "name": product_name,
-                "price_paid": amount_total,
-                "date_order": invoice_date_str,
-                "date_expiration": date_expiration.strftime("%Y-%m-%d")
-            }
-    
-    # Si ninguna factura tenía un producto válido
-    logger.debug("No se encontró ninguna factura con product_id en %s para partner_id=%s", allowed_plan_ids, partner_id)
-    return None
+    invoice_date_str = invoice["invoice_date"]
+    invoice_date = datetime.strptime(invoice_date_str, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    date_expiration = invoice_date + timedelta(days=30)
 
+    return {
+        "id": invoice_id,
+        "id_service": product_id_found,
+        "name": product_name or "Desconocido",
+        "price_paid": invoice_data[0]["amount_total"],
+        "date_order": invoice_date_str,
+        "date_expiration": date_expiration.strftime("%Y-%m-%d")
+    }
 
 #=============================================================================================================================
 
@@ -476,7 +455,10 @@ async def update_user(request: Request):
         if not id_plan:
             logger.error("El campo 'id_plan' es obligatorio y está ausente.")
             raise HTTPException(status_code=400, detail="El campo 'id_plan' es obligatorio.")
-        
+        if id_plan not in PRODUCTS.values():
+            logger.error("El id_plan %s no es un plan válido.", id_plan)
+            raise HTTPException(status_code=400, detail="El id_plan no es un plan válido.")
+
         # Razón social: asignar "SIN NOMBRE" si es nulo o vacío
         if legal_Name is None:
             legal_Name = "SIN NOMBRE"
@@ -549,9 +531,6 @@ async def update_user(request: Request):
         # ----------------------------------------------------------
 
         # Obtenemos los ids de los productos
-
-
-
         if id_plan2 is not None:
             #cortar espacios en blanco al principio y final
             id_plan2 = int(id_plan2)
@@ -564,92 +543,81 @@ async def update_user(request: Request):
                 logger.info("Los productos válidos son.", PRODUCTS.values())
                 logger.error("El id_plan2 no es un plan válido.")
                 raise HTTPException(status_code=400, detail="El id_plan2 no es un plan válido.")
-            #obtener los datos del plan desde odoo
-            product_data2 = execute_odoo_method(conn, 'product.product', 'read', [[id_plan2]])
-            logger.debug("Plan2 Odoo encontrado: %s", product_data2[0]['id'])
         else:
             id_plan2 = 0
 
-       
-        # Verificar que el plan sea válido
-        product_data = execute_odoo_method(conn, 'product.product', 'read', [[id_plan]])
-        if not product_data:
-            logger.error("Producto con id_plan=%s no existe en Odoo.", id_plan)
-            raise HTTPException(status_code=404, detail="El producto no existe.")
-        logger.debug("Producto Odoo encontrado: %s", product_data[0]['id'])
-
-        # Buscar el usuario por su ID
-        user = execute_odoo_method(conn, 'res.users', 'read', [[id_user], ['partner_id']])
-        if not user:
-            logger.error("No se encontró usuario con ID=%s en Odoo.", id_user)
-            raise HTTPException(status_code=404, detail="El usuario no existe.")
-        
-        # Buscar el contacto asociado al usuario
-        contact = execute_odoo_method(conn, 'res.partner', 'read', [[user[0]['partner_id'][0]]])
-        if not contact:
-            logger.error("Contacto asociado al usuario con ID=%s no existe en Odoo.", id_user)
-            raise HTTPException(status_code=404, detail="El contacto asociado al usuario no existe.")
-        partner_id = contact[0]['id']
-        logger.debug("Contacto en Odoo (partner_id=%s): %s", partner_id, contact[0]['id'])
-
-        # ----------------------------------------------------------------------------
-        # # VALIDA QUE EL USUARIO NO TENGA NINGUN PLAN ACTIVADO O YA HAYA CADUCADO SU ULTIMO SERVICIO,
-        # en caso de que ya haya caducado su servicio procedemos a limpiar todos sus paquetes en pontis
-        # ----------------------------------------------------------------------------
-        logger.info("Validando plan Pontis para usuario con ID=%s -> MAP0%s", id_user, id_user)
-
-        # 1) Logueo a Pontis
-        await login_to_external_api()
-
-        logger.debug("Autenticación en Pontis exitosa.")
-
         # pontis_customer_id = "MAP006"                                  # todo: cambiar
         pontis_customer_id = f"MAP0{id_user}"
-        # 2) Verificar si el usuario existe en Pontis
-        pontis_data = await check_customer_in_pontis(pontis_customer_id) # todo: cambiar
-        logger.debug("Respuesta de pontis: %s", pontis_data)
-        if pontis_data.get("response"):
-            # Extraer el customerId del objeto "customer"
-            pontis_response = pontis_data["response"].get("customer", {}).get("customerId")
-        else:
-            pontis_response = None
-        logger.debug("Valor de pontis_response para MAP0%s: %s", id_user, pontis_response)
 
-        if pontis_response is None:
+        # Productos (un solo read), usuario -> contacto y estado en Pontis no dependen
+        # entre sí: se consultan en paralelo y se validan en el orden de siempre.
+        product_ids = [id_plan, id_plan2] if id_plan2 else [id_plan]
+        products_task = asyncio.create_task(get_products(conn, product_ids))
+        partner_task = asyncio.create_task(_read_user_partner_id(conn, id_user))
+        # Sin caché: tras un checkout reciente el estado en caché puede no reflejar la activación
+        pontis_task = asyncio.create_task(get_pontis_client().get_customer(pontis_customer_id, use_cache=False))
+        tasks = (products_task, partner_task, pontis_task)
+
+        try:
+            products = await products_task
+            if id_plan2:
+                #obtener los datos del plan desde odoo
+                product2 = products.get(id_plan2)
+                if not product2:
+                    logger.error("Producto con id_plan2=%s no existe en Odoo.", id_plan2)
+                    raise HTTPException(status_code=404, detail="El producto no existe.")
+                logger.debug("Plan2 Odoo encontrado: %s", product2['id'])
+
+            # Verificar que el plan sea válido
+            product = products.get(id_plan)
+            if not product:
+                logger.error("Producto con id_plan=%s no existe en Odoo.", id_plan)
+                raise HTTPException(status_code=404, detail="El producto no existe.")
+            logger.debug("Producto Odoo encontrado: %s", product['id'])
+
+            # Buscar el usuario por su ID y el contacto asociado
+            partner_id = await partner_task
+            logger.debug("Contacto en Odoo (partner_id=%s)", partner_id)
+
+            # ----------------------------------------------------------------------------
+            # # VALIDA QUE EL USUARIO NO TENGA NINGUN PLAN ACTIVADO O YA HAYA CADUCADO SU ULTIMO SERVICIO,
+            # en caso de que ya haya caducado su servicio procedemos a limpiar todos sus paquetes en pontis
+            # ----------------------------------------------------------------------------
+            logger.info("Validando plan Pontis para usuario con ID=%s -> MAP0%s", id_user, id_user)
+
+            # 2) Verificar si el usuario existe en Pontis
+            pontis_customer = await pontis_task
+        finally:
+            _discard_tasks(tasks)
+
+        logger.debug("Customer de Pontis para MAP0%s: %s", id_user, pontis_customer)
+
+        if not pontis_customer.exists:
             # No existe en Pontis => no tiene plan activo => se procede normal
             logger.info("El usuario MAP0%s no existe en Pontis, sin plan activo. Se continúa con flujo normal.", id_user)
-            # => Se hará "create_customer_in_pontis" más adelante
         else:
             # Existe => verificamos si el plan sigue activo
-            plan_activo = check_subscribe_services_expiration(pontis_response)
+            plan_activo = check_subscribe_services_expiration(pontis_customer)
             if plan_activo:
                 logger.error("El plan del usuario MAP0%s sigue activo en Pontis. No se puede continuar.", id_user)
                 raise HTTPException(status_code=400, detail="El plan del usuario sigue activo en Pontis.")
-            else:
-                # Está expirado => limpiar paquetes y actualizar plan
-                logger.info("Plan en Pontis para MAP0%s está expirado. Limpiando paquetes...", id_user)
-                await delete_packages_in_pontis(pontis_customer_id)
-                logger.info("Paquetes eliminados en Pontis para MAP0%s. Actualizando plan...", id_user)
-
-
-                logger.info("Planes para el crear el payload de actualización en Pontis: id_plan=%s, id_plan2=%s", id_user, id_plan2)    
-                # Armamos la data de actualización con base al id_plan
-                update_data_customer = await build_update_customer_data(id_plan, id_plan2)
-                logger.debug("Payload de actualización para Pontis: %s", update_data_customer)
-
-                update_response = await update_customer_in_pontis(update_data_customer, pontis_customer_id)
-                logger.info("Plan actualizado en Pontis para MAP0%s. Respuesta: %s", id_user, update_response)
-
-                # OJO: Como ya existe el usuario en Pontis y se actualizó, 
-                #      no se hará create_customer_in_pontis() más adelante.
-                # Guardamos un "flag" para saber que ya se hizo 'update'.
-                pontis_response["already_updated"] = True
+            logger.info("Plan en Pontis para MAP0%s está expirado. Se actualizará tras publicar la factura.", id_user)
+
+        # La activación en Pontis se hace en segundo plano: mientras no termine, el plan
+        # aún no figura activo y un segundo checkout crearía otra factura
+        pending_job = await find_active_job(PONTIS_ACTIVATION, "id_user", id_user)
+        if pending_job is not None:
+            logger.error("MAP0%s tiene una activación en Pontis en curso (trabajo %s). No se puede continuar.", id_user, pending_job)
+            raise HTTPException(status_code=400, detail="El usuario tiene una activación de plan en curso.")
+        if await has_plan_invoice_posted_on(conn, partner_id, today_str()):
+            logger.error("El contacto %s ya tiene una factura de plan publicada hoy. No se puede continuar.", partner_id)
+            raise HTTPException(status_code=400, detail="El usuario ya tiene una factura de plan emitida hoy.")
 
         # ----------------------------------------------------------------------------
         # Continuamos con la actualización en Odoo
         # ----------------------------------------------------------------------------
         logger.info("Actualizando campos en Odoo para partner_id=%s", partner_id)
-        success = execute_odoo_method(
+        success = await execute_odoo_method_async(
             conn, 'res.partner', 'write', [[partner_id], {
                 "vat": num_doc,
                 "l10n_latam_identification_type_id": int(type_doc),
@@ -660,68 +628,9 @@ async def update_user(request: Request):
         if not success:
             logger.error("No se pudo actualizar el contacto en Odoo con partner_id=%s", partner_id)
             raise HTTPException(status_code=500, detail="No se pudo actualizar el usuario.")
-        
-        # Obtener el password desencriptado del usuario
-        logger.debug("Obteniendo contraseña desencriptada de SQLite para user_id=%s", id_user)
-        plain_password = get_decrypted_password(id_user)
-        logger.debug("Contraseña desencriptada: %s", plain_password)
-
-        # Reconexión a Pontis si hiciera falta
-        logger.info("Reconectando a Pontis para crear/actualizar datos de servicio final.")
-        await login_to_external_api()
-
-        updated_contact = execute_odoo_method(conn, 'res.partner', 'read', [[partner_id]])
-        logger.debug("Contacto en Odoo tras actualización: %s", updated_contact[0]['id'])
-
-        # -------------------------------------------------------------------------
-        # Según si el usuario ya existía en Pontis o no, se hace create o no
-        # -------------------------------------------------------------------------
-        if pontis_response is None:
-            # => Caso: no existía => crear en Pontis
-            logger.info("Creando usuario en Pontis (no existía).")
-            customer_data = build_customer_data(id_user, updated_contact, id_plan, id_plan2, plain_password)
-            logger.debug("Payload para create_customer_in_pontis: %s", customer_data)
-
-            create_customer_response = await create_customer_in_pontis(customer_data) # TODO: DESCOMENTAR
-            if not create_customer_response.get("response"):
-                logger.error("No se obtuvieron credenciales de Pontis tras create_customer_in_pontis.")
-                raise HTTPException(status_code=500, detail="No se obtuvieron credenciales de Pontis.")
-            pontis_username = create_customer_response["response"]
-            logger.info("Credenciales en Pontis creadas/obtenidas: %s", pontis_username)
-            # pontis_username = f"MAP0{id_user}" # TODO: Borrar
-        else:
-            # => Caso: ya existía => ya hicimos update si plan estaba expirado
-            # Reusamos su ID de Pontis
-            logger.info("El usuario MAP0%s ya existe en Pontis; se omite create_customer_in_pontis.", id_user)
-            pontis_username = f"MAP0{id_user}"
-
-        # obtenemos el email del usuario desde SQLite
-        user_record = get_user_record(id_user)
-        email = user_record.get("email")
-        logger.debug("Email obtenido de SQLite: %s", email)
-
-        if id_plan in [46, 47, 48, 49]:
-            # Enviar credenciales al usuario por correo
-            logger.info("Enviando credenciales de Pontis al correo: %s", email)
-            send_pontis_credentials_email_v2(
-                to_email=email,
-                subject="Tus credenciales de acceso:",
-                pontis_username=pontis_username,
-                pontis_password=plain_password
-            )
-        else:
-            # Enviar credenciales al usuario por correo
-            logger.info("Enviando credenciales de Pontis al correo: %s", email)
-            send_pontis_credentials_email(
-                to_email=email,
-                subject="Tus credenciales de acceso:",
-                pontis_username=pontis_username,
-                pontis_password=plain_password
-            )
-        
+
         # ----------------------- Flujo de creación de factura -----------------------
         logger.info("Iniciando creación de factura en Odoo...")
-        product = product_data[0]
         product_id = product['id']
         product_name = product['name']
         product_price = product['list_price']
@@ -741,7 +650,6 @@ async def update_user(request: Request):
 
         if id_plan2 != 0:
 
-            product2 = product_data2[0]
             product_id2 = product2['id']
             product_name2 = product2['name']
             product_price2 = product2['list_price']
@@ -774,51 +682,32 @@ async def update_user(request: Request):
         }
         logger.debug("Payload para crear factura: %s", data_to_create_invoice)
 
-        invoice_id = execute_odoo_method(conn, 'account.move', 'create', [data_to_create_invoice])
+        invoice_id = await execute_odoo_method_async(conn, 'account.move', 'create', [data_to_create_invoice])
         logger.info("Factura creada con ID=%s. Publicando factura...", invoice_id)
-        res = execute_odoo_method(conn, 'account.move', 'action_post', [[invoice_id]])
+        res = await execute_odoo_method_async(conn, 'account.move', 'action_post', [[invoice_id]])
         logger.debug("Resultado de publicar factura: %s", res)
-        
-        invoice_info = execute_odoo_method(
-            conn,
-            'account.move',
-            'read',
-            [[invoice_id]],
-            {'fields': ['amount_total', 'currency_id', 'partner_id', 'name']}
-        )[0]
-        logger.debug("Información de la factura creada: %s", invoice_info)
-        
-        payment_data = {
-            'payment_type': 'inbound',
-            'communication': invoice_info['name'],
-            'payment_date': datetime.now().strftime("%Y-%m-%d"),
-            'amount': invoice_info['amount_total'],
-            'currency_id': invoice_info['currency_id'][0],
-            'partner_id': invoice_info['partner_id'][0],
-            'journal_id': 3,
-            'partner_bank_id': False,  
-        }
-        logger.debug("Payload para registrar pago: %s", payment_data)
-        
-        context = {'active_ids': [invoice_id], 'active_model': 'account.move', 'active_id': invoice_id}
-        payment_register_id = execute_odoo_method(
-            conn, 'account.payment.register',
-            'create', [[payment_data]],
-            {'context': context}
-        )
-        logger.info("Registrando pago con ID=%s", payment_register_id)
-        execute_odoo_method(conn, 'account.payment.register', 'action_create_payments', [[payment_register_id[0]]])
-        
-        # Actualizar el usuario en SQLite para marcar la aceptación de políticas
-        logger.info("Actualizando políticas en SQLite para user_id=%s", id_user)
-        update_user_policies(id_user)
-        
+
+        # ----------------------------------------------------------------------------
+        # Con la factura publicada, el resto (alta/actualización en Pontis, correo de
+        # credenciales, registro del pago y aceptación de políticas) queda en el outbox
+        # y lo ejecuta el worker con reintentos.
+        # ----------------------------------------------------------------------------
+        try:
+            job_ids = await enqueue(*checkout_jobs(invoice_id, id_user, partner_id, id_plan, id_plan2))
+        except Exception:
+            logger.exception("No se pudieron encolar los trabajos del checkout para la factura %s", invoice_id)
+            raise HTTPException(
+                status_code=500,
+                detail=f"La factura {invoice_id} fue creada, pero no se pudo programar la activación del servicio."
+            )
+        logger.info("Trabajos del checkout encolados para la factura %s: %s", invoice_id, job_ids)
+
         logger.info("Proceso [update_user] finalizado con éxito.")
         return {
-            "detail": "Factura creada y pagada correctamente", 
-            "invoice_id": invoice_id, 
-            "payment_id": payment_register_id,
-            "res_pontis": {"pontis_username": pontis_username}
+            "detail": "Factura creada correctamente; la activación del servicio y el registro del pago se completan en segundo plano.",
+            "invoice_id": invoice_id,
+            "payment_id": None,
+            "res_pontis": {"pontis_username": pontis_customer_id}
         }
         
     except HTTPException as http_error:
@@ -853,7 +742,7 @@ async def search_contact(request: Request):
 
         # 1. Buscar contacto por email=ci
         conn = get_odoo_connection()
-        contacts = execute_odoo_method(
+        contacts = await execute_odoo_method_async(
             conn, 'res.partner', 'search_read',
             [[('email', '=', ci)]],
             {'fields': ['id', 'name', 'mobile', 'email', 'vat']}
@@ -866,31 +755,22 @@ async def search_contact(request: Request):
         id_contact = contact_info['id']
         logger.info("Contacto encontrado ID=%s, info=%s", id_contact, contact_info)
 
-        # 2. Obtener facturas válidas con planes permitidos
-        allowed_plan_ids = list(PRODUCTS.values())
-        logger.debug("IDs de planes permitidos: %s", allowed_plan_ids)
-        valid_invoices = get_valid_invoices_for_search(conn, id_contact, allowed_plan_ids)
-        invoice = valid_invoices[0]  # Tomamos la más reciente
-        logger.info("Factura seleccionada: %s", invoice)
-
-        # 3. Verificar si la factura es de hoy (opcional, si así lo deseas)
-        invoice_date_str = invoice.get('invoice_date')
-        if not invoice_date_str:
-            logger.error("La factura no tiene fecha de emisión.")
-            raise HTTPException(status_code=500, detail="La factura no tiene fecha de emisión.")
-        invoice_date = datetime.strptime(invoice_date_str, "%Y-%m-%d").replace(tzinfo=timezone.utc)
-        hoy_str = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-        if invoice_date_str != hoy_str:
+        # 2. Obtener la factura más reciente con un plan permitido
+        invoice = await get_latest_plan_invoice(conn, id_contact)
+        plan_id = invoice["plan_id"]
+
+        # 3. Verificar si la factura es de hoy
+        invoice_date_str = invoice["invoice_date"]
+        if invoice_date_str != today_str():
             logger.error("La factura no fue emitida hoy, no se puede continuar.")
             raise HTTPException(status_code=400, detail="La factura no fue emitida hoy, no se puede continuar.")
         logger.debug("La factura fue emitida hoy (%s).", invoice_date_str)
 
         # 4. Verificar si el contacto está asociado a un usuario
-        user_id = get_user_associated(conn, id_contact)
+        user_id = await get_user_associated(conn, id_contact)
         if not user_id:
             # No hay usuario, retornamos la info del contacto
             logger.info("El contacto no está asociado a ningún usuario; devolviendo datos de contacto.")
-            plan_id = get_plan_id_from_invoice(conn, invoice)
             return {
                 "id": str(contact_info["id"]),
                 "fullName": contact_info.get("name", ""),
@@ -904,15 +784,12 @@ async def search_contact(request: Request):
             pontis_id = f"MAP0{user_id}"
 
             # 5. Llamar a la API de Pontis para ver si el plan sigue activo
-            await login_to_external_api()  # (si requieres un login previo)
-            pontis_data = await check_customer_in_pontis(pontis_id)
-            logger.debug("Respuesta de Pontis: %s", pontis_data)
+            pontis_customer = await check_customer_in_pontis(pontis_id)
+            logger.debug("Customer de Pontis: %s", pontis_customer)
 
             # Si "response" es None, no hay plan => devolvemos contacto
-            pontis_response = pontis_data.get("response")
-            if pontis_response is None:
+            if not pontis_customer.exists:
                 logger.info("El usuario en Pontis no tiene planes activos (response=null).")
-                plan_id = get_plan_id_from_invoice(conn, invoice)
                 return {
                     "id": str(contact_info["id"]),
                     "fullName": contact_info.get("name", ""),
@@ -924,7 +801,7 @@ async def search_contact(request: Request):
             else:
                 # Revisar si alguno de los paquetes [6212,6217,6293,6294] está activo
                 logger.debug("Pontis data (response) encontrado, revisando suscripciones...")
-                plan_activo = check_subscribe_services_expiration(pontis_response)
+                plan_activo = check_subscribe_services_expiration(pontis_customer)
                 if plan_activo:
                     logger.error("El plan sigue activo en Pontis. No se puede continuar.")
                     raise HTTPException(
@@ -933,7 +810,6 @@ async def search_contact(request: Request):
                     )
                 else:
                     logger.info("El plan en Pontis ya expiró. Devolviendo datos de contacto.")
-                    plan_id = get_plan_id_from_invoice(conn, invoice)
                     return {
                         "id": str(contact_info["id"]),
                         "fullName": contact_info.get("name", ""),
@@ -981,54 +857,11 @@ def split_name(full_name: str) -> tuple:
 
  # DE ACA PARA ABJO ES NUEVO------------------------------------------------------------------------------------------   
 
-def get_valid_invoices_for_search(conn, id_contact: int, allowed_plan_ids: list) -> list:
-    """
-    Obtiene todas las facturas pagadas que tengan un producto cuyo ID
-    se encuentre en allowed_plan_ids. Devuelve la lista ordenada (desc) por fecha.
-    """
-    logger.debug("Iniciando búsqueda de facturas pagadas para contacto ID: %s", id_contact)
-    invoices = execute_odoo_method(
-        conn, 'account.move', 'search_read',
-        [[('partner_id', '=', id_contact), ('payment_state', 'in', ['paid', 'in_payment'])]],
-        {'fields': ['invoice_date', 'invoice_line_ids']}
-    )
-    logger.debug("Facturas encontradas: %s", invoices)
-    if not invoices:
-        raise HTTPException(status_code=404, detail="No se encontró factura pagada para este contacto.")
-    
-    valid_invoices_filtered = []
-    for inv in invoices:
-        invoice_line_ids = inv.get('invoice_line_ids', [])
-        if not invoice_line_ids:
-            continue
-        invoice_lines = execute_odoo_method(
-            conn, 'account.move.line', 'read', [invoice_line_ids],
-            {'fields': ['product_id']}
-        )
-        for line in invoice_lines:
-            product_id = line.get('product_id')
-            if product_id and product_id[0] in allowed_plan_ids:
-                valid_invoices_filtered.append(inv)
-                break  # Basta con un producto válido para agregar la factura
-    
-    if not valid_invoices_filtered:
-        # Nota: El mensaje menciona "emitida hoy" en tu lógica previa;
-        # si deseas forzar que sea "hoy", aquí podrías filtrar invoice_date == hoy.
-        raise HTTPException(
-            status_code=404,
-            detail="No se encontró factura pagada válida (con productos permitidos) para este contacto."
-        )
-    
-    # Ordenamos descendentemente por invoice_date
-    sorted_invoices = sorted(valid_invoices_filtered, key=lambda x: x.get('invoice_date'), reverse=True)
-    logger.debug("Facturas válidas ordenadas (desc): %s", sorted_invoices)
-    return sorted_invoices
-
-def get_user_associated(conn, id_contact: int) -> int:
+async def get_user_associated(conn, id_contact: int) -> int:
     """
     Retorna el ID de usuario de Odoo asociado al contacto (partner_id) o None si no hay.
     """
-    associated_users = execute_odoo_method(
+    associated_users = await execute_odoo_method_async(
         conn, 'res.users', 'search_read',
         [[('partner_id', '=', id_contact)]],
         {'fields': ['id'], 'context': {'active_test': False}}
@@ -1040,70 +873,10 @@ def get_user_associated(conn, id_contact: int) -> int:
 
 # ------------------------------------------------------------------------------------------------------------
 
-def get_valid_invoices(conn, id_contact: int, allowed_plan_ids: list) -> list:
-
-    logger.debug("Iniciando búsqueda de facturas pagadas para contacto ID: %s", id_contact)
-    invoices = execute_odoo_method(
-        conn, 'account.move', 'search_read',
-        [[('partner_id', '=', id_contact), ('payment_state', 'in', ['paid', 'in_payment'])]],
-        {'fields': ['invoice_date', 'invoice_line_ids']}
-    )
-    logger.debug("Facturas encontradas: %s", invoices)
-    if not invoices:
-        raise HTTPException(status_code=404, detail="No se encontró factura pagada para este contacto.")
-    
-    today_str = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    logger.debug("Fecha de hoy (UTC): %s", today_str)
-    valid_invoices = [inv for inv in invoices if inv.get('invoice_date') == today_str]
-    logger.debug("Facturas emitidas hoy: %s", valid_invoices)
-    if not valid_invoices:
-        raise HTTPException(status_code=400, detail="La última factura del contacto no fue emitida hoy, no se puede activar.")
-    
-    valid_invoices_filtered = []
-    for inv in valid_invoices:
-        invoice_line_ids = inv.get('invoice_line_ids', [])
-        logger.debug("Factura %s - Líneas de factura: %s", inv.get('invoice_date'), invoice_line_ids)
-        if not invoice_line_ids:
-            continue
-        invoice_lines = execute_odoo_method(
-            conn, 'account.move.line', 'read', [invoice_line_ids],
-            {'fields': ['product_id']}
-        )
-        logger.debug("Líneas de factura leídas: %s", invoice_lines)
-        for line in invoice_lines:
-            product_id = line.get('product_id')
-            logger.debug("Revisando línea de factura, product_id: %s", product_id)
-            if product_id and product_id[0] in allowed_plan_ids:
-                valid_invoices_filtered.append(inv)
-                logger.debug("Factura agregada por contener producto permitido: %s", inv)
-                break
-    if not valid_invoices_filtered:
-        raise HTTPException(status_code=404, detail="No se encontró factura pagada válida para este contacto emitida hoy.")
-    
-    sorted_invoices = sorted(valid_invoices_filtered, key=lambda x: x.get('invoice_date'), reverse=True)
-    logger.debug("Facturas válidas ordenadas: %s", sorted_invoices)
-    return sorted_invoices
-
-def get_plan_id_from_invoice(conn, invoice: dict) -> int:
-    """
-    Obtiene el ID del plan de servicio a partir de la primera línea de la factura.
-    """
-    logger.debug("Obteniendo plan desde factura: %s", invoice)
-    invoice_lines = execute_odoo_method(
-        conn, 'account.move.line', 'read', [invoice.get('invoice_line_ids')],
-        {'fields': ['product_id']}
-    )
-    logger.debug("Líneas de factura para plan: %s", invoice_lines)
-    if not invoice_lines or not invoice_lines[0].get('product_id'):
-        raise HTTPException(status_code=500, detail="No se pudo determinar el plan de servicio.")
-    plan_id = invoice_lines[0]['product_id'][0]
-    logger.debug("Plan ID obtenido: %s", plan_id)
-    return plan_id
-
 # para la ruta cuando el contacto YA está asociado a un usuario
 async def handle_associated_user_flow(conn, id_contact: int, contact_info: dict) -> dict:
     # Nota: si es que asociado a un usuario, asumimos que que hizo una compra previa y se le generó un usuario en la base de datos de SQLite
-    associated_users = execute_odoo_method(
+    associated_users = await execute_odoo_method_async(
         conn, 'res.users', 'search_read',
         [[('partner_id', '=', id_contact)]],
         {'fields': ['id'], 'context': {'active_test': False}}
@@ -1112,20 +885,15 @@ async def handle_associated_user_flow(conn, id_contact: int, contact_info: dict)
     logger.info("Se encontró usuario asociado con ID: %s", id_user)
 
     # Obtener los datos del usuario desde SQLite
-    user_record = get_user_record(id_user)
+    user_record = await get_user_record(id_user)
     logger.debug("Registro del usuario en SQLite: %s", user_record)
     
     # Obtener el password desencriptado del usuario existente
-    existing_password = get_decrypted_password(id_user)
+    existing_password = await get_decrypted_password(id_user)
     logger.debug("Contraseña existente (desencriptada): %s", existing_password)
     
-    allowed_plan_ids = list(PRODUCTS.values())
-    logger.debug("IDs de planes permitidos: %s", allowed_plan_ids)
-    
-    # Obtener y filtrar facturas válidas
-    valid_invoices_filtered = get_valid_invoices(conn, id_contact, allowed_plan_ids)
-    invoice = valid_invoices_filtered[0]
-    logger.info("Factura válida seleccionada: %s", invoice)
+    # Factura de plan emitida hoy (filtrada en Odoo)
+    invoice = await get_latest_plan_invoice(conn, id_contact, issued_today=True)
     
     invoice_date_str = invoice.get('invoice_date')
   
@@ -1138,51 +906,38 @@ async def handle_associated_user_flow(conn, id_contact: int, contact_info: dict)
     if now < invoice_date or now > expiry_date:
         raise HTTPException(status_code=400, detail="El período de servicio ha expirado.")
     
-    id_plan = get_plan_id_from_invoice(conn, invoice)
+    id_plan = invoice["plan_id"]
     logger.info("Plan ID obtenido para la factura: %s", id_plan)
     
     # Armar el ID para Pontis (concatenar 'MAP0' + id_user)
     pontis_customer_id = "MAP0" + str(id_user)
     logger.debug("ID de cliente para Pontis: %s", pontis_customer_id)
     
-    await login_to_external_api()
-    logger.info("Conexión exitosa a la API externa.")
-
     # TODO: HACER MÁS VALIDACIONES O REFACTORIZAR
-    pontis_data = await check_customer_in_pontis(pontis_customer_id)
-    logger.debug("Respuesta de Pontis: %s", pontis_data)
+    # Sin caché: la diferencia de paquetes se calcula sobre el estado actual en Pontis
+    pontis_customer = await get_pontis_client().get_customer(pontis_customer_id, use_cache=False)
+    logger.debug("Customer de Pontis: %s", pontis_customer)
 
-    if pontis_data.get("response") is None:
-        logger.warning("El usuario MAP0%s NO existe en Pontis. Se omite 'delete_packages_in_pontis'.", id_user)
+    if not pontis_customer.exists:
+        logger.warning("El usuario MAP0%s NO existe en Pontis. Se omite la sincronización de paquetes.", id_user)
         # Mostrar mensaje de error si no hay respuesta
         raise HTTPException(status_code=500, detail="No existe registro en Pontis.")
     else:
 
-        # TODO: Verificar si tiene servicios que son el 6213,6214,6215, si solo tiene esos 3 significa que no requiere que le borremos los paquetes porque los servicios asi solos estan bien tal cual como estan, pero si tiene paquetes es decir otros valores aparte de los servicios ya mencionados hay que preguntar si el expireDt de esos ya caducó (cabe aclarar de los servicios no tienen expireDt, solo los paquetes tienen expireDt, tambien aclarar que los paquetes tiene estos id's, 6212,6217,6293,6294), en caso de que sí hayan caducado entonces ahi si usamos el delete_packages_in_pontis(pontis_customer_id), pero si no han caducado entonces el proceso se de detiene ya que el plan aun sigue activo
+        # Solo se envían los paquetes que cambian: los servicios base (6213, 6214, 6215) se
+        # conservan, los paquetes del plan se agregan o extienden y los que no corresponden se cierran
+        update_response = await sync_customer_services(pontis_customer_id, pontis_customer, id_plan)
+        logger.info("Respuesta de actualización en Pontis: %s", update_response)
 
-        # Ya existe => ahora sí eliminar
-        res = await delete_packages_in_pontis(pontis_customer_id)
-        logger.info("Respuesta de paquetes eliminados en Pontis para MAP0%s: %s", id_user, res)
-        if res.get("response") is not None:
-            logger.info("Paquetes eliminados en Pontis: %s", pontis_customer_id)
-        else:
-            logger.warning("No se eliminaron paquetes en Pontis porque no habia nada que eliminar para MAP0%s.", id_user)
-
-        # -------------------------------------------------- HASTA ACA LA REFACTORIZACION QUE INDICA EL TODO------------------------------------------------
-
-    update_data_customer = await build_update_customer_data(id_plan)
-    logger.debug("Datos para actualizar en Pontis: %s", update_data_customer)
-
-    update_response = await update_customer_in_pontis(update_data_customer, pontis_customer_id)
-    logger.info("Respuesta de actualización en Pontis: %s", update_response)
-
-    if pontis_customer_id != update_response.get("response"):
+    if update_response is None:
+        logger.info("Los paquetes de MAP0%s en Pontis ya estaban al día.", id_user)
+    elif pontis_customer_id != update_response.get("response"):
         logger.warning("El ID de cliente de Pontis no coincide con el esperado.")
     else:
         logger.info("Cliente actualizado en Pontis correctamente.")
     
 
-    if id_plan in [46, 47, 48, 49]:
+    if is_event_plan(id_plan):
          # 14. Enviar por correo las credenciales de acceso a Pontis
         send_pontis_credentials_email_v2(
             to_email=contact_info.get("email"),
@@ -1211,12 +966,7 @@ async def handle_associated_user_flow(conn, id_contact: int, contact_info: dict)
 
 # Helper para la ruta cuando el contacto NO está asociado a ningún usuario
 async def handle_non_associated_user_flow(conn, id_contact: int, contact_info: dict) -> dict:
-    allowed_plan_ids = list(PRODUCTS.values())
-    logger.debug("IDs de planes permitidos: %s", allowed_plan_ids)
-    
-    valid_invoices_filtered = get_valid_invoices(conn, id_contact, allowed_plan_ids)
-    invoice = valid_invoices_filtered[0]
-    logger.info("Factura válida seleccionada: %s", invoice)
+    invoice = await get_latest_plan_invoice(conn, id_contact, issued_today=True)
     
     invoice_date_str = invoice.get('invoice_date')
    
@@ -1227,20 +977,15 @@ async def handle_non_associated_user_flow(conn, id_contact: int, contact_info: d
     if now < invoice_date or now > expiry_date:
         raise HTTPException(status_code=400, detail="El período de servicio ha expirado.")
     
-    id_plan = get_plan_id_from_invoice(conn, invoice)
+    id_plan = invoice["plan_id"]
     logger.info("Plan ID obtenido para la factura: %s", id_plan)
     
     new_password = generate_random_password(8)
     logger.info("Nueva contraseña generada: %s", new_password)
     
-    group_portal = execute_odoo_method(
-        conn, 'ir.model.data', 'search_read',
-        [[('model', '=', 'res.groups'), ('module', '=', 'base'), ('name', '=', 'group_portal')]],
-        {'fields': ['res_id'], 'limit': 1}
-    )
-    if not group_portal:
+    group_portal_id = await get_group_id(conn, 'group_portal')
+    if not group_portal_id:
         raise HTTPException(status_code=500, detail="No se encontró el grupo portal en Odoo.")
-    group_portal_id = group_portal[0]['res_id']
     logger.debug("ID del grupo portal: %s", group_portal_id)
     
     new_user_vals = {
@@ -1253,7 +998,7 @@ async def handle_non_associated_user_flow(conn, id_contact: int, contact_info: d
         'partner_id': id_contact,  # Asociamos el usuario al contacto existente
         'groups_id': [(6, 0, [group_portal_id])]
     }
-    new_user_id = execute_odoo_method(
+    new_user_id = await execute_odoo_method_async(
         conn, 'res.users', 'create', [new_user_vals],
         kwargs={'context': {'no_reset_password': True}}
     )
@@ -1269,7 +1014,7 @@ async def handle_non_associated_user_flow(conn, id_contact: int, contact_info: d
             return (parts[0], "")
         return (parts[0], " ".join(parts[1:]))
     first_name, last_name = split_name(contact_info.get("name", ""))
-    insert_user_record(new_user_id,
+    await insert_user_record(new_user_id,
                        first_name=first_name,
                        last_name=last_name,
                        email=contact_info.get("email"),
@@ -1277,22 +1022,19 @@ async def handle_non_associated_user_flow(conn, id_contact: int, contact_info: d
                        password=new_password)
     logger.info("Usuario registrado en SQLite con ID: %s", new_user_id)
     
-    update_user_policies(new_user_id)
+    await update_user_policies(new_user_id)
     logger.debug("Políticas de usuario actualizadas en SQLite para ID: %s", new_user_id)
     
-    updated_contact = execute_odoo_method(conn, 'res.partner', 'read', [[id_contact]])
+    updated_contact = await execute_odoo_method_async(conn, 'res.partner', 'read', [[id_contact]])
     # Obtenemos el id contacto actualizado
     updated_contact_id = updated_contact[0].get("id")
     logger.debug("Datos actualizados del contacto: %s", updated_contact_id)
     if not updated_contact:
         raise HTTPException(status_code=500, detail="Error al obtener datos actualizados del contacto.")
     
-    customer_data = build_customer_data(new_user_id, updated_contact, id_plan, new_password)
+    customer_data = build_customer_data(new_user_id, updated_contact, id_plan, 0, new_password)
     logger.debug("Payload para Pontis: %s", customer_data)
     
-    await login_to_external_api()
-    logger.info("Conexión exitosa a la API externa.")
-
     user_name_pontis = "MAP0" + str(new_user_id)
 
 
@@ -1310,7 +1052,7 @@ async def handle_non_associated_user_flow(conn, id_contact: int, contact_info: d
     logger.info("Respuesta de activación en Pontis: %s", activation_response)
 
 
-    if id_plan in [46, 47, 48, 49]:
+    if is_event_plan(id_plan):
         send_pontis_credentials_email_v2(
             to_email=contact_info.get("email"),
             subject="Tus credenciales de acceso a M+",
@@ -1351,7 +1093,7 @@ async def activate_contact_portal(request: Request):
         
         # 3. Buscar el contacto en Odoo
         conn = get_odoo_connection()
-        contact_data = execute_odoo_method(
+        contact_data = await execute_odoo_method_async(
             conn, 'res.partner', 'read', [[id_contact]],
             {'fields': ['id', 'name', 'mobile', 'email', 'vat']}
         )
@@ -1362,7 +1104,7 @@ async def activate_contact_portal(request: Request):
         logger.info("Contacto encontrado: %s", contact_info.get("id"))
         
         # 4. Verificar que el contacto NO esté asociado a ningún usuario
-        associated_users = execute_odoo_method(
+        associated_users = await execute_odoo_method_async(
             conn, 'res.users', 'search_read',
             [[('partner_id', '=', id_contact)]],
             {'fields': ['id'], 'context': {'active_test': False}}
@@ -1,112 +1,354 @@
+import asyncio
+import time
+
 import httpx
-from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException
-from datetime import datetime, timedelta
 from app.config import settings
+from app.core.cache import TTLCache
 from app.core.logging_config import logger
+from app.core.resilience import UpstreamGuard, pontis_guard, pontis_timeout
+from app.core.singleflight import SingleFlight
+from app.services.pontis_models import PontisCustomer
+from app.utils.plans import PLAN_CATALOG, Plan, get_plan
 
-async def login_to_external_api():
+# Consultas GET idénticas y concurrentes a Pontis comparten una sola petición
+pontis_reads = SingleFlight("pontis")
+
+PONTIS_CONNECTION_ERROR = "Error interno al conectarse a la API de Pontis"
+
+
+class PontisClient:
     """
-    Realiza una solicitud HTTP POST a la API externa para autenticarse.
+    Cliente de la API de Pontis (OTT) con un único `httpx.AsyncClient` por worker:
+    mantiene las conexiones abiertas (keep-alive) entre llamadas, con límites de pool
+    configurables y HTTP/2 opcional. Lo crea y lo cierra el lifespan de la app.
+
+    La sesión de Pontis (cookies del cliente compartido) se reutiliza hasta su
+    expiración: se renueva en segundo plano poco antes de vencer y solo se vuelve
+    a iniciar sesión de forma bloqueante si venció o si Pontis responde 401.
+
+    El estado de cada customer (getCustomer) se cachea por `customer_id` durante
+    `customer_cache_ttl` segundos y se invalida en cada escritura sobre ese customer.
     """
-    url = f"{settings.OTT_URL_BASE_API}/auth/login"
-    payload = {
-        "customer_id": f"{settings.OTT_USERNAME}",
-        "password": f"{settings.OTT_PASSWORD}"
-    }
 
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload)
-            response.raise_for_status()  # Lanza una excepción si la respuesta no es exitosa
-            return response.json()  # Devuelve la respuesta JSON
-    except httpx.HTTPStatusError as e:
-        raise HTTPException(
-            status_code=e.response.status_code,
-            detail=f"Error al autenticarse en la API externa de PONTIS: {e.response.text}"
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error interno al conectarse a la API externa de PONTIS: {str(e)}"
+    def __init__(
+        self,
+        base_url: str,
+        username: str,
+        password: str,
+        client: httpx.AsyncClient = None,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        http2: bool = False,
+        session_ttl: float = 1800,
+        session_refresh_margin: float = 60,
+        customer_cache_ttl: float = 60,
+        customer_cache_size: int = 10000,
+        guard: UpstreamGuard = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.username = username
+        self.password = password
+        self._client = client
+        self._owns_client = client is None
+        self._limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
         )
-   
-def _compute_dates_for_plan(plan_id: int) -> tuple[str, str]:
+        self._http2 = http2
+        # Bulkhead y circuit breaker de las llamadas; por defecto, el del tráfico en vivo
+        self._guard = guard or pontis_guard
+        self.session_ttl = session_ttl
+        self.session_refresh_margin = session_refresh_margin
+        self._session_expires_at = None
+        self._session_generation = 0
+        self._session_lock = asyncio.Lock()
+        self._refresh_task = None
+        self._customers = TTLCache("pontis_customers", customer_cache_ttl, maxsize=customer_cache_size)
+        # Versión por customer: una lectura iniciada antes de una escritura no repuebla la caché
+        self._customer_versions = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            options = dict(
+                base_url=self.base_url,
+                timeout=pontis_timeout(),
+                limits=self._limits,
+                headers={"Content-Type": "application/json"},
+            )
+            try:
+                self._client = httpx.AsyncClient(http2=self._http2, **options)
+            except ImportError:
+                # HTTP/2 requiere el extra 'httpx[http2]'; sin él se usa HTTP/1.1
+                logger.warning("HTTP/2 no disponible para Pontis (falta 'h2'); se usa HTTP/1.1.")
+                self._client = httpx.AsyncClient(**options)
+        return self._client
+
+    async def close(self):
+        if self._refresh_task is not None and not self._refresh_task.done():
+            self._refresh_task.cancel()
+        if self._client is not None and self._owns_client:
+            await self._client.aclose()
+        self._client = None
+        self._session_expires_at = None
+
+    # --- Sesión ----------------------------------------------------------------
+
+    def _session_valid(self, margin: float = 0) -> bool:
+        return self._session_expires_at is not None and time.monotonic() < self._session_expires_at - margin
+
+    async def ensure_session(self):
+        """
+        Garantiza una sesión válida sin hacer login en cada operación.
+          - Lejos del vencimiento: no hace nada.
+          - Dentro del margen de renovación: lanza un único refresh en segundo plano.
+          - Vencida o inexistente: inicia sesión (una sola vez aunque haya llamadas concurrentes).
+        """
+        if self._session_valid(self.session_refresh_margin):
+            return
+        if self._session_valid():
+            if self._refresh_task is None or self._refresh_task.done():
+                self._refresh_task = asyncio.ensure_future(self._background_refresh(self._session_generation))
+            return
+        await self._refresh_session(self._session_generation)
+
+    async def _refresh_session(self, seen_generation: int):
+        async with self._session_lock:
+            # Otro llamador ya renovó la sesión mientras esperábamos el lock
+            if self._session_generation != seen_generation and self._session_valid():
+                return
+            await self.login()
+
+    async def _background_refresh(self, seen_generation: int):
+        try:
+            await self._refresh_session(seen_generation)
+        except Exception as e:
+            logger.warning("No se pudo renovar la sesión de Pontis en segundo plano: %s", e)
+
+    async def _send(self, method: str, path: str, json: dict = None) -> httpx.Response:
+        """
+        Envía la petición con sesión vigente. Si Pontis responde 401, vuelve a
+        iniciar sesión y reintenta una vez.
+        """
+        await self.ensure_session()
+        generation = self._session_generation
+        async with self._guard.acall():
+            response = await self.client.request(method, path, json=json)
+        if response.status_code == 401:
+            logger.warning("Pontis rechazó la sesión (401) en %s %s. Reautenticando...", method, path)
+            await self._refresh_session(generation)
+            async with self._guard.acall():
+                response = await self.client.request(method, path, json=json)
+        return response
+
+    # --- Operaciones -------------------------------------------------------------
+
+    async def _request(self, method: str, path: str, error_message: str, json: dict = None) -> dict:
+        """
+        Ejecuta la petición y retorna el JSON. Un status de error se traduce a
+        HTTPException con `error_message` y el cuerpo de la respuesta.
+        """
+        try:
+            response = await self._send(method, path, json=json)
+            response.raise_for_status()  # Lanza una excepción si la respuesta no es exitosa
+            return response.json()
+        except httpx.HTTPStatusError as e:
+            raise HTTPException(
+                status_code=e.response.status_code,
+                detail=f"{error_message}: {e.response.text}"
+            )
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"{PONTIS_CONNECTION_ERROR}: {str(e)}"
+            )
+
+    async def login(self) -> dict:
+        """
+        Inicia sesión en Pontis; las cookies de sesión quedan en el cliente compartido.
+        """
+        payload = {
+            "customer_id": f"{self.username}",
+            "password": f"{self.password}"
+        }
+        try:
+            async with self._guard.acall():
+                response = await self.client.post("/auth/login", json=payload)
+            response.raise_for_status()  # Lanza una excepción si la respuesta no es exitosa
+            data = response.json()
+        except httpx.HTTPStatusError as e:
+            raise HTTPException(
+                status_code=e.response.status_code,
+                detail=f"Error al autenticarse en la API externa de PONTIS: {e.response.text}"
+            )
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error interno al conectarse a la API externa de PONTIS: {str(e)}"
+            )
+        self._session_expires_at = time.monotonic() + self.session_ttl
+        self._session_generation += 1
+        logger.info("Sesión de Pontis iniciada (válida por %ss).", self.session_ttl)
+        return data
+
+    async def get_customer(self, customer_id: str, use_cache: bool = True) -> PontisCustomer:
+        """
+        GET /customers/getCustomer/<id> interpretado como `PontisCustomer`. Si no existe,
+        Pontis responde 200 con "response": None y se retorna un customer con exists=False.
+        Con `use_cache=False` (procesos masivos, jobs que deciden una escritura) se consulta
+        Pontis sin pasar por la caché ni por el single-flight, y no se llena la caché.
+        """
+        path = f"/customers/getCustomer/{customer_id}"
+        if not use_cache:
+            customer, _ = await self._get_customer(customer_id, path)
+            return customer
+
+        cached = self._customers.get(customer_id)
+        if cached is not None:
+            return cached
+        version = self._customer_versions.get(customer_id, 0)
+        # Por cliente y versión: una lectura posterior a una escritura (o de otro cliente)
+        # no se une a un GET que empezó antes
+        key = (id(self), path, version)
+        customer, cacheable = await pontis_reads.do(key, lambda: self._get_customer(customer_id, path))
+        if cacheable and self._customer_versions.get(customer_id, 0) == version:
+            self._customers.set(customer_id, customer)
+        return customer
+
+    def invalidate_customer(self, customer_id: str):
+        if not customer_id:
+            return
+        self._customer_versions[customer_id] = self._customer_versions.get(customer_id, 0) + 1
+        self._customers.invalidate(customer_id)
+
+    def customer_cache_stats(self) -> dict:
+        return self._customers.stats()
+
+    async def _get_customer(self, customer_id: str, path: str) -> tuple[PontisCustomer, bool]:
+        logger.debug("Consultando API Pontis en URL: %s%s", self.base_url, path)
+        try:
+            response = await self._send("GET", path)
+            # No usamos raise_for_status() porque la API puede devolver 200 con un error en el JSON.
+            data = response.json()
+            logger.debug("Respuesta de Pontis: %s", data)
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error("Error conectándose a la API de Pontis: %s", str(e))
+            raise HTTPException(status_code=500, detail="Error interno al conectarse a Pontis.")
+        # Solo se cachean respuestas con la forma esperada ("response" presente, aunque sea null)
+        return PontisCustomer.from_response(customer_id, data), isinstance(data, dict) and "response" in data
+
+    async def create_customer(self, customer_data: dict) -> dict:
+        customer_id = customer_data.get("customer", {}).get("customerId")
+        try:
+            return await self._request("POST", "/customers/create", "Error al crear el cliente en Pontis", json=customer_data)
+        finally:
+            self.invalidate_customer(customer_id)
+
+    async def update_customer(self, customer_id: str, data: dict) -> dict:
+        try:
+            return await self._request("PUT", f"/customers/{customer_id}", "Error al actualizar el cliente en Pontis", json=data)
+        finally:
+            self.invalidate_customer(customer_id)
+
+    async def update_password(self, customer_id: str, new_password: str) -> dict:
+        payload = {
+            "customerAccount": {
+                "password": new_password
+            }
+        }
+        try:
+            return await self._request("PUT", f"/customers/{customer_id}", "Error al actualizar la contraseña en Pontis", json=payload)
+        finally:
+            self.invalidate_customer(customer_id)
+
+    async def delete_services(self, customer_id: str) -> dict:
+        try:
+            return await self._request("DELETE", f"/customers/deleteServices/{customer_id}", "Error al eliminar los paquetes en Pontis")
+        finally:
+            self.invalidate_customer(customer_id)
+
+
+_pontis_client = None
+
+
+def init_pontis_client() -> PontisClient:
+    return get_pontis_client()
+
+
+async def close_pontis_client():
+    global _pontis_client
+    if _pontis_client is not None:
+        await _pontis_client.close()
+        _pontis_client = None
+
+
+def create_pontis_client(**overrides) -> PontisClient:
     """
-    Devuelve (effectiveDt, expireDt) con formato 'dd/MM/yyyy' según la lógica
-    de planes especiales (46..49) o la fecha actual +30 días.
+    Crea un `PontisClient` con la configuración de settings; `overrides` reemplaza
+    argumentos puntuales (límites del pool, guard). Quien lo crea debe cerrarlo.
     """
-    if plan_id == 46:
-        return ("20/03/2025", "20/03/2025")
-    elif plan_id == 47: #TODO: CAMBIAR------------
-        return ("21/03/2025", "21/03/2025")
-    elif plan_id == 49:
-        return ("25/03/2025", "26/03/2025")
-    else:
-        now = datetime.now()
-        return (
-            now.strftime("%d/%m/%Y"),
-            (now + timedelta(days=30)).strftime("%d/%m/%Y")
-        )
+    options = dict(
+        max_connections=settings.PONTIS_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.PONTIS_MAX_KEEPALIVE_CONNECTIONS,
+        http2=settings.PONTIS_HTTP2,
+        session_ttl=settings.PONTIS_SESSION_TTL_SECONDS,
+        session_refresh_margin=settings.PONTIS_SESSION_REFRESH_MARGIN_SECONDS,
+        customer_cache_ttl=settings.PONTIS_CUSTOMER_CACHE_TTL_SECONDS,
+    )
+    options.update(overrides)
+    return PontisClient(settings.OTT_URL_BASE_API, settings.OTT_USERNAME, settings.OTT_PASSWORD, **options)
+
+
+def get_pontis_client() -> PontisClient:
+    global _pontis_client
+    if _pontis_client is None:
+        _pontis_client = create_pontis_client()
+    return _pontis_client
+
 
-def _build_services_for_plan_create(plan_id: int, eff: str, exp: str) -> list:
+async def login_to_external_api():
     """
-    Arma la lista de servicios para un plan dado en la CREACIÓN de un customer.
-    A diferencia del 'update', aquí tenemos la particularidad de que:
-      - Planes 6,8,9,46..49 añaden sus menús con expireDt=exp
-      - Otros planes: default
-      - Se podría dejar flexible si se necesitan 'obligatorios' o no.
-    
-    NOTA: en tu código original, pones 6213, 6214, 6215 siempre con expireDt = "" (en blanco).
+    Realiza una solicitud HTTP POST a la API externa para autenticarse.
+    Las operaciones de Pontis ya gestionan la sesión; solo hace falta para forzar un login.
     """
-    services = []
-    
-    # Plan 6
-    if plan_id == 6:
-        services.extend([
-            {"effectiveDt": eff, "expireDt": exp, "serviceMenu": {"serviceMenuId": "6212"}},
-            {"effectiveDt": eff, "expireDt": exp, "serviceMenu": {"serviceMenuId": "6294"}}
-        ])
-    # Plan 8
-    elif plan_id == 8:
-        services.extend([
-            {"effectiveDt": eff, "expireDt": exp, "serviceMenu": {"serviceMenuId": "6212"}},
-            {"effectiveDt": eff, "expireDt": exp, "serviceMenu": {"serviceMenuId": "6217"}},
-            {"effectiveDt": eff, "expireDt": exp, "serviceMenu": {"serviceMenuId": "6294"}}
-        ])
-    # Plan 9
-    elif plan_id == 9:
-        services.extend([
-            {"effectiveDt": eff, "expireDt": exp, "serviceMenu": {"serviceMenuId": "6212"}},
-            {"effectiveDt": eff, "expireDt": exp, "serviceMenu": {"serviceMenuId": "6217"}},
-            {"effectiveDt": eff, "expireDt": exp, "serviceMenu": {"serviceMenuId": "6293"}},
-            {"effectiveDt": eff, "expireDt": exp, "serviceMenu": {"serviceMenuId": "6294"}}
-        ])
-    # Plan 46..49
-    elif plan_id in [46, 47, 49]:
-        services.extend([
-            {"effectiveDt": eff, "expireDt": exp, "serviceMenu": {"serviceMenuId": "6294"}}
-        ])
-    else:
-        # Plan por defecto (si llegas a necesitar)
-        pass
-
-    return services
-
-def _determine_auto_prov_counts(plan_id: int) -> tuple[str, str]:
+    return await get_pontis_client().login()
+   
+def _require_plan(plan_id: int) -> Plan:
+    plan = get_plan(plan_id)
+    if plan is None:
+        logger.error("El plan %s no está en el catálogo de planes.", plan_id)
+        raise HTTPException(status_code=400, detail=f"El plan {plan_id} no es un plan válido.")
+    return plan
+
+
+def _plans_services(id_plan: int, id_plan2: int = 0) -> tuple[str, str, str, list]:
     """
-    Devuelve (autoProvCountStationary, autoProvisionCountMobile) 
-    según tu lógica de planes.
+    Fechas y servicios de uno o dos planes del catálogo. Retorna
+    (effectiveDt del primer plan, autoProvCountStationary, autoProvisionCountMobile, servicios).
+    Con dos planes se toma el mayor de cada cantidad de aprovisionamiento.
     """
-    if plan_id == 6:
-        return ("1", "2")
-    elif plan_id in [8, 9]:
-        return ("2", "3")
-    elif plan_id in [46, 47, 49]:
-        return ("1", "2")
-    else:
-        # Por defecto
-        return ("1", "2")
+    plans = [_require_plan(id_plan)]
+    if id_plan2 != 0:
+        plans.append(_require_plan(id_plan2))
+
+    services = []
+    first_effective_dt = None
+    for plan in plans:
+        effective_dt, expire_dt = plan.dates()
+        first_effective_dt = first_effective_dt or effective_dt
+        services.extend(plan.build_services(effective_dt, expire_dt))
+
+    auto_prov_stationary = str(max(plan.auto_prov_stationary for plan in plans))
+    auto_prov_mobile = str(max(plan.auto_prov_mobile for plan in plans))
+    return first_effective_dt, auto_prov_stationary, auto_prov_mobile, services
+
 
 def build_customer_data(
     id_user: int,
@@ -118,49 +360,17 @@ def build_customer_data(
     """
     Construye el payload de creación (primer alta) de un customer en Pontis.
     - id_plan2 puede ser 0 => no hay segundo plan.
-    - Los planes 6,8,9,46..49 añaden servicios con expireDt=exp
-    - Se añaden 3 servicios "obligatorios" (6213, 6214, 6215) con expireDt="".
+    - Cada plan añade sus paquetes del catálogo con las fechas de su vigencia.
+    - Se añaden los servicios base del catálogo (6213, 6214, 6215) con expireDt="".
     """
     contact = contact_data[0]
     mobile = contact.get("mobile", "")
 
-    # 1) Calcular las fechas y la lista de servicios "obligatorios"
-    eff1, exp1 = _compute_dates_for_plan(id_plan)
-    # id_plan2
-    eff2, exp2 = ("", "")  # Por si no se usa
-    if id_plan2 != 0:
-        eff2, exp2 = _compute_dates_for_plan(id_plan2)
-
-    # 2) Armar la lista con servicios "obligatorios" (siempre con expireDt = "")
-    #   tal cual tu código original
-    subscribe_service_list = [
-        {"effectiveDt": eff1, "expireDt": "", "serviceMenu": {"serviceMenuId": "6213"}},
-        {"effectiveDt": eff1, "expireDt": "", "serviceMenu": {"serviceMenuId": "6214"}},
-        {"effectiveDt": eff1, "expireDt": "", "serviceMenu": {"serviceMenuId": "6215"}}
-    ]
-
-    # 3) Agregar los servicios del primer plan
-    services_plan1 = _build_services_for_plan_create(id_plan, eff1, exp1)
-    subscribe_service_list.extend(services_plan1)
-
-    # 4) Si hay un segundo plan
-    if id_plan2 != 0:
-        services_plan2 = _build_services_for_plan_create(id_plan2, eff2, exp2)
-        subscribe_service_list.extend(services_plan2)
+    # Servicios base (sin vencimiento) + paquetes de los planes, según el catálogo
+    eff1, autoProvCountStationary, autoProvisionCountMobile, plan_services = _plans_services(id_plan, id_plan2)
+    subscribe_service_list = PLAN_CATALOG.build_base_services(eff1) + plan_services
 
-    # 5) autoProvCountStationary, autoProvisionCountMobile
-    #   => podrías decidir cómo combinar ambos planes si hay 2. 
-    #   Ejemplo: tomar el mayor de ambos
-    apc1, apm1 = _determine_auto_prov_counts(id_plan)
-    if id_plan2 != 0:
-        apc2, apm2 = _determine_auto_prov_counts(id_plan2)
-        autoProvCountStationary = str(max(int(apc1), int(apc2)))
-        autoProvisionCountMobile = str(max(int(apm1), int(apm2)))
-    else:
-        autoProvCountStationary = apc1
-        autoProvisionCountMobile = apm1
-
-    # 6) Construir el payload final
+    # Construir el payload final
     customer_data = {
         "customer": {
             "autoProvCountStationary": autoProvCountStationary,
@@ -212,30 +422,10 @@ async def create_customer_in_pontis(customer_data):
     """
     Realiza una solicitud HTTP POST a la API de creación de clientes en Pontis.
 
-    :param api_token: Token de autenticación obtenido del login.
     :param customer_data: Datos del cliente para crear.
     :return: Respuesta de la API.
     """
-    url = f"{settings.OTT_URL_BASE_API}/customers/create"
-    headers = {
-        "Content-Type": "application/json"
-    }
-
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=customer_data, headers=headers)
-            response.raise_for_status()  # Lanza una excepción si la respuesta no es exitosa
-            return response.json()  # Devuelve la respuesta JSON
-    except httpx.HTTPStatusError as e:
-        raise HTTPException(
-            status_code=e.response.status_code,
-            detail=f"Error al crear el cliente en Pontis: {e.response.text}"
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error interno al conectarse a la API de Pontis: {str(e)}"
-        )
+    return await get_pontis_client().create_customer(customer_data)
     
 async def update_customer_password_in_pontis(customer_id: str, new_password: str):
     """
@@ -244,141 +434,20 @@ async def update_customer_password_in_pontis(customer_id: str, new_password: str
     :param new_password: La nueva contraseña en texto plano.
     :return: La respuesta JSON de la API de Pontis.
     """
-    url = f"{settings.OTT_URL_BASE_API}/customers/{customer_id}"
-    payload = {
-        "customerAccount": {
-            "password": new_password
-        }
-    }
-    headers = {"Content-Type": "application/json"}
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.put(url, json=payload, headers=headers)
-            response.raise_for_status()  # Lanza error si la respuesta no es exitosa
-            return response.json()
-    except httpx.HTTPStatusError as e:
-        raise HTTPException(
-            status_code=e.response.status_code,
-            detail=f"Error al actualizar la contraseña en Pontis: {e.response.text}"
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error interno al conectarse a la API de Pontis: {str(e)}"
-        )
+    return await get_pontis_client().update_password(customer_id, new_password)
     
  # DE ACA PARA ABJO ES NUEVO------------------------------------------------------------------------------------------   
 
 async def delete_packages_in_pontis(pontis_customer_id):
-    url = f"{settings.OTT_URL_BASE_API}/customers/deleteServices/{pontis_customer_id}" 
-    # url = f"{settings.OTT_URL_BASE_API}/customers/deleteServices/MAP006" 
-    headers = {"Content-Type": "application/json"}
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.delete(url, headers=headers)
-            response.raise_for_status()  # Lanza excepción si la respuesta no es exitosa
-            return response.json()
-    except httpx.HTTPStatusError as e:
-        raise HTTPException(
-            status_code=e.response.status_code,
-            detail=f"Error al eliminar los paquetes en Pontis: {e.response.text}"
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error interno al conectarse a la API de Pontis: {str(e)}"
-        )
-
-    return true
-    
-
-def _build_services_for_plan(plan_id: int, effective_dt: str, expire_dt: str) -> tuple[str, str, list]:
-    """
-    Dado un plan_id y sus fechas, devuelve:
-      - autoProvCountStationary (str)
-      - autoProvisionCountMobile (str)
-      - la lista de servicios (list) que corresponden a ese plan.
-    
-    Ajusta según tu propia lógica de planes 6, 8, 9, 46-49, etc.
-    """
-    # Valores por defecto
-    autoProvCountStationary = "2"
-    autoProvisionCountMobile = "3"
-    services = []
-    
-    if plan_id == 6:
-        autoProvCountStationary = "1"
-        autoProvisionCountMobile = "2"
-        services = [
-            {"effectiveDt": effective_dt, "expireDt": expire_dt, "serviceMenu": {"serviceMenuId": "6212"}},
-            {"effectiveDt": effective_dt, "expireDt": expire_dt, "serviceMenu": {"serviceMenuId": "6294"}}
-        ]
-    elif plan_id == 8:
-        autoProvCountStationary = "2"
-        autoProvisionCountMobile = "3"
-        services = [
-            {"effectiveDt": effective_dt, "expireDt": expire_dt, "serviceMenu": {"serviceMenuId": "6212"}},
-            {"effectiveDt": effective_dt, "expireDt": expire_dt, "serviceMenu": {"serviceMenuId": "6217"}},
-            {"effectiveDt": effective_dt, "expireDt": expire_dt, "serviceMenu": {"serviceMenuId": "6294"}}
-        ]
-    elif plan_id == 9:
-        autoProvCountStationary = "2"
-        autoProvisionCountMobile = "3"
-        services = [
-            {"effectiveDt": effective_dt, "expireDt": expire_dt, "serviceMenu": {"serviceMenuId": "6212"}},
-            {"effectiveDt": effective_dt, "expireDt": expire_dt, "serviceMenu": {"serviceMenuId": "6217"}},
-            {"effectiveDt": effective_dt, "expireDt": expire_dt, "serviceMenu": {"serviceMenuId": "6293"}},
-            {"effectiveDt": effective_dt, "expireDt": expire_dt, "serviceMenu": {"serviceMenuId": "6294"}}
-        ]
-    elif plan_id in [46, 47, 49]:
-        # Ejemplo de tu caso especial
-        autoProvCountStationary = "1"
-        autoProvisionCountMobile = "2"
-        services = [
-            {"effectiveDt": effective_dt, "expireDt": expire_dt, "serviceMenu": {"serviceMenuId": "6294"}}
-        ]
-    else:
-        # Plan por defecto (ejemplo)
-        autoProvCountStationary = "2"
-        autoProvisionCountMobile = "3"
-        services = [
-            {"effectiveDt": effective_dt, "expireDt": expire_dt, "serviceMenu": {"serviceMenuId": "6212"}},
-            {"effectiveDt": effective_dt, "expireDt": expire_dt, "serviceMenu": {"serviceMenuId": "6217"}},
-            {"effectiveDt": effective_dt, "expireDt": expire_dt, "serviceMenu": {"serviceMenuId": "6293"}},
-            {"effectiveDt": effective_dt, "expireDt": expire_dt, "serviceMenu": {"serviceMenuId": "6294"}}
-        ]
+    return await get_pontis_client().delete_services(pontis_customer_id)
     
-    return autoProvCountStationary, autoProvisionCountMobile, services
-
 
 async def build_update_customer_data(id_plan: int, id_plan2: int = 0) -> dict:
     """
     Construye el payload para actualizar los paquetes en Pontis.
     Si id_plan2 != 0, se combinan ambos planes en un mismo subscribeService.
     """
-    # 1) Calcular fechas y servicios para el primer plan
-    eff1, exp1 = _compute_dates_for_plan(id_plan)
-    apc1, apm1, services1 = _build_services_for_plan(id_plan, eff1, exp1)
-
-    # 2) Si existe un segundo plan, calculamos y unimos
-    if id_plan2 != 0:
-        eff2, exp2 = _compute_dates_for_plan(id_plan2)
-        apc2, apm2, services2 = _build_services_for_plan(id_plan2, eff2, exp2)
-        
-        # Decide cómo quieres combinar autoProvCountStationary y autoProvisionCountMobile.
-        # Ejemplo: tomar el máximo
-        autoProvCountStationary = str(max(int(apc1), int(apc2)))
-        autoProvisionCountMobile = str(max(int(apm1), int(apm2)))
-        
-        # Unir las listas de servicios
-        all_services = services1 + services2
-    else:
-        # Solo un plan
-        autoProvCountStationary = apc1
-        autoProvisionCountMobile = apm1
-        all_services = services1
-
-    # 3) Construir el payload final
+    _, autoProvCountStationary, autoProvisionCountMobile, all_services = _plans_services(id_plan, id_plan2)
     payload = {
         "customer": {
             "autoProvCountStationary": autoProvCountStationary,
@@ -391,80 +460,20 @@ async def build_update_customer_data(id_plan: int, id_plan2: int = 0) -> dict:
 
 
 async def update_customer_in_pontis(update_data_customer, pontis_customer_id):
-
-    url = f"{settings.OTT_URL_BASE_API}/customers/{pontis_customer_id}" 
-    # url = f"{settings.OTT_URL_BASE_API}/customers/MAP006" 
-
-
-    headers = {"Content-Type": "application/json"}
-    
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.put(url, json=update_data_customer, headers=headers)
-            response.raise_for_status()  # Lanza excepción si la respuesta no es exitosa
-            return response.json()
-    except httpx.HTTPStatusError as e:
-        raise HTTPException(
-            status_code=e.response.status_code,
-            detail=f"Error al actualizar el cliente en Pontis: {e.response.text}"
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Error interno al conectarse a la API de Pontis: {str(e)}"
-        )
+    return await get_pontis_client().update_customer(pontis_customer_id, update_data_customer)
     
 
-async def check_customer_in_pontis(pontis_customer_id: str) -> dict:
+async def check_customer_in_pontis(pontis_customer_id: str) -> PontisCustomer:
     """
     Llama al endpoint GET /getCustomer/<pontis_customer_id> en la API de Pontis.
-    Retorna el JSON completo si existe, o un dict con "response": None si no existe.
+    Retorna el customer interpretado; `exists` es False si Pontis respondió "response": None.
     """
-    url = f"{settings.OTT_URL_BASE_API}/customers/getCustomer/{pontis_customer_id}"
-    # url = f"{settings.OTT_URL_BASE_API}/customers/getCustomer/MAP006"   #TODO: CAMBIAR------------
-
-    
-    logger.debug("Consultando API Pontis en URL: %s", url)
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(url)
-            # No usamos raise_for_status() porque la API puede devolver 200 con un error en el JSON.
-            data = response.json()
-            logger.debug("Respuesta de Pontis: %s", data)
-            return data
-    except Exception as e:
-        logger.error("Error conectándose a la API de Pontis: %s", str(e))
-        raise HTTPException(status_code=500, detail="Error interno al conectarse a Pontis.")
+    return await get_pontis_client().get_customer(pontis_customer_id)
     
-def check_subscribe_services_expiration(pontis_response: dict) -> bool:
+def check_subscribe_services_expiration(customer: PontisCustomer) -> bool:
     """
-    Dado un dict con la respuesta de Pontis (campo 'response' != null),
-    revisa en 'subscribeService' si alguno de los servicios [6212, 6217, 6293, 6294]
-    tiene un expireDt >= hoy o vacío (lo cual indica plan activo).
-    
-    Retorna True si el plan sigue activo, False si ya expiró.
+    Retorna True si alguno de los paquetes de los planes (6212, 6217, 6293, 6294) tiene
+    expireDt >= hoy o vacío (plan activo), False si ya expiró. Las fechas se interpretan
+    una sola vez al construir el `PontisCustomer`.
     """
-    # Ids de servicio que deseas verificar
-    service_ids_interes = {6212, 6217, 6293, 6294}
-    hoy = datetime.now(timezone.utc).date()
-    
-    subscribe_services = pontis_response.get("subscribeService", [])
-    for srv in subscribe_services:
-        menu = srv.get("serviceMenu", {})
-        s_id = menu.get("serviceMenuId")
-        if s_id in service_ids_interes:
-            expire_str = srv.get("expireDt")  # Puede ser "" o "16/04/2025", etc.
-            if not expire_str:
-                # Si no hay fecha de expiración => se asume activo
-                return True
-            # Convertir la fecha expireDt a objeto date
-            try:
-                expire_date = datetime.strptime(expire_str, "%d/%m/%Y").date()
-                if expire_date >= hoy:
-                    # El plan sigue activo
-                    return True
-            except ValueError:
-                # Si la fecha viene malformada, lo consideramos activo por seguridad
-                return True
-    # Si no se encontró ninguno con expire >= hoy => se considera expirado
-    return False
\ No newline at end of file
+    return customer.is_plan_active()
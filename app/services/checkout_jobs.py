@@ -0,0 +1,135 @@
+import asyncio
+from datetime import datetime
+
+from fastapi import HTTPException
+
+from app.core.database import get_odoo_connection
+from app.core.email_utils import send_pontis_credentials_email, send_pontis_credentials_email_v2
+from app.core.logging_config import logger
+from app.services.api_service import build_customer_data, create_customer_in_pontis, get_pontis_client
+from app.services.odoo_service import execute_odoo_method_async
+from app.services.outbox_service import OutboxJob, enqueue, outbox_handler
+from app.services.pontis_sync import sync_customer_services
+from app.services.sqlite_service import get_decrypted_password, get_user_record, update_user_policies
+from app.utils.plans import is_event_plan
+
+# Pasos del checkout (update_user) que se ejecutan desde el outbox una vez publicada
+# la factura. Cada handler es idempotente: se puede repetir sin duplicar efectos.
+
+PONTIS_ACTIVATION = "pontis_activation"
+CREDENTIALS_EMAIL = "credentials_email"
+PAYMENT_REGISTRATION = "payment_registration"
+POLICIES_ACCEPTANCE = "policies_acceptance"
+
+# Estados de account.move en los que el pago ya quedó registrado
+PAID_STATES = ('paid', 'in_payment')
+
+
+def checkout_jobs(invoice_id: int, id_user: int, partner_id: int, id_plan: int, id_plan2: int) -> list:
+    """
+    Trabajos que completan un checkout. La clave por factura evita encolarlos dos veces.
+    """
+    return [
+        OutboxJob(
+            PONTIS_ACTIVATION,
+            {"invoice_id": invoice_id, "id_user": id_user, "partner_id": partner_id, "id_plan": id_plan, "id_plan2": id_plan2},
+            dedupe_key=f"{PONTIS_ACTIVATION}:{invoice_id}",
+        ),
+        OutboxJob(PAYMENT_REGISTRATION, {"invoice_id": invoice_id}, dedupe_key=f"{PAYMENT_REGISTRATION}:{invoice_id}"),
+        OutboxJob(POLICIES_ACCEPTANCE, {"id_user": id_user}, dedupe_key=f"{POLICIES_ACCEPTANCE}:{invoice_id}"),
+    ]
+
+
+@outbox_handler(PONTIS_ACTIVATION)
+async def activate_in_pontis(payload: dict):
+    """
+    Crea el customer en Pontis si no existe o sincroniza sus paquetes con el plan comprado.
+    Al terminar encola el correo de credenciales.
+    """
+    id_user = payload["id_user"]
+    pontis_customer_id = f"MAP0{id_user}"
+    # Sin la caché del worker: el customer pudo crearse en otro worker o en un intento
+    # anterior que falló después del alta, y recrearlo respondería 4xx
+    pontis_customer = await get_pontis_client().get_customer(pontis_customer_id, use_cache=False)
+
+    if not pontis_customer.exists:
+        logger.info("Creando usuario en Pontis (no existía): %s", pontis_customer_id)
+        conn = get_odoo_connection()
+        contact = await execute_odoo_method_async(conn, 'res.partner', 'read', [[payload["partner_id"]]])
+        plain_password = await get_decrypted_password(id_user)
+        customer_data = build_customer_data(id_user, contact, payload["id_plan"], payload["id_plan2"], plain_password)
+        create_customer_response = await create_customer_in_pontis(customer_data)
+        if not create_customer_response.get("response"):
+            logger.error("No se obtuvieron credenciales de Pontis tras create_customer_in_pontis.")
+            raise HTTPException(status_code=502, detail="No se obtuvieron credenciales de Pontis.")
+        pontis_username = create_customer_response["response"]
+    else:
+        # Ya existe (o un intento anterior lo creó): solo se envían los paquetes que faltan
+        update_response = await sync_customer_services(pontis_customer_id, pontis_customer, payload["id_plan"], payload["id_plan2"])
+        logger.info("Plan actualizado en Pontis para %s. Respuesta: %s", pontis_customer_id, update_response)
+        pontis_username = pontis_customer_id
+
+    await enqueue(OutboxJob(
+        CREDENTIALS_EMAIL,
+        {"id_user": id_user, "id_plan": payload["id_plan"], "pontis_username": pontis_username},
+        dedupe_key=f"{CREDENTIALS_EMAIL}:{payload['invoice_id']}",
+    ))
+
+
+@outbox_handler(CREDENTIALS_EMAIL)
+async def send_credentials_email(payload: dict):
+    id_user = payload["id_user"]
+    user_record = await get_user_record(id_user)
+    plain_password = await get_decrypted_password(id_user)
+    email = user_record.get("email")
+    send = send_pontis_credentials_email_v2 if is_event_plan(payload["id_plan"]) else send_pontis_credentials_email
+    logger.info("Enviando credenciales de Pontis al correo: %s", email)
+    await asyncio.to_thread(
+        send,
+        to_email=email,
+        subject="Tus credenciales de acceso:",
+        pontis_username=payload["pontis_username"],
+        pontis_password=plain_password
+    )
+
+
+@outbox_handler(PAYMENT_REGISTRATION)
+async def register_invoice_payment(payload: dict):
+    invoice_id = payload["invoice_id"]
+    conn = get_odoo_connection()
+    invoices = await execute_odoo_method_async(
+        conn, 'account.move', 'read', [[invoice_id]],
+        {'fields': ['amount_total', 'currency_id', 'partner_id', 'name', 'payment_state']}
+    )
+    if not invoices:
+        raise HTTPException(status_code=404, detail=f"La factura {invoice_id} no existe en Odoo.")
+    invoice_info = invoices[0]
+    if invoice_info.get('payment_state') in PAID_STATES:
+        logger.info("La factura %s ya tiene el pago registrado.", invoice_id)
+        return
+
+    payment_data = {
+        'payment_type': 'inbound',
+        'communication': invoice_info['name'],
+        'payment_date': datetime.now().strftime("%Y-%m-%d"),
+        'amount': invoice_info['amount_total'],
+        'currency_id': invoice_info['currency_id'][0],
+        'partner_id': invoice_info['partner_id'][0],
+        'journal_id': 3,
+        'partner_bank_id': False,
+    }
+    logger.debug("Payload para registrar pago: %s", payment_data)
+
+    context = {'active_ids': [invoice_id], 'active_model': 'account.move', 'active_id': invoice_id}
+    payment_register_id = await execute_odoo_method_async(
+        conn, 'account.payment.register',
+        'create', [[payment_data]],
+        {'context': context}
+    )
+    logger.info("Registrando pago con ID=%s para la factura %s", payment_register_id, invoice_id)
+    await execute_odoo_method_async(conn, 'account.payment.register', 'action_create_payments', [[payment_register_id[0]]])
+
+
+@outbox_handler(POLICIES_ACCEPTANCE)
+async def accept_service_policies(payload: dict):
+    await update_user_policies(payload["id_user"])
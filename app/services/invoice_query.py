@@ -0,0 +1,163 @@
+from datetime import datetime, timezone
+
+from fastapi import HTTPException
+
+from app.core.logging_config import logger
+from app.services.odoo_service import execute_odoo_method_async
+from app.utils.plans import PRODUCTS
+
+PAID_PAYMENT_STATES = ['paid', 'in_payment']
+# vr_estado de las facturas que cuentan como plan vigente en /users/get
+PLAN_VR_ESTADOS = ['send_and_confirm', 'pending']
+
+
+def today_str() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+def build_plan_invoice_domain(partner_id: int, product_ids: list, invoice_date: str = None, vr_estados: list = None) -> list:
+    """
+    Dominio sobre account.move.line para las líneas de plan de facturas pagadas del contacto
+    (o de varios, si `partner_id` es una lista).
+    Fecha, estado de pago y productos se filtran en Odoo, no en Python.
+    """
+    operator = 'in' if isinstance(partner_id, (list, tuple, set)) else '='
+    domain = [
+        ('move_id.partner_id', operator, partner_id),
+        ('move_id.payment_state', 'in', PAID_PAYMENT_STATES),
+        ('product_id', 'in', list(product_ids)),
+    ]
+    if invoice_date:
+        domain.append(('move_id.invoice_date', '=', invoice_date))
+    else:
+        domain.append(('move_id.invoice_date', '!=', False))
+    if vr_estados:
+        domain.append(('move_id.vr_estado', 'in', list(vr_estados)))
+    return domain
+
+
+async def find_latest_plan_invoice(
+    conn,
+    partner_id: int,
+    product_ids: list = None,
+    invoice_date: str = None,
+    vr_estados: list = None,
+):
+    """
+    Retorna la factura pagada más reciente del contacto que contenga un producto de plan,
+    con un único search_read sobre account.move.line. Si no hay ninguna, retorna None.
+
+    {
+       "id": <invoice_id>,
+       "invoice_date": "YYYY-MM-DD",
+       "plan_id": <product_id>,
+       "product_name": <nombre producto>,
+    }
+    """
+    if product_ids is None:
+        product_ids = set(PRODUCTS.values())
+    lines = await execute_odoo_method_async(
+        conn, 'account.move.line', 'search_read',
+        [build_plan_invoice_domain(partner_id, product_ids, invoice_date, vr_estados)],
+        {
+            'fields': ['move_id', 'product_id', 'invoice_date'],
+            'order': 'invoice_date desc, move_id desc',
+            'limit': 1
+        }
+    )
+    logger.debug("Línea de plan más reciente para partner_id=%s: %s", partner_id, lines)
+    if not lines:
+        return None
+
+    line = lines[0]
+    return {
+        "id": line['move_id'][0],
+        "invoice_date": line['invoice_date'],
+        "plan_id": line['product_id'][0],
+        "product_name": line['product_id'][1],
+    }
+
+
+async def _count_paid_invoices(conn, partner_id: int, invoice_date: str = None) -> int:
+    domain = [('partner_id', '=', partner_id), ('payment_state', 'in', PAID_PAYMENT_STATES)]
+    if invoice_date:
+        domain.append(('invoice_date', '=', invoice_date))
+    return await execute_odoo_method_async(conn, 'account.move', 'search_count', [domain])
+
+
+async def get_latest_plan_invoice(conn, partner_id: int, issued_today: bool = False) -> dict:
+    """
+    Igual que `find_latest_plan_invoice`, pero lanza HTTPException si el contacto no tiene
+    factura de plan válida. Con `issued_today=True` solo considera facturas emitidas hoy (UTC).
+
+    Los conteos que distinguen el motivo del error solo se ejecutan cuando no hay factura.
+    """
+    invoice_date = today_str() if issued_today else None
+    invoice = await find_latest_plan_invoice(conn, partner_id, invoice_date=invoice_date)
+    if invoice:
+        logger.info("Factura de plan seleccionada para contacto ID=%s: %s", partner_id, invoice)
+        return invoice
+
+    if not await _count_paid_invoices(conn, partner_id):
+        raise HTTPException(status_code=404, detail="No se encontró factura pagada para este contacto.")
+    if not issued_today:
+        raise HTTPException(
+            status_code=404,
+            detail="No se encontró factura pagada válida (con productos permitidos) para este contacto."
+        )
+    if not await _count_paid_invoices(conn, partner_id, invoice_date):
+        raise HTTPException(status_code=400, detail="La última factura del contacto no fue emitida hoy, no se puede activar.")
+    raise HTTPException(status_code=404, detail="No se encontró factura pagada válida para este contacto emitida hoy.")
+
+
+async def has_plan_invoice_posted_on(conn, partner_id: int, invoice_date: str, product_ids: list = None) -> bool:
+    """
+    Indica si el contacto tiene una factura de plan publicada (pagada o no) con fecha
+    `invoice_date`. Un solo search_count sobre account.move.line.
+    """
+    if product_ids is None:
+        product_ids = set(PRODUCTS.values())
+    count = await execute_odoo_method_async(
+        conn, 'account.move.line', 'search_count',
+        [[
+            ('move_id.partner_id', '=', partner_id),
+            ('move_id.move_type', '=', 'out_invoice'),
+            ('move_id.state', '=', 'posted'),
+            ('move_id.invoice_date', '=', invoice_date),
+            ('product_id', 'in', list(product_ids)),
+        ]]
+    )
+    return bool(count)
+
+
+async def latest_paid_plans_by_partner(conn, partner_ids: list, product_ids: list = None, vr_estados: list = None) -> dict:
+    """
+    Para muchos contactos a la vez: {partner_id: {"plan_id", "invoice_date"}} con el plan de la
+    factura pagada más reciente de cada uno, con el mismo criterio que `find_latest_plan_invoice`
+    (contacto de la factura, no su partner comercial). Un search_read de las líneas de plan
+    de todo el lote y un read de las facturas para saber a qué contacto pertenece cada una.
+    """
+    if not partner_ids:
+        return {}
+    if product_ids is None:
+        product_ids = set(PRODUCTS.values())
+    # Mismo orden que find_latest_plan_invoice: la primera línea de cada contacto es la que elige /users/get
+    lines = await execute_odoo_method_async(
+        conn, 'account.move.line', 'search_read',
+        [build_plan_invoice_domain(list(partner_ids), product_ids, vr_estados=vr_estados)],
+        {'fields': ['move_id', 'product_id', 'invoice_date'], 'order': 'invoice_date desc, move_id desc'}
+    )
+    if not lines:
+        return {}
+    # Las líneas llevan el partner comercial; el contacto de la factura está en account.move
+    move_ids = list({line['move_id'][0] for line in lines})
+    moves = await execute_odoo_method_async(conn, 'account.move', 'read', [move_ids], {'fields': ['partner_id']})
+    move_partner = {move['id']: move['partner_id'][0] for move in moves if move.get('partner_id')}
+
+    latest = {}
+    for line in lines:
+        partner_id = move_partner.get(line['move_id'][0])
+        if partner_id is None or partner_id in latest or not line.get('product_id'):
+            continue
+        latest[partner_id] = {"plan_id": line['product_id'][0], "invoice_date": line['invoice_date']}
+    return latest
@@ -1,8 +1,94 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from app.config import settings
+from app.core.odoo_jsonrpc import get_odoo_jsonrpc_client, is_jsonrpc_enabled
+from app.core.resilience import odoo_guard
+from app.core.singleflight import SingleFlight, make_key
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Métodos de solo lectura: llamadas concurrentes idénticas comparten una sola RPC
+COALESCED_METHODS = {'read', 'search', 'search_read', 'search_count', 'read_group', 'name_search', 'fields_get'}
+odoo_reads = SingleFlight("odoo")
+
+
 def execute_odoo_method(conn, model, method, args, kwargs=None):
 
     if kwargs is None:
         kwargs = {}
+    # El pool reutiliza el uid autenticado y reintenta si Odoo rechaza la sesión
+    if 'pool' in conn:
+        return conn['pool'].execute_kw(model, method, args, kwargs)
     return conn['models'].execute_kw(
         conn['db'], conn['uid'], conn['password'],
         model, method, args, kwargs
-    )
\ No newline at end of file
+    )
+
+
+def init_odoo_executor() -> ThreadPoolExecutor:
+    """
+    Crea el executor dedicado a las llamadas XML-RPC a Odoo. Tiene tantos hilos
+    como clientes el pool de Odoo, así ningún hilo queda esperando un cliente libre.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.ODOO_POOL_SIZE,
+                thread_name_prefix="odoo-rpc"
+            )
+    return _executor
+
+
+def shutdown_odoo_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+async def run_in_odoo_executor(func, *args, **kwargs):
+    """
+    Ejecuta una función bloqueante de Odoo en el executor dedicado sin bloquear el event loop.
+    """
+    executor = _executor or init_odoo_executor()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(func, *args, **kwargs))
+
+
+async def execute_odoo_method_async(conn, model, method, args, kwargs=None):
+    """
+    Versión awaitable de `execute_odoo_method` para los handlers `async def`.
+    Con ODOO_RPC_PROTOCOL=jsonrpc la llamada va por el cliente JSON-RPC asíncrono;
+    en caso contrario se ejecuta por XML-RPC en el executor dedicado.
+
+    Las lecturas idénticas (modelo, método, args, kwargs) que coinciden en el
+    tiempo se resuelven con una sola llamada a Odoo.
+    """
+    if method in COALESCED_METHODS:
+        key = make_key(model, method, args, kwargs)
+        return await odoo_reads.do(key, lambda: _execute_odoo_method_async(conn, model, method, args, kwargs))
+    return await _execute_odoo_method_async(conn, model, method, args, kwargs)
+
+
+async def _execute_odoo_method_async(conn, model, method, args, kwargs=None):
+    async with odoo_guard.acall():
+        if is_jsonrpc_enabled():
+            return await get_odoo_jsonrpc_client().execute_kw(model, method, args, kwargs)
+        return await run_in_odoo_executor(execute_odoo_method, conn, model, method, args, kwargs)
+
+
+async def authenticate_odoo_user(conn, login: str, password: str):
+    """
+    Autentica credenciales de un usuario final en Odoo (common.authenticate).
+    Retorna el uid del usuario o False si las credenciales no son válidas.
+    """
+    async with odoo_guard.acall():
+        if is_jsonrpc_enabled():
+            return await get_odoo_jsonrpc_client().call("common", "authenticate", conn['db'], login, password, {})
+        return await run_in_odoo_executor(conn['common'].authenticate, conn['db'], login, password, {})
@@ -0,0 +1,278 @@
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+
+from app.config import settings
+from app.core.database import get_sqlite_connection
+from app.core.logging_config import logger
+
+# Outbox en SQLite (storage/verification.db): los efectos secundarios que no hace
+# falta esperar en la petición HTTP se guardan como trabajos y los ejecuta un worker
+# asíncrono con reintentos y backoff exponencial. Un trabajo tomado por un worker
+# queda reservado `OUTBOX_LEASE_SECONDS`; si el proceso muere, otro worker lo retoma.
+# La tabla la crean las migraciones (app/core/migrations.py).
+
+PENDING = "pending"
+PROCESSING = "processing"
+DONE = "done"
+FAILED = "failed"
+
+Handler = Callable[[dict], Awaitable[None]]
+_handlers: Dict[str, Handler] = {}
+
+
+@dataclass(frozen=True)
+class OutboxJob:
+    kind: str
+    payload: dict
+    # Trabajos con la misma clave se encolan una sola vez (p. ej. un correo por factura)
+    dedupe_key: Optional[str] = None
+    delay: float = 0
+
+
+def outbox_handler(kind: str):
+    """
+    Registra la corrutina que ejecuta los trabajos de tipo `kind`. Debe ser idempotente:
+    un trabajo puede ejecutarse más de una vez si falla después de aplicar sus cambios.
+    """
+    def decorator(func: Handler) -> Handler:
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+def _insert_jobs(jobs: List[OutboxJob]) -> List[int]:
+    now = time.time()
+    conn = get_sqlite_connection()
+    try:
+        ids = []
+        # Todos los trabajos de una llamada se guardan en la misma transacción
+        with conn:
+            for job in jobs:
+                cursor = conn.execute(
+                    """
+                    INSERT OR IGNORE INTO outbox (kind, payload, dedupe_key, status, max_attempts, next_attempt_at, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (job.kind, json.dumps(job.payload), job.dedupe_key, PENDING,
+                     settings.OUTBOX_MAX_ATTEMPTS, now + job.delay, now, now)
+                )
+                if cursor.rowcount:
+                    ids.append(cursor.lastrowid)
+                else:
+                    logger.info("Trabajo %s con clave %s ya estaba en el outbox.", job.kind, job.dedupe_key)
+        return ids
+    finally:
+        conn.close()
+
+
+async def enqueue(*jobs: OutboxJob) -> List[int]:
+    for job in jobs:
+        if job.kind not in _handlers:
+            raise ValueError(f"No hay handler registrado para trabajos de tipo '{job.kind}'")
+    ids = await asyncio.to_thread(_insert_jobs, list(jobs))
+    if _worker is not None:
+        _worker.wake()
+    return ids
+
+
+def _claim_job(lease_seconds: float) -> Optional[dict]:
+    now = time.time()
+    conn = get_sqlite_connection()
+    try:
+        with conn:
+            row = conn.execute(
+                """
+                UPDATE outbox
+                SET status = ?, attempts = attempts + 1, locked_until = ?, updated_at = ?
+                WHERE id = (
+                    SELECT id FROM outbox
+                    WHERE (status = ? AND next_attempt_at <= ?) OR (status = ? AND locked_until < ?)
+                    ORDER BY next_attempt_at, id
+                    LIMIT 1
+                )
+                RETURNING id, kind, payload, attempts, max_attempts
+                """,
+                (PROCESSING, now + lease_seconds, now, PENDING, now, PROCESSING, now)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"id": row[0], "kind": row[1], "payload": json.loads(row[2]), "attempts": row[3], "max_attempts": row[4]}
+    finally:
+        conn.close()
+
+
+def _finish_job(job_id: int, status: str, error: str = None, retry_at: float = None):
+    now = time.time()
+    conn = get_sqlite_connection()
+    try:
+        with conn:
+            conn.execute(
+                """
+                UPDATE outbox
+                SET status = ?, last_error = ?, next_attempt_at = COALESCE(?, next_attempt_at), locked_until = NULL, updated_at = ?
+                WHERE id = ?
+                """,
+                (status, error, retry_at, now, job_id)
+            )
+    finally:
+        conn.close()
+
+
+def backoff_delay(attempts: int) -> float:
+    """
+    Backoff exponencial con jitter: base * 2^(intentos-1), acotado y con un factor aleatorio
+    entre 0.5 y 1 para que los reintentos de varios trabajos no coincidan.
+    """
+    delay = min(settings.OUTBOX_BACKOFF_MAX_SECONDS, settings.OUTBOX_BACKOFF_BASE_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def is_retryable(exc: BaseException) -> bool:
+    # Los 4xx son errores de negocio: reintentarlos no cambia el resultado
+    if isinstance(exc, HTTPException):
+        return exc.status_code >= 500 or exc.status_code in (408, 429)
+    return True
+
+
+class OutboxWorker:
+    def __init__(self, concurrency: int, poll_interval: float, lease_seconds: float):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.processed = 0
+        self.retried = 0
+        self.failed = 0
+        self._wake_event = asyncio.Event()
+        self._tasks = []
+        self._stopping = False
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._run(slot)) for slot in range(self.concurrency)]
+        logger.info("Worker del outbox iniciado con %s tareas.", self.concurrency)
+
+    async def stop(self):
+        self._stopping = True
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def wake(self):
+        self._wake_event.set()
+
+    async def _run(self, slot: int):
+        while not self._stopping:
+            # Se limpia antes de buscar: un enqueue posterior vuelve a despertar la espera
+            self._wake_event.clear()
+            try:
+                job = await asyncio.to_thread(_claim_job, self.lease_seconds)
+            except Exception:
+                logger.exception("Error al leer el outbox.")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wake_event.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._execute(job)
+
+    async def _execute(self, job: dict):
+        handler = _handlers.get(job["kind"])
+        try:
+            if handler is None:
+                raise ValueError(f"No hay handler registrado para trabajos de tipo '{job['kind']}'")
+            await handler(job["payload"])
+        except asyncio.CancelledError:
+            # Se detiene la app: el trabajo queda reservado y se retoma al vencer el lease
+            raise
+        except Exception as e:
+            error = e.detail if isinstance(e, HTTPException) else str(e)
+            if handler is not None and is_retryable(e) and job["attempts"] < job["max_attempts"]:
+                delay = backoff_delay(job["attempts"])
+                self.retried += 1
+                logger.warning(
+                    "Trabajo %s #%s falló (intento %s/%s), se reintenta en %.1fs: %s",
+                    job["kind"], job["id"], job["attempts"], job["max_attempts"], delay, error
+                )
+                await asyncio.to_thread(_finish_job, job["id"], PENDING, error, time.time() + delay)
+            else:
+                self.failed += 1
+                logger.error(
+                    "Trabajo %s #%s falló definitivamente tras %s intentos: %s",
+                    job["kind"], job["id"], job["attempts"], error
+                )
+                await asyncio.to_thread(_finish_job, job["id"], FAILED, error)
+            return
+        self.processed += 1
+        logger.info("Trabajo %s #%s completado.", job["kind"], job["id"])
+        await asyncio.to_thread(_finish_job, job["id"], DONE)
+
+
+_worker: Optional[OutboxWorker] = None
+
+
+def start_outbox_worker() -> OutboxWorker:
+    global _worker
+    if _worker is None:
+        _worker = OutboxWorker(
+            concurrency=settings.OUTBOX_CONCURRENCY,
+            poll_interval=settings.OUTBOX_POLL_INTERVAL_SECONDS,
+            lease_seconds=settings.OUTBOX_LEASE_SECONDS,
+        )
+        _worker.start()
+    return _worker
+
+
+async def stop_outbox_worker():
+    global _worker
+    if _worker is not None:
+        await _worker.stop()
+        _worker = None
+
+
+def _find_active_job(kind: str, field: str, value) -> Optional[int]:
+    conn = get_sqlite_connection()
+    try:
+        row = conn.execute(
+            """
+            SELECT id FROM outbox
+            WHERE kind = ? AND status IN (?, ?) AND json_extract(payload, ?) = ?
+            LIMIT 1
+            """,
+            (kind, PENDING, PROCESSING, f"$.{field}", value)
+        ).fetchone()
+        return row[0] if row else None
+    finally:
+        conn.close()
+
+
+async def find_active_job(kind: str, field: str, value) -> Optional[int]:
+    """
+    Id de un trabajo `kind` pendiente o en ejecución cuyo payload tenga `field` = `value`,
+    o None si no hay ninguno.
+    """
+    return await asyncio.to_thread(_find_active_job, kind, field, value)
+
+
+def _count_by_status() -> dict:
+    conn = get_sqlite_connection()
+    try:
+        counts = dict(conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+        oldest = conn.execute("SELECT MIN(created_at) FROM outbox WHERE status = ?", (PENDING,)).fetchone()[0]
+        return {"counts": counts, "oldest_pending_seconds": round(time.time() - oldest, 1) if oldest else 0}
+    finally:
+        conn.close()
+
+
+async def outbox_stats() -> dict:
+    stats = await asyncio.to_thread(_count_by_status)
+    if _worker is not None:
+        stats.update({"processed": _worker.processed, "retried": _worker.retried, "failed": _worker.failed})
+    return stats
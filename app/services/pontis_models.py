@@ -0,0 +1,127 @@
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Optional, Tuple
+
+from app.utils.plans import PLAN_CATALOG, PONTIS_DATE_FORMAT
+
+# Modelo compacto del customer de Pontis: la respuesta de getCustomer se interpreta una
+# sola vez (fechas incluidas) y lo que circula por la app, y lo que se guarda en caché,
+# es este objeto inmutable en lugar del JSON crudo.
+
+
+def parse_pontis_date(value) -> Optional[date]:
+    """
+    'dd/MM/yyyy' -> date. Vacío significa "sin vencimiento" y se representa con date.max;
+    None si la fecha no se puede interpretar.
+    """
+    if not value:
+        return date.max
+    try:
+        return datetime.strptime(value, PONTIS_DATE_FORMAT).date()
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True, slots=True)
+class PontisService:
+    menu_id: str
+    effective_dt: str
+    expire_dt: str
+    effective: Optional[date]
+    expire: Optional[date]
+
+    @classmethod
+    def from_dict(cls, srv: dict) -> Optional["PontisService"]:
+        menu_id = (srv.get("serviceMenu") or {}).get("serviceMenuId")
+        if menu_id is None:
+            return None
+        effective_dt = srv.get("effectiveDt") or ""
+        expire_dt = srv.get("expireDt") or ""
+        return cls(
+            menu_id=str(menu_id),
+            effective_dt=effective_dt,
+            expire_dt=expire_dt,
+            effective=parse_pontis_date(effective_dt),
+            expire=parse_pontis_date(expire_dt),
+        )
+
+    def is_active(self, today: date) -> bool:
+        # Una fecha de vencimiento malformada se considera activa por seguridad
+        return self.expire is None or self.expire >= today
+
+    def to_dict(self) -> dict:
+        return {"effectiveDt": self.effective_dt, "expireDt": self.expire_dt, "serviceMenu": {"serviceMenuId": self.menu_id}}
+
+
+@dataclass(frozen=True, slots=True)
+class PontisCustomer:
+    """
+    `exists=False` representa la respuesta de Pontis con "response": null.
+    `active_until` es el vencimiento más lejano entre los paquetes de los planes
+    (6212, 6217, 6293, 6294 según el catálogo): date.max si alguno no vence, None si no tiene paquetes.
+    `services` es None cuando Pontis no devolvió la lista subscribeService.
+    """
+    customer_id: str
+    exists: bool
+    services: Optional[Tuple[PontisService, ...]] = None
+    auto_prov_stationary: Optional[str] = None
+    auto_prov_mobile: Optional[str] = None
+    active_until: Optional[date] = None
+
+    @classmethod
+    def missing(cls, customer_id: str) -> "PontisCustomer":
+        return cls(customer_id=customer_id, exists=False)
+
+    @classmethod
+    def from_response(cls, customer_id: str, data: dict) -> "PontisCustomer":
+        """
+        Interpreta el JSON completo de GET /customers/getCustomer/<id>.
+        """
+        response = data.get("response") if isinstance(data, dict) else None
+        if not isinstance(response, dict):
+            return cls.missing(customer_id)
+
+        customer = response.get("customer") or {}
+        raw_services = response.get("subscribeService")
+        services = None
+        active_until = None
+        if raw_services is not None:
+            services = tuple(
+                service for service in (PontisService.from_dict(srv) for srv in raw_services or []) if service
+            )
+            package_menu_ids = PLAN_CATALOG.package_menu_ids
+            for service in services:
+                if service.menu_id in package_menu_ids:
+                    expire = date.max if service.expire is None else service.expire
+                    active_until = expire if active_until is None else max(active_until, expire)
+
+        auto_prov_stationary = customer.get("autoProvCountStationary")
+        auto_prov_mobile = customer.get("autoProvisionCountMobile")
+        return cls(
+            customer_id=str(customer.get("customerId") or customer_id),
+            exists=True,
+            services=services,
+            auto_prov_stationary=None if auto_prov_stationary is None else str(auto_prov_stationary),
+            auto_prov_mobile=None if auto_prov_mobile is None else str(auto_prov_mobile),
+            active_until=active_until,
+        )
+
+    def is_plan_active(self, today: date = None) -> bool:
+        if self.active_until is None:
+            return False
+        return self.active_until >= (today or datetime.now(timezone.utc).date())
+
+    def customer_fields(self) -> dict:
+        fields = {}
+        if self.auto_prov_stationary is not None:
+            fields["autoProvCountStationary"] = self.auto_prov_stationary
+        if self.auto_prov_mobile is not None:
+            fields["autoProvisionCountMobile"] = self.auto_prov_mobile
+        return fields
+
+    # Inmutable: copiarlo (caché, single-flight) no hace falta
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
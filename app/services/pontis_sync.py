@@ -0,0 +1,164 @@
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+from app.core.logging_config import logger
+from app.services.api_service import build_update_customer_data, delete_packages_in_pontis, update_customer_in_pontis
+from app.services.pontis_models import PontisCustomer, PontisService, parse_pontis_date
+from app.utils.plans import PLAN_CATALOG, PONTIS_DATE_FORMAT
+
+# Sincronización mínima de servicios en Pontis: en lugar de borrar todos los paquetes
+# (deleteServices) y volver a suscribir la lista completa, se compara el
+# `subscribeService` actual del customer con la lista objetivo del plan y se envía
+# en un único PUT solo lo que cambia.
+
+# Servicios base del customer (6213, 6214, 6215): no tienen expireDt y nunca se quitan
+BASE_MENU_IDS = PLAN_CATALOG.base_menu_ids
+
+
+@dataclass
+class ServiceDelta:
+    add: List[dict] = field(default_factory=list)
+    extend: List[dict] = field(default_factory=list)
+    remove: List[dict] = field(default_factory=list)
+    customer: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def services(self) -> List[dict]:
+        return self.add + self.extend + self.remove
+
+    def is_empty(self) -> bool:
+        return not self.services and not self.customer
+
+    def summary(self) -> dict:
+        def menu_ids(services):
+            return [_menu_id(srv) for srv in services]
+        return {
+            "add": menu_ids(self.add),
+            "extend": menu_ids(self.extend),
+            "remove": menu_ids(self.remove),
+            "customer": self.customer,
+        }
+
+
+def _menu_id(srv: dict) -> Optional[str]:
+    menu_id = (srv.get("serviceMenu") or {}).get("serviceMenuId")
+    return str(menu_id) if menu_id is not None else None
+
+
+def _service(menu_id: str, effective_dt: str, expire_dt: str) -> dict:
+    return {"effectiveDt": effective_dt, "expireDt": expire_dt, "serviceMenu": {"serviceMenuId": menu_id}}
+
+
+def merge_services(services: List[dict]) -> Dict[str, dict]:
+    """
+    Agrupa por serviceMenuId. Si un menú se repite (dos planes con el mismo paquete),
+    queda la entrada que vence más tarde.
+    """
+    merged = {}
+    for srv in services:
+        menu_id = _menu_id(srv)
+        if menu_id is None:
+            continue
+        previous = merged.get(menu_id)
+        if previous is None or (parse_pontis_date(srv.get("expireDt")) or date.min) > (parse_pontis_date(previous.get("expireDt")) or date.min):
+            merged[menu_id] = srv
+    return merged
+
+
+async def build_target_services(id_plan: int, id_plan2: int = 0) -> dict:
+    """
+    Payload objetivo del plan (el mismo de `build_update_customer_data`) más los
+    servicios base, que deben existir siempre con expireDt vacío.
+    """
+    target = await build_update_customer_data(id_plan, id_plan2)
+    effective_dt = datetime.now().strftime(PONTIS_DATE_FORMAT)
+    for srv in target["subscribeService"]:
+        effective_dt = srv.get("effectiveDt") or effective_dt
+        break
+    target["subscribeService"] = PLAN_CATALOG.build_base_services(effective_dt) + target["subscribeService"]
+    return target
+
+
+def diff_services(current: Sequence[PontisService], target: List[dict], today: date = None) -> ServiceDelta:
+    """
+    Compara los servicios actuales del customer con el subscribeService objetivo y clasifica por menú:
+      - add: está en el objetivo y no en Pontis.
+      - extend: está en ambos, pero el objetivo vence más tarde (o el actual ya venció).
+      - remove: está activo en Pontis y no en el objetivo; se cierra con expireDt = ayer.
+    Los menús que ya cubren el objetivo y los servicios base existentes no se tocan.
+    """
+    today = today or datetime.now().date()
+    yesterday = today - timedelta(days=1)
+    current_by_menu = {}
+    for service in current:
+        previous = current_by_menu.get(service.menu_id)
+        if previous is None or (service.expire or date.min) > (previous.expire or date.min):
+            current_by_menu[service.menu_id] = service
+    target_by_menu = merge_services(target)
+    delta = ServiceDelta()
+
+    for menu_id, wanted in target_by_menu.items():
+        existing = current_by_menu.get(menu_id)
+        if existing is None:
+            delta.add.append(wanted)
+            continue
+        if menu_id in BASE_MENU_IDS:
+            continue
+        wanted_expire = parse_pontis_date(wanted.get("expireDt"))
+        if existing.expire is None or (wanted_expire is not None and wanted_expire > existing.expire):
+            # Si el paquete sigue vigente se conserva su effectiveDt; si venció, empieza de nuevo
+            effective_dt = wanted["effectiveDt"]
+            if existing.expire is not None and existing.expire >= today and existing.effective_dt:
+                effective_dt = existing.effective_dt
+            delta.extend.append(_service(menu_id, effective_dt, wanted.get("expireDt", "")))
+
+    for menu_id, existing in current_by_menu.items():
+        if menu_id in target_by_menu or menu_id in BASE_MENU_IDS:
+            continue
+        if not existing.is_active(today):
+            continue  # ya vencido: no hace falta quitarlo
+        effective = existing.effective
+        end = max(yesterday, effective) if effective not in (None, date.max) else yesterday
+        delta.remove.append(_service(menu_id, existing.effective_dt or end.strftime(PONTIS_DATE_FORMAT), end.strftime(PONTIS_DATE_FORMAT)))
+
+    return delta
+
+
+def diff_customer_fields(current_customer: dict, target_customer: dict) -> Dict[str, str]:
+    return {
+        key: value for key, value in target_customer.items()
+        if str(current_customer.get(key, "")) != str(value)
+    }
+
+
+async def sync_customer_services(pontis_customer_id: str, pontis_customer: PontisCustomer, id_plan: int, id_plan2: int = 0) -> Optional[dict]:
+    """
+    Lleva los servicios del customer en Pontis al plan indicado con un solo PUT.
+
+    Retorna la respuesta de Pontis, o None si el customer ya estaba al día y no se
+    envió nada. Si la respuesta de Pontis no trajo `subscribeService` no se puede
+    calcular la diferencia y se usa el flujo anterior (deleteServices + lista completa).
+    """
+    target = await build_target_services(id_plan, id_plan2)
+
+    if pontis_customer.services is None:
+        logger.warning(
+            "Pontis no devolvió subscribeService para %s; se borran y se vuelven a suscribir los paquetes.",
+            pontis_customer_id
+        )
+        await delete_packages_in_pontis(pontis_customer_id)
+        return await update_customer_in_pontis(target, pontis_customer_id)
+
+    delta = diff_services(pontis_customer.services, target["subscribeService"])
+    delta.customer = diff_customer_fields(pontis_customer.customer_fields(), target["customer"])
+    logger.info("Cambios de servicios en Pontis para %s: %s", pontis_customer_id, delta.summary())
+
+    if delta.is_empty():
+        logger.info("Los servicios de %s en Pontis ya corresponden al plan; no se envía ninguna actualización.", pontis_customer_id)
+        return None
+
+    payload = {"subscribeService": delta.services}
+    if delta.customer:
+        payload["customer"] = delta.customer
+    return await update_customer_in_pontis(payload, pontis_customer_id)
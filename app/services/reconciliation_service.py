@@ -0,0 +1,265 @@
+import asyncio
+import csv
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, fields
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
+
+from app.config import settings
+from app.core.database import get_odoo_connection, get_sqlite_connection
+from app.core.locks import mark_now, seconds_since_mark, try_lock
+from app.core.logging_config import logger
+from app.core.resilience import pontis_reconcile_guard
+from app.services.api_service import PontisClient, create_pontis_client
+from app.services.invoice_query import PLAN_VR_ESTADOS, latest_paid_plans_by_partner
+from app.services.odoo_service import execute_odoo_method_async
+from app.utils.plans import get_plan
+
+# Conciliación masiva entre los usuarios de SQLite, las facturas de plan pagadas en
+# Odoo y el estado de los customers en Pontis. Detecta quién pagó y no tiene el
+# servicio activo, y quién tiene el servicio activo sin una factura que lo respalde.
+
+OK = "ok"
+PAID_NOT_PROVISIONED = "paid_not_provisioned"
+PROVISIONED_WITHOUT_INVOICE = "provisioned_without_invoice"
+ERROR = "error"
+
+LOCK_FILE = "reconcile.lock"
+LAST_RUN_FILE = "last_run"
+
+
+@dataclass
+class ReconciliationRow:
+    user_id: int
+    email: str
+    partner_id: Optional[int] = None
+    plan_id: Optional[int] = None
+    invoice_date: Optional[str] = None
+    paid_until: Optional[str] = None
+    pontis_exists: Optional[bool] = None
+    pontis_active_until: Optional[str] = None
+    status: str = OK
+    detail: str = ""
+
+
+def _fetch_users_page(after_user_id: int, limit: int) -> list:
+    # Paginación por clave: no mantiene un cursor abierto entre lotes
+    conn = get_sqlite_connection()
+    try:
+        return conn.execute(
+            "SELECT user_id, email FROM users WHERE user_id > ? ORDER BY user_id LIMIT ?",
+            (after_user_id, limit)
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+async def iter_user_batches(batch_size: int, limit: int = None):
+    """
+    Recorre la tabla users por lotes de `batch_size` sin cargarla completa en memoria.
+    """
+    last_user_id = 0
+    seen = 0
+    while limit is None or seen < limit:
+        page_size = batch_size if limit is None else min(batch_size, limit - seen)
+        rows = await asyncio.to_thread(_fetch_users_page, last_user_id, page_size)
+        if not rows:
+            return
+        seen += len(rows)
+        last_user_id = rows[-1][0]
+        yield rows
+
+
+def paid_until(plan_id: int, invoice_date: str) -> Optional[date]:
+    """
+    Último día cubierto por una factura de plan según el catálogo: fecha de factura más
+    la vigencia del plan, o la fecha fija de fin si es un evento.
+    """
+    plan = get_plan(plan_id)
+    if plan is None:
+        return None
+    if plan.validity_days is None:
+        return datetime.strptime(plan.expire_dt, "%d/%m/%Y").date()
+    return datetime.strptime(str(invoice_date)[:10], "%Y-%m-%d").date() + timedelta(days=plan.validity_days)
+
+
+def classify(paid_active: bool, pontis_active: bool) -> str:
+    if paid_active and not pontis_active:
+        return PAID_NOT_PROVISIONED
+    if pontis_active and not paid_active:
+        return PROVISIONED_WITHOUT_INVOICE
+    return OK
+
+
+async def _reconcile_batch(
+    conn, pontis: PontisClient, users: list, semaphore: asyncio.Semaphore, today: date
+) -> List[ReconciliationRow]:
+    user_ids = [user_id for user_id, _ in users]
+    # Un search_read para todos los usuarios del lote: contacto de cada usuario
+    odoo_users = await execute_odoo_method_async(
+        conn, 'res.users', 'search_read',
+        [[('id', 'in', user_ids)]],
+        {'fields': ['partner_id'], 'context': {'active_test': False}}
+    )
+    partners = {record['id']: record['partner_id'][0] for record in odoo_users if record.get('partner_id')}
+    # Facturas de plan pagadas de todo el lote, con el mismo criterio que /users/get
+    invoices = await latest_paid_plans_by_partner(conn, list(set(partners.values())), vr_estados=PLAN_VR_ESTADOS)
+
+    async def reconcile_user(user_id: int, email: str) -> ReconciliationRow:
+        partner_id = partners.get(user_id)
+        row = ReconciliationRow(user_id=user_id, email=email or "", partner_id=partner_id)
+        if partner_id is None:
+            row.status = ERROR
+            row.detail = "Usuario sin contacto en Odoo"
+            return row
+
+        invoice = invoices.get(partner_id)
+        paid_active = False
+        if invoice:
+            row.plan_id = invoice["plan_id"]
+            row.invoice_date = str(invoice["invoice_date"])
+            until = paid_until(invoice["plan_id"], invoice["invoice_date"])
+            if until is not None:
+                row.paid_until = until.isoformat()
+                paid_active = until >= today
+
+        try:
+            async with semaphore:
+                customer = await pontis.get_customer(f"MAP0{user_id}", use_cache=False)
+        except Exception as e:
+            row.status = ERROR
+            row.detail = f"Error consultando Pontis: {getattr(e, 'detail', e)}"
+            return row
+
+        row.pontis_exists = customer.exists
+        if customer.active_until is not None:
+            row.pontis_active_until = "sin vencimiento" if customer.active_until == date.max else customer.active_until.isoformat()
+        row.status = classify(paid_active, customer.is_plan_active(today))
+        return row
+
+    return list(await asyncio.gather(*(reconcile_user(user_id, email) for user_id, email in users)))
+
+
+def _write_report(report_dir: str, started: datetime, rows: List[ReconciliationRow], summary: dict) -> dict:
+    os.makedirs(report_dir, exist_ok=True)
+    stamp = started.strftime("%Y%m%d-%H%M%S")
+    csv_path = os.path.join(report_dir, f"reconcile-{stamp}.csv")
+    json_path = os.path.join(report_dir, f"reconcile-{stamp}.json")
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=[field.name for field in fields(ReconciliationRow)])
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(asdict(row))
+    summary = dict(summary, report_csv=csv_path)
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    summary["report_json"] = json_path
+    return summary
+
+
+async def run_reconciliation(
+    batch_size: int = None,
+    concurrency: int = None,
+    limit: int = None,
+    report_dir: str = None,
+) -> dict:
+    """
+    Recorre todos los usuarios y escribe en `report_dir` un CSV con las diferencias
+    (solo filas con estado distinto de "ok") y un JSON con el resumen.
+
+    Las consultas a Pontis van por un cliente propio, con `pontis_reconcile_guard`:
+    no comparten conexiones, cupos del bulkhead ni circuito con las peticiones en vivo.
+    """
+    batch_size = batch_size or settings.RECONCILE_BATCH_SIZE
+    # Más concurrencia que el bulkhead propio solo terminaría en rechazos (503)
+    concurrency = min(concurrency or settings.RECONCILE_PONTIS_CONCURRENCY, pontis_reconcile_guard.max_concurrency)
+    report_dir = report_dir or settings.RECONCILE_REPORT_DIR
+    started = datetime.now(timezone.utc)
+    start = time.monotonic()
+    today = started.date()
+
+    conn = get_odoo_connection()
+    pontis = create_pontis_client(
+        max_connections=concurrency,
+        max_keepalive_connections=concurrency,
+        guard=pontis_reconcile_guard,
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+    totals = {OK: 0, PAID_NOT_PROVISIONED: 0, PROVISIONED_WITHOUT_INVOICE: 0, ERROR: 0}
+    differences = []
+    users = 0
+    try:
+        async for batch in iter_user_batches(batch_size, limit):
+            for row in await _reconcile_batch(conn, pontis, batch, semaphore, today):
+                totals[row.status] += 1
+                if row.status != OK:
+                    differences.append(row)
+            users += len(batch)
+            logger.info("Conciliación: %s usuarios procesados (%s diferencias).", users, len(differences))
+    finally:
+        await pontis.close()
+
+    summary = {
+        "started_at": started.isoformat(),
+        "duration_seconds": round(time.monotonic() - start, 1),
+        "users": users,
+        "totals": totals,
+    }
+    summary = await asyncio.to_thread(_write_report, report_dir, started, differences, summary)
+    logger.info("Conciliación terminada: %s", summary)
+    return summary
+
+
+# --- Ejecución programada ------------------------------------------------------
+
+async def run_scheduled_reconciliation(interval: float) -> Optional[dict]:
+    """
+    Corre la conciliación si ningún otro proceso la está ejecutando y si la última
+    corrida (de cualquier worker) fue hace al menos `interval` segundos.
+    """
+    report_dir = settings.RECONCILE_REPORT_DIR
+    lock = try_lock(os.path.join(report_dir, LOCK_FILE))
+    if lock is None:
+        return None
+    try:
+        elapsed = seconds_since_mark(os.path.join(report_dir, LAST_RUN_FILE))
+        if elapsed is not None and elapsed < interval:
+            logger.debug("Conciliación omitida: la última corrida fue hace %.0fs.", elapsed)
+            return None
+        mark_now(os.path.join(report_dir, LAST_RUN_FILE))
+        return await run_reconciliation()
+    finally:
+        lock.release()
+
+
+async def _scheduler_loop(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_scheduled_reconciliation(interval)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Error en la conciliación programada.")
+
+
+_scheduler_task = None
+
+
+def start_reconciliation_scheduler():
+    global _scheduler_task
+    interval = settings.RECONCILE_INTERVAL_SECONDS
+    if interval <= 0 or _scheduler_task is not None:
+        return
+    _scheduler_task = asyncio.create_task(_scheduler_loop(interval))
+    logger.info("Conciliación programada cada %ss.", interval)
+
+
+async def stop_reconciliation_scheduler():
+    global _scheduler_task
+    if _scheduler_task is not None:
+        _scheduler_task.cancel()
+        await asyncio.gather(_scheduler_task, return_exceptions=True)
+        _scheduler_task = None
@@ -0,0 +1,164 @@
+import copy
+from typing import Dict, List, Optional, TypedDict
+
+from app.config import settings
+from app.core.cache import TTLCache
+from app.core.database import get_odoo_connection
+from app.core.logging_config import logger
+from app.services.odoo_service import execute_odoo_method_async
+from app.utils.plans import PRODUCTS
+
+# Datos de Odoo que casi nunca cambian (grupos, países, productos, diarios...).
+# Cada entidad tiene su propia caché con TTL y tamaño máximo.
+
+
+class ProductRef(TypedDict):
+    id: int
+    name: str
+    list_price: float
+
+
+class CountryRef(TypedDict):
+    id: int
+    name: str
+
+
+PRODUCT_FIELDS = ['id', 'name', 'list_price']
+
+_group_ids = TTLCache("group_ids", settings.REF_CACHE_TTL_SECONDS, maxsize=64)
+_countries = TTLCache("countries", settings.REF_CACHE_COUNTRIES_TTL_SECONDS, maxsize=settings.REF_CACHE_MAXSIZE)
+_products = TTLCache("products", settings.REF_CACHE_PRODUCTS_TTL_SECONDS, maxsize=settings.REF_CACHE_MAXSIZE)
+_catalogs = TTLCache("catalogs", settings.REF_CACHE_TTL_SECONDS, maxsize=16)
+
+_CACHES = (_group_ids, _countries, _products, _catalogs)
+
+
+async def get_group_id(conn, xml_name: str, module: str = 'base') -> Optional[int]:
+    """
+    Retorna el res_id de un grupo por su xml_id (p. ej. base.group_portal), o None si no existe.
+    """
+    key = (module, xml_name)
+    group_id = _group_ids.get(key)
+    if group_id is not None:
+        return group_id
+    records = await execute_odoo_method_async(
+        conn, 'ir.model.data', 'search_read',
+        [[('model', '=', 'res.groups'), ('module', '=', module), ('name', '=', xml_name)]],
+        {'fields': ['res_id'], 'limit': 1}
+    )
+    if not records:
+        return None
+    group_id = records[0]['res_id']
+    _group_ids.set(key, group_id)
+    return group_id
+
+
+async def find_countries(conn, name: str) -> List[CountryRef]:
+    """
+    Búsqueda de países por nombre (ilike). Solo se cachean resultados no vacíos.
+    """
+    key = name.strip().lower()
+    countries = _countries.get(key)
+    if countries is None:
+        countries = await execute_odoo_method_async(
+            conn, 'res.country', 'search_read',
+            [[('name', 'ilike', name)]],
+            {'fields': ['id', 'name']}
+        )
+        if countries:
+            _countries.set(key, countries)
+    return copy.deepcopy(countries)
+
+
+async def get_products(conn, product_ids: List[int]) -> Dict[int, ProductRef]:
+    """
+    Retorna {id: producto} con los campos id/name/list_price. Los ids que no estén
+    en caché se leen de Odoo en un único read; los inexistentes no aparecen en el dict.
+    """
+    result = {}
+    missing = []
+    for product_id in dict.fromkeys(product_ids):
+        product = _products.get(product_id)
+        if product is None:
+            missing.append(product_id)
+        else:
+            result[product_id] = dict(product)
+    if missing:
+        records = await execute_odoo_method_async(
+            conn, 'product.product', 'read', [missing], {'fields': PRODUCT_FIELDS}
+        )
+        for record in records:
+            product = {field: record[field] for field in PRODUCT_FIELDS}
+            _products.set(product['id'], product)
+            result[product['id']] = dict(product)
+    return result
+
+
+async def get_product(conn, product_id: int) -> Optional[ProductRef]:
+    return (await get_products(conn, [product_id])).get(product_id)
+
+
+async def _get_catalog(conn, key: str, model: str, fields: list) -> list:
+    records = _catalogs.get(key)
+    if records is None:
+        records = await execute_odoo_method_async(conn, model, 'search_read', [], {'fields': fields})
+        if records:
+            _catalogs.set(key, records)
+    return copy.deepcopy(records)
+
+
+async def get_payment_methods(conn) -> list:
+    return await _get_catalog(conn, 'payment_methods', 'account.payment.method', ['id', 'name'])
+
+
+async def get_journals(conn) -> list:
+    return await _get_catalog(conn, 'journals', 'account.journal', ['id', 'name', 'type'])
+
+
+async def get_groups(conn) -> list:
+    """
+    Lista de res.groups (id, name) con su xml_id.
+    """
+    groups = _catalogs.get('groups')
+    if groups is None:
+        groups = await execute_odoo_method_async(
+            conn, 'res.groups', 'search_read', [[], ['id', 'name']]
+        )
+        group_ids = [group['id'] for group in groups]
+        xml_ids = await execute_odoo_method_async(
+            conn, 'ir.model.data', 'search_read',
+            [[('model', '=', 'res.groups'), ('res_id', 'in', group_ids)]],
+            {'fields': ['res_id', 'name']}
+        )
+        xml_id_map = {item['res_id']: item['name'] for item in xml_ids}
+        for group in groups:
+            group['xml_id'] = xml_id_map.get(group['id'], None)
+        _catalogs.set('groups', groups)
+    return copy.deepcopy(groups)
+
+
+async def warm_reference_data():
+    """
+    Precarga la caché al iniciar el worker. Si Odoo no responde, las entradas
+    se cargan en la primera petición que las necesite.
+    """
+    try:
+        conn = get_odoo_connection()
+        await get_group_id(conn, 'group_portal')
+        await get_group_id(conn, 'group_user')
+        await get_products(conn, list(PRODUCTS.values()))
+        await get_payment_methods(conn)
+        await get_journals(conn)
+        await get_groups(conn)
+        logger.info("Caché de datos de referencia de Odoo precargada.")
+    except Exception as e:
+        logger.warning("No se pudo precargar la caché de datos de referencia: %s", str(e))
+
+
+def invalidate_reference_data():
+    for cache in _CACHES:
+        cache.invalidate()
+
+
+def reference_cache_stats() -> list:
+    return [cache.stats() for cache in _CACHES]
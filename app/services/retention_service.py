@@ -0,0 +1,200 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+
+from app.config import settings
+from app.core.database import get_sqlite_connection
+from app.core.locks import mark_now, seconds_since_mark, try_lock
+from app.core.logging_config import logger
+
+# Retención de storage/verification.db: borra por lotes pequeños los tokens que ya no
+# sirven y los códigos de verificación reemplazados por uno más nuevo, y devuelve al
+# sistema las páginas liberadas con incremental_vacuum. Cada lote es una transacción
+# corta seguida de una pausa, para no retener el lock de escritura frente al login,
+# la verificación o el outbox.
+
+LOCK_FILE = "retention.lock"
+LAST_RUN_FILE = "retention.last_run"
+
+# Tokens vencidos (expires_at se guarda en ISO local, comparable como texto) o ya usados.
+# Los revocados se conservan hasta vencer: mientras el JWT sea válido la revocación
+# tiene que seguir registrada.
+_EXPIRED_TOKENS = """
+    DELETE FROM tokens WHERE rowid IN (
+        SELECT rowid FROM tokens
+        WHERE (expires_at IS NOT NULL AND expires_at < ?) OR used = 1
+        LIMIT ?
+    )
+"""
+
+# Códigos con otro más reciente para el mismo email: solo se consulta el último, por
+# (created_at, rowid) como en `get_latest_verification_code`. Se usa rowid porque la
+# tabla puede haberse creado fuera de las migraciones, sin la columna id.
+_SUPERSEDED_CODES = """
+    DELETE FROM verification WHERE rowid IN (
+        SELECT v.rowid FROM verification v
+        WHERE EXISTS (
+            SELECT 1 FROM verification n
+            WHERE n.email = v.email
+              AND (n.created_at > v.created_at OR (n.created_at = v.created_at AND n.rowid > v.rowid))
+        )
+        LIMIT ?
+    )
+"""
+
+
+def _storage_dir() -> str:
+    return os.path.dirname(settings.SQLITE_PATH) or "."
+
+
+def _delete_batch(query: str, params: tuple) -> int:
+    conn = get_sqlite_connection()
+    try:
+        with conn:
+            return conn.execute(query, params).rowcount
+    finally:
+        conn.close()
+
+
+async def _delete_in_batches(name: str, query: str, params: tuple, batch_size: int, pause: float) -> int:
+    total = 0
+    while True:
+        deleted = await asyncio.to_thread(_delete_batch, query, params + (batch_size,))
+        total += deleted
+        if deleted < batch_size:
+            break
+        await asyncio.sleep(pause)
+    logger.info("Retención: %s filas borradas de %s.", total, name)
+    return total
+
+
+def _free_pages() -> tuple:
+    conn = get_sqlite_connection()
+    try:
+        return (
+            conn.execute("PRAGMA freelist_count").fetchone()[0],
+            conn.execute("PRAGMA page_size").fetchone()[0],
+        )
+    finally:
+        conn.close()
+
+
+def _incremental_vacuum(pages: int) -> bool:
+    conn = get_sqlite_connection()
+    try:
+        # 2 = INCREMENTAL; con NONE (0) o FULL (1) el pragma no hace nada
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            return False
+        conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+        return True
+    finally:
+        conn.close()
+
+
+async def _vacuum_in_steps(pages_per_step: int, pause: float) -> dict:
+    free_before, page_size = await asyncio.to_thread(_free_pages)
+    free = free_before
+    enabled = True
+    while free > 0:
+        enabled = await asyncio.to_thread(_incremental_vacuum, pages_per_step)
+        if not enabled:
+            logger.warning(
+                "Retención: auto_vacuum no es INCREMENTAL en %s; las páginas libres se reutilizan "
+                "pero el archivo no se reduce. Ver `python -m app.commands.retention --enable-incremental-vacuum`.",
+                settings.SQLITE_PATH,
+            )
+            break
+        remaining, _ = await asyncio.to_thread(_free_pages)
+        if remaining >= free:
+            break
+        free = remaining
+        await asyncio.sleep(pause)
+    return {
+        "incremental_vacuum": enabled,
+        "pages_released": free_before - free,
+        "bytes_released": (free_before - free) * page_size,
+        "free_pages": free,
+    }
+
+
+async def run_retention(
+    batch_size: int = None,
+    token_grace_days: float = None,
+    vacuum_pages: int = None,
+    pause: float = None,
+) -> dict:
+    """
+    Borra tokens vencidos o usados y códigos de verificación reemplazados, compacta la
+    base y retorna el resumen con las filas y bytes recuperados.
+    """
+    batch_size = batch_size or settings.RETENTION_BATCH_SIZE
+    token_grace_days = settings.RETENTION_TOKEN_GRACE_DAYS if token_grace_days is None else token_grace_days
+    vacuum_pages = settings.RETENTION_VACUUM_PAGES if vacuum_pages is None else vacuum_pages
+    pause = settings.RETENTION_BATCH_PAUSE_SECONDS if pause is None else pause
+    start = time.monotonic()
+
+    # Mismo formato que `store_token`: datetime.now(...).isoformat()
+    tokens_cutoff = (datetime.now() - timedelta(days=token_grace_days)).isoformat()
+    tokens_deleted = await _delete_in_batches("tokens", _EXPIRED_TOKENS, (tokens_cutoff,), batch_size, pause)
+    codes_deleted = await _delete_in_batches("verification", _SUPERSEDED_CODES, (), batch_size, pause)
+    summary = {
+        "tokens_deleted": tokens_deleted,
+        "verification_deleted": codes_deleted,
+        **await _vacuum_in_steps(vacuum_pages, pause),
+        "duration_seconds": round(time.monotonic() - start, 2),
+    }
+    logger.info("Retención terminada: %s", summary)
+    return summary
+
+
+# --- Ejecución programada ------------------------------------------------------
+
+async def run_scheduled_retention(interval: float):
+    """
+    Corre la retención si ningún otro proceso la está ejecutando y si la última corrida
+    (de cualquier worker) fue hace al menos `interval` segundos.
+    """
+    lock = try_lock(os.path.join(_storage_dir(), LOCK_FILE))
+    if lock is None:
+        return None
+    try:
+        elapsed = seconds_since_mark(os.path.join(_storage_dir(), LAST_RUN_FILE))
+        if elapsed is not None and elapsed < interval:
+            logger.debug("Retención omitida: la última corrida fue hace %.0fs.", elapsed)
+            return None
+        mark_now(os.path.join(_storage_dir(), LAST_RUN_FILE))
+        return await run_retention()
+    finally:
+        lock.release()
+
+
+async def _scheduler_loop(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_scheduled_retention(interval)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Error en la retención programada.")
+
+
+_scheduler_task = None
+
+
+def start_retention_scheduler():
+    global _scheduler_task
+    interval = settings.RETENTION_INTERVAL_SECONDS
+    if interval <= 0 or _scheduler_task is not None:
+        return
+    _scheduler_task = asyncio.create_task(_scheduler_loop(interval))
+    logger.info("Retención de SQLite programada cada %ss.", interval)
+
+
+async def stop_retention_scheduler():
+    global _scheduler_task
+    if _scheduler_task is not None:
+        _scheduler_task.cancel()
+        await asyncio.gather(_scheduler_task, return_exceptions=True)
+        _scheduler_task = None
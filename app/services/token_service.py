@@ -1,80 +1,76 @@
 # app/services/token_service.py
-import sqlite3
-from app.core.database import get_sqlite_connection
+from app.core.database import get_async_sqlite, sqlite_transaction
+from app.core.revocation import mark_revoked
 
-def store_token(token: str, user_id: int, token_type: str, expires_at: str, client_ip: str = None, user_agent: str = None):
+async def store_token(token: str, user_id: int, token_type: str, expires_at: str, client_ip: str = None, user_agent: str = None):
     """
-    Almacena un token en la tabla 'tokens'.
+    Almacena un token en la tabla 'tokens'. Si el mismo token ya estaba guardado
+    (dos logins en el mismo segundo generan el mismo JWT) no se duplica.
     """
-    conn = get_sqlite_connection()
     try:
-        cursor = conn.cursor()
         query = """
             INSERT INTO tokens (token, user_id, token_type, expires_at, client_ip, user_agent)
             VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (token) DO NOTHING
         """
-        cursor.execute(query, (token, user_id, token_type, expires_at, client_ip, user_agent))
-        conn.commit()
+        async with sqlite_transaction() as conn:
+            await conn.execute(query, (token, user_id, token_type, expires_at, client_ip, user_agent))
     except Exception as e:
         raise Exception(f"Error al almacenar token: {str(e)}")
-    finally:
-        conn.close()
 
-def revoke_token(token: str):
+async def revoke_token(token: str):
     """
-    Marca un token como revocado, actualizando 'revoked_at' al momento actual.
+    Marca un token como revocado, actualizando 'revoked_at' al momento actual, y le
+    asigna el siguiente número de la secuencia de revocación para que los demás workers
+    lo agreguen a su índice en memoria.
     """
-    conn = get_sqlite_connection()
     try:
-        cursor = conn.cursor()
-        query = """
-            UPDATE tokens
-            SET revoked_at = CURRENT_TIMESTAMP
-            WHERE token = ?
-        """
-        cursor.execute(query, (token,))
-        conn.commit()
+        async with sqlite_transaction() as conn:
+            async with conn.execute(
+                "UPDATE token_revocation_seq SET value = value + 1 WHERE id = 1 RETURNING value"
+            ) as cursor:
+                seq = (await cursor.fetchone())[0]
+            query = """
+                UPDATE tokens
+                SET revoked_at = CURRENT_TIMESTAMP, revocation_seq = ?
+                WHERE token = ?
+                RETURNING expires_at
+            """
+            async with conn.execute(query, (seq, token)) as cursor:
+                record = await cursor.fetchone()
     except Exception as e:
         raise Exception(f"Error al revocar token: {str(e)}")
-    finally:
-        conn.close()
+    if record is not None:
+        mark_revoked(token, record["expires_at"], seq)
 
-def mark_token_as_used(token: str):
+async def mark_token_as_used(token: str):
     """
     Marca un token como usado (por ejemplo, para tokens de restablecimiento de contraseña).
     """
-    conn = get_sqlite_connection()
     try:
-        cursor = conn.cursor()
         query = """
             UPDATE tokens
             SET used = 1
             WHERE token = ?
         """
-        cursor.execute(query, (token,))
-        conn.commit()
+        async with sqlite_transaction() as conn:
+            await conn.execute(query, (token,))
     except Exception as e:
         raise Exception(f"Error al marcar token como usado: {str(e)}")
-    finally:
-        conn.close()
 
-def get_token_record(token: str) -> dict:
+async def get_token_record(token: str) -> dict:
     """
     Obtiene el registro del token desde la tabla 'tokens'.
     Devuelve un diccionario con los campos del token o None si no se encuentra.
     """
-    conn = get_sqlite_connection()
     try:
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        conn = await get_async_sqlite()
         query = "SELECT * FROM tokens WHERE token = ?"
-        cursor.execute(query, (token,))
-        record = cursor.fetchone()
+        async with conn.execute(query, (token,)) as cursor:
+            record = await cursor.fetchone()
         if record:
             return dict(record)
         else:
             return None
     except Exception as e:
         raise Exception(f"Error al obtener registro del token: {str(e)}")
-    finally:
-        conn.close()
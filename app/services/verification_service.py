@@ -1,45 +1,38 @@
-import sqlite3
 import random
 from app.core.logging_config import logger
 from fastapi import HTTPException
-from app.core.database import get_sqlite_connection
+from app.core.database import get_async_sqlite, sqlite_transaction
 from app.core.email_utils import send_verification_email
 
 def generate_verification_code():
     return f"{random.randint(100000, 999999)}"
 
-def get_latest_verification_code(email: str):
-    with get_sqlite_connection() as conn:
-        conn.row_factory = sqlite3.Row  # Hacer que SQLite devuelva los resultados como diccionarios
-        cursor = conn.cursor()
-        cursor.execute("""
-        SELECT * FROM verification
-        WHERE email = ?
-        ORDER BY created_at DESC
-        LIMIT 1
-        """, (email,))
-        return cursor.fetchone()  # Devuelve None si no hay resultados
+async def get_latest_verification_code(email: str):
+    conn = await get_async_sqlite()  # Las filas se leen como diccionarios (aiosqlite.Row)
+    async with conn.execute("""
+    SELECT * FROM verification
+    WHERE email = ?
+    ORDER BY created_at DESC, rowid DESC
+    LIMIT 1
+    """, (email,)) as cursor:
+        return await cursor.fetchone()  # Devuelve None si no hay resultados
 
-def get_user_info(email: str):
-    with get_sqlite_connection() as conn:
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute("""
-        SELECT * FROM users
-        WHERE email = ?
-        LIMIT 1
-        """, (email,))
-        return cursor.fetchone()
+async def get_user_info(email: str):
+    conn = await get_async_sqlite()
+    async with conn.execute("""
+    SELECT * FROM users
+    WHERE email = ?
+    LIMIT 1
+    """, (email,)) as cursor:
+        return await cursor.fetchone()
 
-def create_verification_code(email: str):
+async def create_verification_code(email: str):
     code = generate_verification_code()
-    with get_sqlite_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
+    async with sqlite_transaction() as conn:
+        await conn.execute("""
         INSERT INTO verification (email, code, status)
         VALUES (?, ?, 0)
         """, (email, code))
-        conn.commit()
 
     # Enviar el código por correo electrónico
     send_verification_email(
@@ -49,9 +42,9 @@ def create_verification_code(email: str):
     )
     return code
 
-def handle_verification_request(email: str):
-    latest_record = get_latest_verification_code(email)
-    user_info = get_user_info(email)
+async def handle_verification_request(email: str):
+    latest_record = await get_latest_verification_code(email)
+    user_info = await get_user_info(email)
 
     if latest_record:
         if latest_record["status"] and not user_info:
@@ -59,27 +52,24 @@ def handle_verification_request(email: str):
         if latest_record["status"] and user_info:
             return {"error": "El correo ya está habilitado."}
         else:  # Si el estado es False, generar un nuevo código
-            create_verification_code(email)
+            await create_verification_code(email)
             return {"detail": "Nuevo código enviado al correo.", "code": 0}
     else:
         # Si no existe ningún registro previo, crear uno nuevo
-        create_verification_code(email)
+        await create_verification_code(email)
         return {"detail": "Código enviado al correo.", "code": 0}
 
-def verify_code_and_email(email: str, code: str):
+async def verify_code_and_email(email: str, code: str):
     logger.info("Iniciando verificación de código para email: %s", email)
-    with get_sqlite_connection() as conn:
-        conn.row_factory = sqlite3.Row  # Usar sqlite3.Row para obtener un diccionario
-        cursor = conn.cursor()
-
+    async with sqlite_transaction() as conn:
         # Verificar si el correo existe en la tabla
-        cursor.execute("""
+        async with conn.execute("""
             SELECT * FROM verification
             WHERE email = ?
-            ORDER BY created_at DESC
+            ORDER BY created_at DESC, rowid DESC
             LIMIT 1
-        """, (email,))
-        latest_record = cursor.fetchone()
+        """, (email,)) as cursor:
+            latest_record = await cursor.fetchone()
 
         if not latest_record:
             logger.error("No se encontró registro para el email: %s", email)
@@ -97,12 +87,11 @@ def verify_code_and_email(email: str, code: str):
             return {"error": "El código proporcionado no coincide."}
         
         # Actualizar el estado a true (1)
-        cursor.execute("""
+        await conn.execute("""
             UPDATE verification
             SET status = 1
             WHERE email = ? AND code = ?
         """, (email, code))
-        conn.commit()
         logger.info("Estado actualizado a verificado para email: %s", email)
 
         return {"detail": "El correo ha sido verificado exitosamente."}
\ No newline at end of file
@@ -1,21 +1,176 @@
-# Lista de ids de productos en odoo test
-# PRODUCTS = {
-#     "ID_ESTADAR": 11,
-#     "PREMIUM_PLUS": 13,
-#     "HBO": 14,
-#     "ID_PREMIUM": 22,
-#     "[M+M] FUTBOL": 12, # TODO: BORRAR
-# }
-
-# Lista de ids de productos en odoo prod
-
-PRODUCTS = {
-    "M+_ESTANDAR_PROMO": 6,
-    "M+_ESTANDAR": 7,
-    "M+ _REMIUM": 8,
-    "M+_PREMIUM_+_HBO": 9,
-    "BRASIL_VS_COLOMBIA_20-03-2025": 46,
-    "ECUADOR_VS_VENEZUELA_21-03-2025": 47,
-    "URUGUAY VS. ARGENTINA_21-03-2025": 48,
-    "BOLIVIA_VS_URUGUAY_25-03-2025": 49,
-}
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping, Optional, Tuple
+
+# Catálogo de planes: producto de Odoo -> menús de Pontis, cantidades de
+# aprovisionamiento y vigencia. Se carga y valida una sola vez al importar el módulo
+# desde plan_catalog.json; un catálogo inválido impide que la app arranque.
+
+PLAN_CATALOG_PATH = Path(__file__).with_name("plan_catalog.json")
+PONTIS_DATE_FORMAT = "%d/%m/%Y"
+
+
+@dataclass(frozen=True)
+class ServiceTemplate:
+    """
+    Servicio de Pontis sin fechas; `stamp` arma la entrada de subscribeService.
+    """
+    menu_id: str
+
+    def stamp(self, effective_dt: str, expire_dt: str) -> dict:
+        return {"effectiveDt": effective_dt, "expireDt": expire_dt, "serviceMenu": {"serviceMenuId": self.menu_id}}
+
+
+@dataclass(frozen=True)
+class Plan:
+    product_id: int
+    code: str
+    services: Tuple[ServiceTemplate, ...]
+    auto_prov_stationary: int
+    auto_prov_mobile: int
+    validity_days: Optional[int] = None
+    effective_dt: Optional[str] = None
+    expire_dt: Optional[str] = None
+    is_event: bool = False
+
+    @property
+    def menu_ids(self) -> Tuple[str, ...]:
+        return tuple(service.menu_id for service in self.services)
+
+    def dates(self, now: datetime = None) -> Tuple[str, str]:
+        """
+        (effectiveDt, expireDt) en formato 'dd/MM/yyyy': fechas fijas para eventos,
+        o desde hoy + `validity_days` para los planes mensuales.
+        """
+        if self.validity_days is None:
+            return self.effective_dt, self.expire_dt
+        now = now or datetime.now()
+        return (
+            now.strftime(PONTIS_DATE_FORMAT),
+            (now + timedelta(days=self.validity_days)).strftime(PONTIS_DATE_FORMAT)
+        )
+
+    def build_services(self, effective_dt: str, expire_dt: str) -> list:
+        return [service.stamp(effective_dt, expire_dt) for service in self.services]
+
+
+@dataclass(frozen=True)
+class PlanCatalog:
+    plans: Mapping[int, Plan]
+    base_services: Tuple[ServiceTemplate, ...]
+    menu_index: Mapping[str, Tuple[int, ...]]
+
+    def get(self, product_id: int) -> Optional[Plan]:
+        return self.plans.get(product_id)
+
+    def plans_for_menu(self, menu_id) -> Tuple[int, ...]:
+        """
+        Índice inverso: ids de producto cuyos paquetes incluyen el menú de Pontis.
+        """
+        return self.menu_index.get(str(menu_id), ())
+
+    @property
+    def package_menu_ids(self) -> frozenset:
+        return frozenset(self.menu_index)
+
+    @property
+    def base_menu_ids(self) -> Tuple[str, ...]:
+        return tuple(service.menu_id for service in self.base_services)
+
+    def build_base_services(self, effective_dt: str) -> list:
+        # Los servicios base no vencen: expireDt vacío
+        return [service.stamp(effective_dt, "") for service in self.base_services]
+
+
+def _check_date(value, field: str, product_id) -> str:
+    try:
+        datetime.strptime(value, PONTIS_DATE_FORMAT)
+    except (TypeError, ValueError):
+        raise ValueError(f"Plan {product_id}: '{field}' debe tener formato dd/MM/yyyy, se recibió {value!r}")
+    return value
+
+
+def _parse_plan(raw: dict) -> Plan:
+    product_id = raw.get("product_id")
+    if not isinstance(product_id, int):
+        raise ValueError(f"Plan sin 'product_id' entero: {raw!r}")
+    menus = raw.get("menus")
+    if not menus or not all(isinstance(menu, str) and menu.isdigit() for menu in menus):
+        raise ValueError(f"Plan {product_id}: 'menus' debe ser una lista no vacía de ids de menú")
+    if len(set(menus)) != len(menus):
+        raise ValueError(f"Plan {product_id}: 'menus' tiene ids repetidos")
+    auto_prov = raw.get("auto_prov") or {}
+    stationary, mobile = auto_prov.get("stationary"), auto_prov.get("mobile")
+    if not isinstance(stationary, int) or not isinstance(mobile, int) or stationary < 0 or mobile < 0:
+        raise ValueError(f"Plan {product_id}: 'auto_prov' requiere 'stationary' y 'mobile' enteros >= 0")
+
+    validity = raw.get("validity") or {}
+    if "days" in validity:
+        days = validity["days"]
+        if not isinstance(days, int) or days <= 0:
+            raise ValueError(f"Plan {product_id}: 'validity.days' debe ser un entero positivo")
+        window = {"validity_days": days}
+    else:
+        effective_dt = _check_date(validity.get("effective"), "validity.effective", product_id)
+        expire_dt = _check_date(validity.get("expire"), "validity.expire", product_id)
+        if datetime.strptime(expire_dt, PONTIS_DATE_FORMAT) < datetime.strptime(effective_dt, PONTIS_DATE_FORMAT):
+            raise ValueError(f"Plan {product_id}: 'validity.expire' es anterior a 'validity.effective'")
+        window = {"effective_dt": effective_dt, "expire_dt": expire_dt}
+
+    return Plan(
+        product_id=product_id,
+        code=str(raw.get("code") or product_id),
+        services=tuple(ServiceTemplate(menu) for menu in menus),
+        auto_prov_stationary=stationary,
+        auto_prov_mobile=mobile,
+        is_event=bool(raw.get("is_event", False)),
+        **window,
+    )
+
+
+def load_plan_catalog(path: Path = PLAN_CATALOG_PATH) -> PlanCatalog:
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+
+    base_menus = raw.get("base_menus") or []
+    if not all(isinstance(menu, str) and menu.isdigit() for menu in base_menus):
+        raise ValueError("'base_menus' debe ser una lista de ids de menú")
+
+    plans = {}
+    menu_index = {}
+    for raw_plan in raw.get("plans") or []:
+        plan = _parse_plan(raw_plan)
+        if plan.product_id in plans:
+            raise ValueError(f"Plan {plan.product_id} repetido en el catálogo")
+        overlap = set(plan.menu_ids) & set(base_menus)
+        if overlap:
+            raise ValueError(f"Plan {plan.product_id}: los menús base {sorted(overlap)} no pueden ser paquetes de un plan")
+        plans[plan.product_id] = plan
+        for menu_id in plan.menu_ids:
+            menu_index.setdefault(menu_id, []).append(plan.product_id)
+    if not plans:
+        raise ValueError(f"El catálogo de planes {path} no tiene planes")
+
+    return PlanCatalog(
+        plans=MappingProxyType(plans),
+        base_services=tuple(ServiceTemplate(menu) for menu in base_menus),
+        menu_index=MappingProxyType({menu_id: tuple(ids) for menu_id, ids in menu_index.items()}),
+    )
+
+
+PLAN_CATALOG = load_plan_catalog()
+
+# Lista de ids de productos en odoo (nombre del plan -> product.product id)
+PRODUCTS = {plan.code: plan.product_id for plan in PLAN_CATALOG.plans.values()}
+
+
+def get_plan(product_id: int) -> Optional[Plan]:
+    return PLAN_CATALOG.get(product_id)
+
+
+def is_event_plan(product_id: int) -> bool:
+    plan = PLAN_CATALOG.get(product_id)
+    return plan is not None and plan.is_event
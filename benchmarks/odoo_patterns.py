@@ -0,0 +1,94 @@
+"""
+Mide contra el simulador local de Odoo (`benchmarks.odoo_simulator`) dos patrones
+de acceso de la API, contando las llamadas RPC que recibe el servidor:
+
+  - n+1:     `find_latest_plan_invoice` por contacto frente a un único
+             `latest_paid_plans_by_partner` (read_group) para todos.
+  - pool:    `search_read` con un ServerProxy nuevo por llamada (handshake TCP y
+             autenticación cada vez) frente al pool compartido de la app.
+
+Uso:
+    python -m benchmarks.odoo_patterns --partners 2000 --invoices 8000 --sample 200 --latency-ms 10 --workers 8
+"""
+import argparse
+import asyncio
+import time
+import xmlrpc.client
+
+from app.core.database import OdooConnectionPool
+from app.services.invoice_query import find_latest_plan_invoice, latest_paid_plans_by_partner
+from app.services.odoo_service import init_odoo_executor, shutdown_odoo_executor
+from benchmarks.odoo_simulator import add_config_arguments, run_in_thread, simulator_from_args
+
+
+def _report(name: str, sim, elapsed: float, detail: str = "") -> str:
+    stats = sim.stats()
+    line = f"{name:<28} {elapsed * 1000:9.1f}ms  llamadas={stats['total_calls']:>5}  auth={stats['auth_calls']:>4}"
+    return f"{line}  {detail}" if detail else line
+
+
+async def bench_n_plus_one(conn, sim, partner_ids: list, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(partner_id):
+        async with semaphore:
+            return await find_latest_plan_invoice(conn, partner_id)
+
+    sim.reset_stats()
+    start = time.perf_counter()
+    found = [invoice for invoice in await asyncio.gather(*(one(partner_id) for partner_id in partner_ids)) if invoice]
+    print(_report("n+1 (una por contacto)", sim, time.perf_counter() - start, f"con factura={len(found)}"))
+
+    sim.reset_stats()
+    start = time.perf_counter()
+    grouped = await latest_paid_plans_by_partner(conn, partner_ids)
+    print(_report("read_group (un lote)", sim, time.perf_counter() - start, f"con factura={len(grouped)}"))
+
+
+def bench_pool(url: str, sim, pool: OdooConnectionPool, iterations: int):
+    domain = [[("email", "ilike", "cliente1")]]
+    kwargs = {"fields": ["id", "name", "email"], "limit": 20}
+
+    sim.reset_stats()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        # Patrón anterior al pool: conexión y autenticación nuevas en cada petición
+        common = xmlrpc.client.ServerProxy(f"{url}/xmlrpc/2/common")
+        uid = common.authenticate("x", sim.config.username, sim.config.password, {})
+        models = xmlrpc.client.ServerProxy(f"{url}/xmlrpc/2/object")
+        models.execute_kw("x", uid, sim.config.password, "res.partner", "search_read", domain, kwargs)
+    print(_report("ServerProxy por llamada", sim, time.perf_counter() - start))
+
+    sim.reset_stats()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        pool.execute_kw("res.partner", "search_read", domain, kwargs)
+    print(_report("pool compartido", sim, time.perf_counter() - start))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sample", type=int, default=200, help="Contactos consultados en el caso n+1")
+    parser.add_argument("--concurrency", type=int, default=16, help="Consultas n+1 simultáneas")
+    parser.add_argument("--iterations", type=int, default=100, help="Llamadas en el caso pool")
+    parser.add_argument("--port", type=int, default=8069)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    sim = simulator_from_args(args)
+    print(f"Dataset: {sim.stats()['records']}")
+    with run_in_thread(sim, port=args.port) as url:
+        pool = OdooConnectionPool(url, "x", sim.config.username, sim.config.password)
+        conn = pool.connection()
+        init_odoo_executor()
+        try:
+            partner_ids = sorted(sim.table("res.partner"))[:args.sample]
+            asyncio.run(bench_n_plus_one(conn, sim, partner_ids, args.concurrency))
+            bench_pool(url, sim, pool, args.iterations)
+        finally:
+            shutdown_odoo_executor()
+            pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,885 @@
+"""
+Simulador local de Odoo para medir la API sin un Odoo real. Sirve los mismos
+endpoints que usan el pool XML-RPC y el cliente JSON-RPC:
+
+    POST /xmlrpc/2/common   authenticate, version
+    POST /xmlrpc/2/object   execute_kw
+    POST /jsonrpc           service "common" / "object"
+
+Los modelos viven en memoria (res.users, res.partner, res.country, res.groups,
+ir.model.data, product.product, account.move, account.move.line, account.payment,
+account.payment.register, account.payment.method.line) con search, search_read,
+search_count, read, read_group, create, write y unlink sobre dominios de Odoo
+(operadores '&', '|', '!' y rutas con punto como 'move_id.partner_id'), además de
+action_post y el asistente de registro de pagos.
+
+Perillas: latencia por llamada con jitter y número de "workers" de Odoo (llamadas
+atendidas a la vez; el resto espera). GET /_sim/stats cuenta las llamadas por
+modelo y método para detectar patrones N+1; POST /_sim/reset-stats los pone a cero.
+
+Uso (ODOO_URL=http://127.0.0.1:8069 y ODOO_USERNAME/ODOO_PASSWORD=admin en el .env):
+    python -m benchmarks.odoo_simulator --port 8069 --partners 5000 --invoices 20000 --latency-ms 15 --workers 8
+"""
+import argparse
+import asyncio
+import operator
+import random
+import xmlrpc.client
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, fields
+from datetime import date, timedelta
+from typing import Dict, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+from app.utils.plans import PLAN_CATALOG
+from benchmarks.simulation import latency_seconds, serve_in_thread
+
+ADMIN_UID = 2
+
+M2O = "many2one"
+O2M = "one2many"
+M2M = "many2many"
+
+# Campos relacionales por modelo: campo -> (tipo, comodelo, campo inverso para one2many)
+RELATIONS = {
+    "res.partner": {
+        "country_id": (M2O, "res.country", None),
+        "state_id": (M2O, "res.country.state", None),
+        "parent_id": (M2O, "res.partner", None),
+        "l10n_latam_identification_type_id": (M2O, "l10n_latam.identification.type", None),
+        "user_ids": (O2M, "res.users", "partner_id"),
+    },
+    "res.users": {
+        "partner_id": (M2O, "res.partner", None),
+        "groups_id": (M2M, "res.groups", None),
+    },
+    "account.move": {
+        "partner_id": (M2O, "res.partner", None),
+        "currency_id": (M2O, "res.currency", None),
+        "journal_id": (M2O, "account.journal", None),
+        "invoice_line_ids": (O2M, "account.move.line", "move_id"),
+    },
+    "account.move.line": {
+        "move_id": (M2O, "account.move", None),
+        "product_id": (M2O, "product.product", None),
+    },
+    "account.payment": {
+        "partner_id": (M2O, "res.partner", None),
+        "currency_id": (M2O, "res.currency", None),
+        "journal_id": (M2O, "account.journal", None),
+        "payment_method_line_id": (M2O, "account.payment.method.line", None),
+    },
+    "account.payment.register": {
+        "partner_id": (M2O, "res.partner", None),
+        "currency_id": (M2O, "res.currency", None),
+        "journal_id": (M2O, "account.journal", None),
+    },
+    "account.payment.method.line": {
+        "journal_id": (M2O, "account.journal", None),
+    },
+}
+
+DEFAULTS = {
+    "res.partner": {"active": True},
+    "res.users": {"active": True},
+    "product.product": {"active": True},
+    "account.move": {"state": "draft", "payment_state": "not_paid", "move_type": "entry", "name": "/",
+                     "invoice_date": False, "currency_id": 63},
+    "account.move.line": {"quantity": 1.0},
+}
+
+
+def _commercial_partner(sim, partner_id):
+    partner = sim.data["res.partner"].get(partner_id)
+    while partner is not None and partner.get("parent_id"):
+        partner_id = partner["parent_id"]
+        partner = sim.data["res.partner"].get(partner_id)
+    return partner_id or False
+
+
+def _partner_field(sim, user, field):
+    return sim.data["res.partner"].get(user.get("partner_id"), {}).get(field, False)
+
+
+def _move_amount_total(sim, move):
+    lines = sim.data["account.move.line"]
+    return round(sum(
+        lines[line_id].get("quantity", 1.0) * lines[line_id].get("price_unit", 0.0)
+        for line_id in move.get("invoice_line_ids", [])
+    ), 2)
+
+
+# Campos calculados: se leen y se filtran como cualquier otro campo
+COMPUTED = {
+    "res.partner": {
+        "commercial_partner_id": lambda sim, rec: _commercial_partner(sim, rec["id"]),
+    },
+    "res.users": {
+        "commercial_partner_id": lambda sim, rec: _commercial_partner(sim, rec.get("partner_id")),
+        # Como la herencia por delegación de Odoo: los datos personales viven en el contacto
+        "name": lambda sim, rec: _partner_field(sim, rec, "name"),
+        "email": lambda sim, rec: _partner_field(sim, rec, "email"),
+        "mobile": lambda sim, rec: _partner_field(sim, rec, "mobile"),
+    },
+    "account.move": {
+        "commercial_partner_id": lambda sim, rec: _commercial_partner(sim, rec.get("partner_id")),
+        "amount_total": _move_amount_total,
+        "amount_residual": lambda sim, rec: 0.0 if rec.get("payment_state") in ("paid", "in_payment") else _move_amount_total(sim, rec),
+    },
+    "account.move.line": {
+        "invoice_date": lambda sim, rec: sim.data["account.move"][rec["move_id"]].get("invoice_date", False),
+        "partner_id": lambda sim, rec: _commercial_partner(sim, sim.data["account.move"][rec["move_id"]].get("partner_id")),
+    },
+}
+
+# Modelo de los campos calculados relacionales (para leerlos como [id, nombre])
+COMPUTED_RELATIONS = {
+    ("res.partner", "commercial_partner_id"): "res.partner",
+    ("res.users", "commercial_partner_id"): "res.partner",
+    ("account.move", "commercial_partner_id"): "res.partner",
+    ("account.move.line", "partner_id"): "res.partner",
+}
+
+
+class OdooFault(Exception):
+    def __init__(self, code: int, message: str, name: str = "odoo.exceptions.UserError"):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.name = name
+
+
+def _like(value, pattern, case_insensitive: bool) -> bool:
+    if value in (False, None):
+        return False
+    value, pattern = str(value), str(pattern)
+    if case_insensitive:
+        value, pattern = value.lower(), pattern.lower()
+    return pattern in value
+
+
+_COMPARISONS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+
+def _compare(value, op: str, target) -> bool:
+    # Los x2many coinciden si alguno de sus elementos cumple la condición
+    if isinstance(value, list) and op in ("=", "in"):
+        targets = target if isinstance(target, (list, tuple, frozenset)) else [target]
+        if target is False and op == "=":
+            return not value
+        return any(item in targets for item in value)
+    if op == "=":
+        return value == target or (target is False and not value)
+    if op == "!=":
+        return not (value == target or (target is False and not value))
+    if op == "in":
+        return value in target or (False in target and not value)
+    if op == "not in":
+        return value not in target
+    if op in ("like", "ilike"):
+        return _like(value, target, op == "ilike")
+    if op in ("not like", "not ilike"):
+        return not _like(value, target, op == "not ilike")
+    if op in _COMPARISONS:
+        if value in (False, None):
+            return False
+        return _COMPARISONS[op](value, target)
+    raise OdooFault(1, f"Operador de dominio no soportado: {op}")
+
+
+class OdooSimulator:
+    def __init__(self, latency_ms: float = 0, jitter_ms: float = 0, workers: int = 0,
+                 username: str = "admin", password: str = "admin", seed: Optional[int] = None):
+        self.config = SimulatorConfig(latency_ms, jitter_ms, workers, username, password, seed)
+        self.random = random.Random(seed)
+        self.data: Dict[str, Dict[int, dict]] = {}
+        self._next_ids: Dict[str, int] = {}
+        # Índices por (modelo, campo) -> {valor: ids}; se descartan en cada escritura
+        self._indexes: Dict[tuple, dict] = {}
+        self.calls = Counter()
+        self.auth_calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._workers = None
+        self.configure()
+
+    def configure(self, **changes):
+        for name, value in changes.items():
+            setattr(self.config, name, value)
+        self._workers = asyncio.Semaphore(self.config.workers) if self.config.workers > 0 else None
+        if "seed" in changes:
+            self.random.seed(self.config.seed)
+
+    def reset_stats(self):
+        self.calls.clear()
+        self.auth_calls = 0
+        self.max_in_flight = 0
+
+    def stats(self) -> dict:
+        return {
+            "config": asdict(self.config),
+            "records": {model: len(records) for model, records in self.data.items()},
+            "calls": dict(self.calls.most_common()),
+            "total_calls": sum(self.calls.values()),
+            "auth_calls": self.auth_calls,
+            "max_in_flight": self.max_in_flight,
+        }
+
+    # --- Transporte ---------------------------------------------------------------
+
+    async def dispatch(self, service: str, method: str, params: list):
+        """
+        Atiende una llamada RPC aplicando la latencia y el límite de workers configurados.
+        """
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self._workers is not None:
+                async with self._workers:
+                    return await self._dispatch(service, method, params)
+            return await self._dispatch(service, method, params)
+        finally:
+            self.in_flight -= 1
+
+    async def _dispatch(self, service: str, method: str, params: list):
+        delay = latency_seconds(self.random, self.config.latency_ms, self.config.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if service == "common":
+            if method == "authenticate":
+                self.auth_calls += 1
+                return self.authenticate(*params[1:3])
+            if method == "version":
+                return {"server_version": "17.0", "server_version_info": [17, 0, 0, "final", 0, ""], "protocol_version": 1}
+            raise OdooFault(1, f"Método desconocido: common.{method}")
+        if service == "object" and method == "execute_kw":
+            _db, uid, password, model, model_method, *rest = params
+            self.check_access(uid, password)
+            args = rest[0] if rest else []
+            kwargs = rest[1] if len(rest) > 1 else {}
+            self.calls[f"{model}.{model_method}"] += 1
+            return _odoo_value(self.execute(model, model_method, list(args), dict(kwargs or {})))
+        raise OdooFault(1, f"Servicio desconocido: {service}.{method}")
+
+    # --- Autenticación ------------------------------------------------------------
+
+    def authenticate(self, login: str, password: str):
+        if login == self.config.username and password == self.config.password:
+            return ADMIN_UID
+        for user in self.data.get("res.users", {}).values():
+            if user.get("login") == login and user.get("password") == password and user.get("active", True):
+                return user["id"]
+        return False
+
+    def check_access(self, uid, password):
+        if uid == ADMIN_UID and password == self.config.password:
+            return
+        user = self.data.get("res.users", {}).get(uid)
+        if user is None or user.get("password") != password:
+            raise OdooFault(3, "Access Denied", "odoo.exceptions.AccessDenied")
+
+    # --- ORM ------------------------------------------------------------------------
+
+    def table(self, model: str) -> Dict[int, dict]:
+        return self.data.setdefault(model, {})
+
+    def execute(self, model: str, method: str, args: list, kwargs: dict):
+        context = kwargs.pop("context", None) or {}
+        if method not in READ_METHODS:
+            self._indexes.clear()
+        special = _METHODS.get((model, method))
+        if special is not None:
+            return special(self, *args, context=context, **kwargs)
+        handler = getattr(self, f"_orm_{method}", None)
+        if handler is None:
+            raise OdooFault(2, f"El método '{method}' no existe en el modelo '{model}'")
+        return handler(model, *args, context=context, **kwargs)
+
+    def _orm_search(self, model, domain=None, offset=0, limit=None, order=None, count=False, context=None):
+        ids = self._search(model, domain or [], context or {}, order)
+        if count:
+            return len(ids)
+        ids = ids[offset:]
+        return ids[:limit] if limit else ids
+
+    def _orm_search_count(self, model, domain=None, limit=None, context=None):
+        return len(self._search(model, domain or [], context or {}))
+
+    def _orm_search_read(self, model, domain=None, fields=None, offset=0, limit=None, order=None, context=None):
+        ids = self._orm_search(model, domain, offset, limit, order, context=context)
+        return self._orm_read(model, ids, fields)
+
+    def _orm_read(self, model, ids, fields=None, load=None, context=None):
+        ids = [ids] if isinstance(ids, int) else list(ids)
+        table = self.table(model)
+        return [self._read_record(model, table[record_id], fields) for record_id in ids if record_id in table]
+
+    def _orm_create(self, model, vals_list, context=None):
+        if isinstance(vals_list, dict):
+            return self.create(model, vals_list)
+        return [self.create(model, vals) for vals in vals_list]
+
+    def _orm_write(self, model, ids, vals, context=None):
+        ids = [ids] if isinstance(ids, int) else list(ids)
+        table = self.table(model)
+        for record_id in ids:
+            if record_id not in table:
+                raise OdooFault(2, f"El registro {model}({record_id}) no existe o fue eliminado")
+            self._write_values(model, table[record_id], vals)
+        return True
+
+    def _orm_unlink(self, model, ids, context=None):
+        ids = [ids] if isinstance(ids, int) else list(ids)
+        for record_id in ids:
+            self.table(model).pop(record_id, None)
+        return True
+
+    def _orm_read_group(self, model, domain, fields, groupby, offset=0, limit=None, orderby=False, lazy=True, context=None):
+        groupby = [groupby] if isinstance(groupby, str) else list(groupby)
+        if lazy and groupby:
+            groupby = groupby[:1]
+        aggregates = []
+        for spec in fields:
+            name, _, function = spec.partition(":")
+            if function:
+                aggregates.append((name, function))
+        groups: Dict[tuple, list] = {}
+        for record_id in self._search(model, domain, context or {}):
+            record = self.table(model)[record_id]
+            key = tuple(self._field_value(model, record, field) for field in groupby)
+            groups.setdefault(key, []).append(record)
+
+        result = []
+        for key, records in groups.items():
+            group = {}
+            for field, value in zip(groupby, key):
+                group[field] = self._format_value(model, field, value)
+            for name, function in aggregates:
+                values = [self._field_value(model, record, name) for record in records]
+                values = [value for value in values if value not in (False, None)]
+                group[name] = _AGGREGATES[function](values) if values else False
+            # Como Odoo: con lazy=True el conteo se llama <primer groupby>_count
+            count_key = f"{groupby[0]}_count" if lazy and groupby else "__count"
+            group[count_key] = len(records)
+            group["__domain"] = [(field, "=", value) for field, value in zip(groupby, key)] + list(domain)
+            result.append(group)
+        result = result[offset:]
+        return result[:limit] if limit else result
+
+    def create(self, model: str, vals: dict, record_id: int = None) -> int:
+        table = self.table(model)
+        if record_id is None:
+            record_id = max(self._next_ids.get(model, 1), max(table, default=0) + 1)
+        self._next_ids[model] = record_id + 1
+        record = dict(DEFAULTS.get(model, {}))
+        record["id"] = record_id
+        table[record_id] = record
+        # Los one2many se guardan como lista de ids en el padre
+        for field, (kind, _comodel, _inverse) in RELATIONS.get(model, {}).items():
+            if kind in (O2M, M2M):
+                record[field] = []
+        hook = _CREATE_HOOKS.get(model)
+        if hook is not None:
+            vals = hook(self, dict(vals))
+        self._write_values(model, record, vals)
+        self._link_parent(model, record)
+        return record_id
+
+    def _link_parent(self, model: str, record: dict):
+        for parent_model, relations in RELATIONS.items():
+            for field, (kind, comodel, inverse) in relations.items():
+                if kind == O2M and comodel == model and record.get(inverse):
+                    parent = self.table(parent_model).get(record[inverse])
+                    if parent is not None and record["id"] not in parent[field]:
+                        parent[field].append(record["id"])
+
+    def _write_values(self, model: str, record: dict, vals: dict):
+        relations = RELATIONS.get(model, {})
+        for field, value in vals.items():
+            kind, comodel, inverse = relations.get(field, (None, None, None))
+            if kind == M2O:
+                # La API a veces envía [id, nombre] en lugar del id
+                record[field] = value[0] if isinstance(value, (list, tuple)) and value else (value or False)
+            elif kind in (O2M, M2M):
+                self._apply_commands(model, record, field, comodel, inverse, value)
+            else:
+                record[field] = value
+
+    def _apply_commands(self, model, record, field, comodel, inverse, commands):
+        current = record.setdefault(field, [])
+        for command in commands or []:
+            if not isinstance(command, (list, tuple)):
+                current.append(command)
+                continue
+            code = command[0]
+            if code == 0:
+                vals = dict(command[2])
+                if inverse:
+                    vals[inverse] = record["id"]
+                child_id = self.create(comodel, vals)
+                if child_id not in current:
+                    current.append(child_id)
+            elif code == 1:
+                self._orm_write(comodel, [command[1]], command[2])
+            elif code in (2, 3):
+                if command[1] in current:
+                    current.remove(command[1])
+                if code == 2:
+                    self._orm_unlink(comodel, [command[1]])
+            elif code == 4:
+                if command[1] not in current:
+                    current.append(command[1])
+            elif code == 5:
+                current.clear()
+            elif code == 6:
+                current[:] = list(command[2])
+
+    # --- Dominios -------------------------------------------------------------------
+
+    def _search(self, model: str, domain: list, context: dict, order: str = None) -> list:
+        predicate = self._compile_domain(model, list(domain))
+        table = self.table(model)
+        mentions_active = any(isinstance(term, (list, tuple)) and term[0] == "active" for term in domain)
+        check_active = context.get("active_test", True) and not mentions_active and "active" in DEFAULTS.get(model, {})
+        candidates = self._indexed_candidates(model, domain)
+        records = table.items() if candidates is None else ((record_id, table[record_id]) for record_id in candidates)
+        ids = [
+            record_id for record_id, record in records
+            if (not check_active or record.get("active", True)) and predicate(record)
+        ]
+        return self._sort(model, ids, order)
+
+    def _indexed_candidates(self, model: str, domain: list) -> Optional[set]:
+        """
+        Como los índices de la base de datos de Odoo: si el dominio es una conjunción con
+        términos '=' o 'in' (también a través de many2one), acota los registros a revisar
+        con índices en memoria en lugar de recorrer la tabla. Los campos calculados también
+        se indexan: cualquier escritura descarta todos los índices.
+        """
+        if any(term in ("&", "|", "!") for term in domain if isinstance(term, str)):
+            return None
+        candidates = None
+        for field, op, target in domain:
+            if op not in ("=", "in") or target is False:
+                continue
+            ids = self._indexed_ids(model, field, [target] if op == "=" else target)
+            if ids is not None:
+                candidates = ids if candidates is None else candidates & ids
+        return candidates
+
+    def _indexed_ids(self, model: str, path: str, values) -> Optional[set]:
+        names = path.split(".")
+        models = [model]
+        for name in names:
+            if models[-1] is None:
+                return None
+            models.append(self._relation_model(models[-1], name))
+        try:
+            ids = set()
+            index = self._index(models[-2], names[-1])
+            for value in values:
+                ids |= index.get(value, set())
+        except TypeError:
+            return None
+        # Se recorre la ruta hacia atrás: registros cuyo many2one apunta a los ids encontrados
+        for step_model, name in zip(reversed(models[:-2]), reversed(names[:-1])):
+            index = self._index(step_model, name)
+            ids = set().union(*(index.get(record_id, set()) for record_id in ids))
+        return ids
+
+    def _index(self, model: str, field: str) -> dict:
+        index = self._indexes.get((model, field))
+        if index is None:
+            index = {}
+            for record_id, record in self.table(model).items():
+                value = self._field_value(model, record, field)
+                for item in value if isinstance(value, list) else [value]:
+                    index.setdefault(item, set()).add(record_id)
+            self._indexes[(model, field)] = index
+        return index
+
+    def _compile_domain(self, model: str, domain: list):
+        terms = []
+        position = 0
+        while position < len(domain):
+            term, position = self._parse_term(model, domain, position)
+            terms.append(term)
+        return lambda record: all(term(record) for term in terms)
+
+    def _parse_term(self, model: str, domain: list, position: int):
+        token = domain[position]
+        if token in ("&", "|"):
+            left, position = self._parse_term(model, domain, position + 1)
+            right, position = self._parse_term(model, domain, position)
+            if token == "&":
+                return (lambda record: left(record) and right(record)), position
+            return (lambda record: left(record) or right(record)), position
+        if token == "!":
+            inner, position = self._parse_term(model, domain, position + 1)
+            return (lambda record: not inner(record)), position
+        field, op, target = token
+        if isinstance(target, (list, tuple)):
+            target = list(target)
+            if op in ("in", "not in"):
+                try:
+                    target = frozenset(target)
+                except TypeError:
+                    pass
+        getter = self._compile_path(model, field)
+        return (lambda record: _compare(getter(record), op, target)), position + 1
+
+    def _compile_path(self, model: str, path: str):
+        """
+        Resuelve una sola vez los modelos y campos calculados de una ruta con punto
+        ('move_id.partner_id') y retorna la función que la evalúa sobre un registro.
+        """
+        steps = []
+        for name in path.split("."):
+            comodel = self._relation_model(model, name)
+            steps.append((name, COMPUTED.get(model, {}).get(name), self.table(comodel) if comodel else None))
+            model = comodel
+
+        def getter(record):
+            value = False
+            for index, (name, compute, next_table) in enumerate(steps):
+                value = compute(self, record) if compute is not None else record.get(name, False)
+                if index == len(steps) - 1:
+                    break
+                record = next_table.get(value) if next_table is not None and value else None
+                if record is None:
+                    return False
+            return value
+        return getter
+
+    def _relation_model(self, model: str, field: str) -> Optional[str]:
+        relation = RELATIONS.get(model, {}).get(field)
+        if relation is not None:
+            return relation[1]
+        return COMPUTED_RELATIONS.get((model, field))
+
+    def _field_value(self, model: str, record: dict, field: str):
+        compute = COMPUTED.get(model, {}).get(field)
+        if compute is not None:
+            return compute(self, record)
+        return record.get(field, False)
+
+    def _format_value(self, model: str, field: str, value):
+        relation = RELATIONS.get(model, {}).get(field)
+        kind = relation[0] if relation else (M2O if (model, field) in COMPUTED_RELATIONS else None)
+        if kind == M2O:
+            if not value:
+                return False
+            comodel = self._relation_model(model, field)
+            return [value, self.display_name(comodel, value)]
+        if kind in (O2M, M2M):
+            return list(value or [])
+        return value
+
+    def display_name(self, model: str, record_id: int) -> str:
+        record = self.table(model).get(record_id) or {}
+        return record.get("name") or f"{model},{record_id}"
+
+    def _read_record(self, model: str, record: dict, fields=None) -> dict:
+        if not fields:
+            fields = sorted(set(record) | set(COMPUTED.get(model, {})) - {"password"})
+        result = {"id": record["id"]}
+        for field in fields:
+            if field == "id":
+                continue
+            if field == "display_name":
+                result[field] = self.display_name(model, record["id"])
+                continue
+            result[field] = self._format_value(model, field, self._field_value(model, record, field))
+        return result
+
+    def _sort(self, model: str, ids: list, order: str = None) -> list:
+        if not order:
+            return sorted(ids)
+        table = self.table(model)
+        for spec in reversed([part.strip() for part in order.split(",") if part.strip()]):
+            field, _, direction = spec.partition(" ")
+            reverse = direction.strip().lower() == "desc"
+
+            def key(record_id, field=field):
+                value = self._field_value(model, table[record_id], field)
+                return (value not in (False, None), value if value not in (False, None) else 0)
+
+            ids = sorted(ids, key=key, reverse=reverse)
+        return ids
+
+
+READ_METHODS = {"search", "search_read", "search_count", "read", "read_group"}
+
+_AGGREGATES = {"max": max, "min": min, "sum": sum, "count": len, "avg": lambda values: sum(values) / len(values)}
+
+
+def _odoo_value(value):
+    # Como Odoo: None viaja como False (XML-RPC sin allow_none)
+    if value is None:
+        return False
+    if isinstance(value, dict):
+        return {key: _odoo_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_odoo_value(item) for item in value]
+    return value
+
+
+# --- Comportamiento específico de modelos -------------------------------------------
+
+def _users_create(sim: OdooSimulator, vals: dict) -> dict:
+    # Como Odoo: un usuario sin partner_id crea su contacto, que guarda nombre, correo y móvil
+    partner_vals = {field: vals.pop(field) for field in ("name", "email", "mobile") if field in vals}
+    if not vals.get("partner_id"):
+        partner_vals.setdefault("name", vals.get("login"))
+        partner_vals.setdefault("email", vals.get("login"))
+        vals["partner_id"] = sim.create("res.partner", partner_vals)
+    elif partner_vals:
+        sim._orm_write("res.partner", [vals["partner_id"]], partner_vals)
+    return vals
+
+
+def _move_line_create(sim: OdooSimulator, vals: dict) -> dict:
+    if "price_unit" not in vals and vals.get("product_id"):
+        product_id = vals["product_id"][0] if isinstance(vals["product_id"], (list, tuple)) else vals["product_id"]
+        vals["price_unit"] = sim.table("product.product").get(product_id, {}).get("list_price", 0.0)
+    return vals
+
+
+_CREATE_HOOKS = {
+    "res.users": _users_create,
+    "account.move.line": _move_line_create,
+}
+
+
+def _move_action_post(sim: OdooSimulator, ids, context=None):
+    ids = [ids] if isinstance(ids, int) else list(ids)
+    for record_id in ids:
+        move = sim.table("account.move").get(record_id)
+        if move is None:
+            raise OdooFault(2, f"El registro account.move({record_id}) no existe o fue eliminado")
+        if move["state"] != "draft":
+            raise OdooFault(2, "Solo se pueden publicar asientos en borrador.")
+        move["state"] = "posted"
+        move["invoice_date"] = move.get("invoice_date") or date.today().isoformat()
+        if move.get("name", "/") == "/":
+            move["name"] = f"INV/{move['invoice_date'][:4]}/{record_id:05d}"
+    return False
+
+
+def _payment_register_create(sim: OdooSimulator, vals_list, context=None):
+    context = context or {}
+    single = isinstance(vals_list, dict)
+    ids = []
+    for vals in [vals_list] if single else vals_list:
+        vals = dict(vals)
+        # En Odoo el asistente toma las facturas del contexto
+        vals["active_ids"] = list(context.get("active_ids") or [])
+        vals.pop("communication", None)
+        ids.append(sim.create("account.payment.register", vals))
+    return ids[0] if single else ids
+
+
+def _payment_register_action(sim: OdooSimulator, ids, context=None):
+    ids = [ids] if isinstance(ids, int) else list(ids)
+    for record_id in ids:
+        wizard = sim.table("account.payment.register")[record_id]
+        for move_id in wizard.get("active_ids", []):
+            move = sim.table("account.move")[move_id]
+            if move["state"] != "posted":
+                raise OdooFault(2, "Solo se pueden registrar pagos de facturas publicadas.")
+            sim.create("account.payment", {
+                "payment_type": wizard.get("payment_type", "inbound"),
+                "amount": wizard.get("amount") or _move_amount_total(sim, move),
+                "partner_id": move.get("partner_id"),
+                "journal_id": wizard.get("journal_id"),
+                "date": wizard.get("payment_date") or date.today().isoformat(),
+                "ref": move.get("name"),
+            })
+            move["payment_state"] = "paid"
+    return True
+
+
+_METHODS = {
+    ("account.move", "action_post"): _move_action_post,
+    ("account.payment.register", "create"): _payment_register_create,
+    ("account.payment.register", "action_create_payments"): _payment_register_action,
+}
+
+
+@dataclass
+class SimulatorConfig:
+    latency_ms: float = 0
+    jitter_ms: float = 0
+    # Llamadas que Odoo atiende a la vez (0 = sin límite), como los workers de odoo.conf
+    workers: int = 0
+    username: str = "admin"
+    password: str = "admin"
+    seed: Optional[int] = None
+
+
+# --- Datos de prueba ------------------------------------------------------------------
+
+def seed_dataset(sim: OdooSimulator, partners: int = 1000, invoices: int = 5000, users_ratio: float = 0.5,
+                 paid_ratio: float = 0.9, days: int = 120, seed: int = 42) -> OdooSimulator:
+    """
+    Carga datos de referencia (país, grupos, productos de planes del catálogo, métodos
+    de pago) y un volumen sintético de contactos, usuarios portal y facturas de plan.
+    Con la misma semilla se obtiene siempre el mismo dataset.
+    """
+    rng = random.Random(seed)
+    sim.create("res.users", {"login": sim.config.username, "password": sim.config.password, "name": "Administrator",
+                             "groups_id": [(6, 0, [1])]}, record_id=ADMIN_UID)
+    sim.create("res.country", {"name": "Bolivia", "code": "BO"}, record_id=29)
+    for group_id, xml_name, name in ((1, "group_user", "Internal User"), (10, "group_portal", "Portal")):
+        sim.create("res.groups", {"name": name}, record_id=group_id)
+        sim.create("ir.model.data", {"module": "base", "name": xml_name, "model": "res.groups", "res_id": group_id})
+    sim.create("res.currency", {"name": "BOB"}, record_id=63)
+    sim.create("account.journal", {"name": "Banco", "type": "bank"}, record_id=3)
+    sim.create("account.payment.method", {"name": "Manual", "payment_type": "inbound"})
+    for name in ("Manual", "QR", "Transferencia"):
+        sim.create("account.payment.method.line", {"name": name, "journal_id": 3})
+
+    plan_ids = sorted(PLAN_CATALOG.plans)
+    for product_id in plan_ids:
+        plan = PLAN_CATALOG.plans[product_id]
+        sim.create("product.product", {"name": plan.code, "list_price": float(rng.choice((50, 80, 120)))}, record_id=product_id)
+    regular_plans = [product_id for product_id in plan_ids if not PLAN_CATALOG.plans[product_id].is_event] or plan_ids
+
+    partner_ids = []
+    for index in range(1, partners + 1):
+        partner_ids.append(sim.create("res.partner", {
+            "name": f"Cliente {index}",
+            "email": f"cliente{index}@example.com",
+            "mobile": f"7{index:07d}",
+            "vat": str(1000000 + index),
+            "city": "La Paz",
+            "country_id": 29,
+        }))
+    for partner_id in partner_ids:
+        if rng.random() < users_ratio:
+            partner = sim.table("res.partner")[partner_id]
+            sim.create("res.users", {
+                "login": partner["email"],
+                "password": "Secret123",
+                "partner_id": partner_id,
+                "groups_id": [(6, 0, [10])],
+            })
+
+    today = date.today()
+    for _ in range(invoices):
+        partner_id = rng.choice(partner_ids)
+        move_id = sim.create("account.move", {
+            "move_type": "out_invoice",
+            "partner_id": partner_id,
+            "journal_id": 3,
+            "invoice_date": (today - timedelta(days=rng.randrange(days))).isoformat(),
+            "invoice_line_ids": [(0, 0, {"product_id": rng.choice(regular_plans), "quantity": 1.0})],
+        })
+        move = sim.table("account.move")[move_id]
+        move["state"] = "posted"
+        move["name"] = f"INV/{move['invoice_date'][:4]}/{move_id:05d}"
+        move["payment_state"] = "paid" if rng.random() < paid_ratio else "not_paid"
+    sim._indexes.clear()
+    sim.reset_stats()
+    return sim
+
+
+# --- Servidor -------------------------------------------------------------------------
+
+def create_app(sim: OdooSimulator) -> FastAPI:
+    app = FastAPI(title="Odoo simulator")
+    app.state.simulator = sim
+
+    async def xmlrpc_endpoint(request: Request, service: str):
+        params, method = xmlrpc.client.loads(await request.body(), use_builtin_types=True)
+        try:
+            result = await sim.dispatch(service, method, list(params))
+            body = xmlrpc.client.dumps((result,), methodresponse=True, allow_none=True)
+        except OdooFault as fault:
+            body = xmlrpc.client.dumps(xmlrpc.client.Fault(fault.code, fault.message), methodresponse=True)
+        except Exception as e:
+            body = xmlrpc.client.dumps(xmlrpc.client.Fault(1, f"{type(e).__name__}: {e}"), methodresponse=True)
+        return Response(body, media_type="text/xml")
+
+    @app.post("/xmlrpc/2/common")
+    async def xmlrpc_common(request: Request):
+        return await xmlrpc_endpoint(request, "common")
+
+    @app.post("/xmlrpc/2/object")
+    async def xmlrpc_object(request: Request):
+        return await xmlrpc_endpoint(request, "object")
+
+    @app.post("/jsonrpc")
+    async def jsonrpc(request: Request):
+        payload = await request.json()
+        params = payload.get("params") or {}
+        try:
+            result = await sim.dispatch(params.get("service"), params.get("method"), list(params.get("args") or []))
+            return {"jsonrpc": "2.0", "id": payload.get("id"), "result": result}
+        except Exception as e:
+            name = e.name if isinstance(e, OdooFault) else f"builtins.{type(e).__name__}"
+            message = e.message if isinstance(e, OdooFault) else str(e)
+            return {
+                "jsonrpc": "2.0", "id": payload.get("id"),
+                "error": {"code": 200, "message": "Odoo Server Error", "data": {"name": name, "message": message}},
+            }
+
+    @app.get("/_sim/stats")
+    async def stats():
+        return sim.stats()
+
+    @app.post("/_sim/reset-stats")
+    async def reset_stats():
+        sim.reset_stats()
+        return {"ok": True}
+
+    @app.patch("/_sim/config")
+    async def configure(request: Request):
+        body = await request.json()
+        known = {field.name for field in fields(SimulatorConfig)}
+        sim.configure(**{key: value for key, value in body.items() if key in known})
+        return JSONResponse(asdict(sim.config))
+
+    return app
+
+
+@contextmanager
+def run_in_thread(sim: OdooSimulator, host: str = "127.0.0.1", port: int = 8069):
+    """
+    Levanta el simulador en un hilo y retorna su URL; lo detiene al salir del bloque.
+    """
+    with serve_in_thread(create_app(sim), host, port) as url:
+        yield url
+
+
+def add_config_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency-ms", type=float, default=0, help="Latencia media por llamada RPC")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Variación uniforme (+/-) de la latencia")
+    parser.add_argument("--workers", type=int, default=0, help="Llamadas atendidas a la vez (0 = sin límite)")
+    parser.add_argument("--partners", type=int, default=1000, help="Contactos del dataset")
+    parser.add_argument("--invoices", type=int, default=5000, help="Facturas de plan del dataset")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla del dataset y de las latencias")
+
+
+def simulator_from_args(args) -> OdooSimulator:
+    sim = OdooSimulator(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, workers=args.workers, seed=args.seed)
+    return seed_dataset(sim, partners=args.partners, invoices=args.invoices, seed=args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8069)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    sim = simulator_from_args(args)
+    print(f"Dataset: {sim.stats()['records']}")
+    uvicorn.run(create_app(sim), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Compara el transporte XML-RPC (ServerProxy reutilizado, como el pool de la API)
+con el cliente JSON-RPC asíncrono para llamadas `search_read` típicas sobre
+`account.move` y `res.partner`: tamaño de payload (bytes en el cable) y latencia.
+
+Uso (con el .env apuntando al Odoo a medir):
+    python -m benchmarks.odoo_transport --iterations 50 --limit 80
+"""
+import argparse
+import asyncio
+import gzip
+import statistics
+import time
+import xmlrpc.client
+
+import httpx
+
+from app.config import settings
+from app.core.odoo_jsonrpc import OdooJsonRpcClient
+
+QUERIES = {
+    "account.move": (
+        [[("move_type", "=", "out_invoice"), ("payment_state", "in", ["paid", "in_payment"])]],
+        {"fields": ["id", "name", "partner_id", "invoice_date", "amount_total", "payment_state", "invoice_line_ids"],
+         "order": "invoice_date desc"},
+    ),
+    "res.partner": (
+        [[("email", "!=", False)]],
+        {"fields": ["id", "name", "email", "mobile", "vat", "city", "country_id"]},
+    ),
+}
+
+
+class _CountingMixin:
+    """
+    Cuenta los bytes enviados y recibidos por un transporte de xmlrpc.client.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sent = 0
+        self.received = 0
+
+    def send_request(self, host, handler, request_body, debug):
+        self.sent += len(request_body)
+        return super().send_request(host, handler, request_body, debug)
+
+    def parse_response(self, response):
+        body = response.read()
+        self.received += len(body)
+        if response.getheader("Content-Encoding", "") == "gzip":
+            body = gzip.decompress(body)
+        parser, unmarshaller = self.getparser()
+        parser.feed(body)
+        parser.close()
+        return unmarshaller.close()
+
+
+class CountingTransport(_CountingMixin, xmlrpc.client.Transport):
+    pass
+
+
+class CountingSafeTransport(_CountingMixin, xmlrpc.client.SafeTransport):
+    pass
+
+
+def _summary(name: str, model: str, latencies: list, sent: int, received: int, iterations: int) -> str:
+    latencies_ms = sorted(l * 1000 for l in latencies)
+    p95 = latencies_ms[max(0, int(len(latencies_ms) * 0.95) - 1)]
+    return (
+        f"{name:<8} {model:<13} "
+        f"media={statistics.mean(latencies_ms):8.1f}ms  p50={statistics.median(latencies_ms):8.1f}ms  "
+        f"p95={p95:8.1f}ms  req={sent // iterations:>7}B  resp={received // iterations:>9}B"
+    )
+
+
+def bench_xmlrpc(model: str, iterations: int, limit: int) -> str:
+    transport_cls = CountingSafeTransport if settings.ODOO_URL.startswith("https") else CountingTransport
+    common = xmlrpc.client.ServerProxy(f"{settings.ODOO_URL}/xmlrpc/2/common")
+    uid = common.authenticate(settings.ODOO_DB, settings.ODOO_USERNAME, settings.ODOO_PASSWORD, {})
+    transport = transport_cls()
+    models = xmlrpc.client.ServerProxy(f"{settings.ODOO_URL}/xmlrpc/2/object", transport=transport)
+
+    args, kwargs = QUERIES[model]
+    kwargs = dict(kwargs, limit=limit)
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        models.execute_kw(settings.ODOO_DB, uid, settings.ODOO_PASSWORD, model, "search_read", args, kwargs)
+        latencies.append(time.perf_counter() - start)
+    return _summary("xmlrpc", model, latencies, transport.sent, transport.received, iterations)
+
+
+async def bench_jsonrpc(model: str, iterations: int, limit: int) -> str:
+    counters = {"sent": 0, "received": 0}
+
+    async def on_request(request: httpx.Request):
+        counters["sent"] += len(request.content)
+
+    async def on_response(response: httpx.Response):
+        await response.aread()
+        counters["received"] += response.num_bytes_downloaded
+
+    async with httpx.AsyncClient(event_hooks={"request": [on_request], "response": [on_response]}) as http:
+        client = OdooJsonRpcClient(
+            settings.ODOO_URL, settings.ODOO_DB, settings.ODOO_USERNAME, settings.ODOO_PASSWORD, client=http
+        )
+        await client.authenticate()
+        counters["sent"] = counters["received"] = 0
+
+        args, kwargs = QUERIES[model]
+        kwargs = dict(kwargs, limit=limit)
+        latencies = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await client.execute_kw(model, "search_read", args, kwargs)
+            latencies.append(time.perf_counter() - start)
+    return _summary("jsonrpc", model, latencies, counters["sent"], counters["received"], iterations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=30, help="Llamadas por modelo y transporte")
+    parser.add_argument("--limit", type=int, default=80, help="Registros por search_read")
+    args = parser.parse_args()
+
+    print(f"Odoo: {settings.ODOO_URL}  db={settings.ODOO_DB}  iteraciones={args.iterations}  limit={args.limit}")
+    for model in QUERIES:
+        print(bench_xmlrpc(model, args.iterations, args.limit))
+        print(asyncio.run(bench_jsonrpc(model, args.iterations, args.limit)))
+
+
+if __name__ == "__main__":
+    main()
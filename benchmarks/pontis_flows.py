@@ -0,0 +1,145 @@
+"""
+Mide los flujos de Pontis de la API contra el simulador local
+(`benchmarks.pontis_simulator`), con el mismo `PontisClient`, guard y sincronización
+por delta que usa la app:
+
+  - activation: getCustomer + create (alta) para `--users` customers nuevos.
+  - renewal:    vence en el simulador los paquetes guardados (POST /_sim/expire) y
+                luego getCustomer + sync_customer_services: cada customer recibe el PUT
+                que extiende sus paquetes.
+  - status:     getCustomer + verificación de vigencia del plan.
+
+Uso:
+    python -m benchmarks.pontis_flows --users 500 --concurrency 50 --latency-ms 80 --jitter-ms 30 --error-rate 0.01
+    python -m benchmarks.pontis_flows --url http://127.0.0.1:9001   # simulador ya levantado aparte
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+
+import httpx
+from fastapi import HTTPException
+
+from app.services import api_service
+from app.services.api_service import (
+    PontisClient,
+    build_customer_data,
+    check_customer_in_pontis,
+    check_subscribe_services_expiration,
+    create_customer_in_pontis,
+)
+from app.services.pontis_sync import sync_customer_services
+from benchmarks.pontis_simulator import add_config_arguments, config_from_args, run_in_thread
+
+FIRST_USER_ID = 900000
+
+
+async def activation(id_user: int, id_plan: int):
+    customer_id = f"MAP0{id_user}"
+    customer = await check_customer_in_pontis(customer_id)
+    contact = [{"name": f"Bench {id_user}", "email": f"bench{id_user}@example.com", "mobile": "70000000"}]
+    if not customer.exists:
+        await create_customer_in_pontis(build_customer_data(id_user, contact, id_plan, 0, "Bench1234"))
+    else:
+        await sync_customer_services(customer_id, customer, id_plan)
+
+
+async def renewal(id_user: int, id_plan: int):
+    customer_id = f"MAP0{id_user}"
+    customer = await check_customer_in_pontis(customer_id)
+    if not customer.exists:
+        raise HTTPException(status_code=404, detail=f"{customer_id} no existe; correr antes el flujo activation")
+    if await sync_customer_services(customer_id, customer, id_plan) is None:
+        raise HTTPException(status_code=409, detail=f"{customer_id} ya estaba al día: no se envió la renovación")
+
+
+async def expire_stored_services(url: str) -> int:
+    async with httpx.AsyncClient(base_url=url) as client:
+        response = await client.post("/_sim/expire", json={"days_ago": 1})
+        response.raise_for_status()
+        return response.json()["expired"]
+
+
+async def status(id_user: int, id_plan: int):
+    customer = await check_customer_in_pontis(f"MAP0{id_user}")
+    check_subscribe_services_expiration(customer)
+
+
+async def run_flow(name: str, flow, users: int, concurrency: int, id_plan: int) -> str:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = Counter()
+
+    async def one(id_user: int):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await flow(id_user, id_plan)
+            except HTTPException as e:
+                errors[e.status_code] += 1
+                return
+            except Exception as e:
+                errors[type(e).__name__] += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(FIRST_USER_ID + i) for i in range(users)))
+    elapsed = time.perf_counter() - start
+    return _summary(name, latencies, errors, elapsed)
+
+
+def _summary(name: str, latencies: list, errors: Counter, elapsed: float) -> str:
+    line = f"{name:<11} ok={len(latencies):>6}  err={sum(errors.values()):>5}  {len(latencies) / elapsed:8.1f} flujos/s"
+    if latencies:
+        latencies_ms = sorted(l * 1000 for l in latencies)
+        p95 = latencies_ms[max(0, int(len(latencies_ms) * 0.95) - 1)]
+        p99 = latencies_ms[max(0, int(len(latencies_ms) * 0.99) - 1)]
+        line += f"  p50={statistics.median(latencies_ms):8.1f}ms  p95={p95:8.1f}ms  p99={p99:8.1f}ms"
+    if errors:
+        line += f"  errores={dict(errors)}"
+    return line
+
+
+async def run(url: str, args):
+    # Cliente apuntando al simulador, instalado como el cliente compartido de la app
+    client = PontisClient(url, "bench", "bench", customer_cache_ttl=args.cache_ttl)
+    api_service._pontis_client = client
+    try:
+        flows = {"activation": activation, "renewal": renewal, "status": status}
+        for name in args.flows:
+            if name == "renewal":
+                # Sin paquetes vencidos la renovación no tiene diferencias que enviar
+                print(f"Paquetes vencidos en el simulador: {await expire_stored_services(url)}")
+            print(await run_flow(name, flows[name], args.users, args.concurrency, args.plan))
+    finally:
+        await api_service.close_pontis_client()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200, help="Customers por flujo")
+    parser.add_argument("--concurrency", type=int, default=20, help="Flujos simultáneos")
+    parser.add_argument("--plan", type=int, default=6, help="Plan del catálogo a activar")
+    parser.add_argument("--flows", nargs="+", default=["activation", "renewal", "status"],
+                        choices=["activation", "renewal", "status"])
+    parser.add_argument("--cache-ttl", type=float, default=0, help="TTL de la caché de customers del cliente")
+    parser.add_argument("--url", default=None, help="Simulador ya levantado (si no, se levanta uno en un hilo)")
+    parser.add_argument("--port", type=int, default=9001, help="Puerto del simulador en hilo")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    if args.url:
+        asyncio.run(run(args.url, args))
+        return
+    with run_in_thread(config_from_args(args), port=args.port) as (url, simulator):
+        print(f"Simulador: {url}  {simulator.config}")
+        asyncio.run(run(url, args))
+        stats = simulator.stats()
+        print(f"Pontis: {stats['requests']}  status={stats['statuses']}  max_en_vuelo={stats['max_in_flight']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""
+Simulador local de la API de Pontis (OTT) para pruebas de carga sin tocar la
+plataforma real. Implementa los endpoints que usa `PontisClient` con estado en
+memoria:
+
+    POST   /auth/login
+    POST   /customers/create
+    PUT    /customers/{customer_id}
+    GET    /customers/getCustomer/{customer_id}
+    DELETE /customers/deleteServices/{customer_id}
+
+Perillas (por línea de comandos o en caliente con PATCH /_sim/config):
+latencia media y jitter, tasa de errores 500, límite de peticiones por segundo
+(responde 429 al superarlo) y duración de la sesión (responde 401 al vencer).
+GET /_sim/stats da los contadores y POST /_sim/reset vacía el estado.
+POST /_sim/expire vence los paquetes guardados (expireDt en el pasado) para medir renovaciones.
+
+Uso como proceso aparte (y OTT_URL_BASE_API=http://127.0.0.1:9001 en el .env):
+    python -m benchmarks.pontis_simulator --port 9001 --latency-ms 80 --jitter-ms 40 --error-rate 0.01 --rate-limit 50
+
+Dentro de un script, `run_in_thread(config)` lo levanta en un hilo y retorna la URL.
+"""
+import argparse
+import asyncio
+import random
+import secrets
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, fields
+from datetime import date, timedelta
+from typing import Dict, Optional
+
+import uvicorn
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from benchmarks.simulation import latency_seconds, serve_in_thread
+
+SESSION_COOKIE = "JSESSIONID"
+
+
+@dataclass
+class SimulatorConfig:
+    latency_ms: float = 0
+    jitter_ms: float = 0
+    # Fracción de peticiones (0..1) que responden 500
+    error_rate: float = 0
+    # Peticiones por segundo admitidas (0 = sin límite) y ráfaga del token bucket
+    rate_limit: float = 0
+    burst: int = 0
+    # Segundos de validez de la sesión (0 = no se exige sesión)
+    session_ttl: float = 1800
+    # Credenciales aceptadas en /auth/login (None = cualquiera)
+    username: Optional[str] = None
+    password: Optional[str] = None
+    seed: Optional[int] = None
+
+
+class SimulatedError(Exception):
+    def __init__(self, status_code: int, detail: str, headers: dict = None):
+        self.status_code = status_code
+        self.detail = detail
+        self.headers = headers
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst or int(rate) or 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+
+class PontisSimulator:
+    def __init__(self, config: SimulatorConfig = None):
+        self.config = config or SimulatorConfig()
+        self.random = random.Random(self.config.seed)
+        self.customers: Dict[str, dict] = {}
+        self.sessions: Dict[str, float] = {}
+        self.requests = Counter()
+        self.statuses = Counter()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._bucket = None
+        self.configure()
+
+    def configure(self, **changes):
+        for name, value in changes.items():
+            setattr(self.config, name, value)
+        self._bucket = TokenBucket(self.config.rate_limit, self.config.burst) if self.config.rate_limit > 0 else None
+        if "seed" in changes:
+            self.random.seed(self.config.seed)
+
+    def reset(self):
+        self.customers.clear()
+        self.sessions.clear()
+        self.requests.clear()
+        self.statuses.clear()
+        self.max_in_flight = 0
+
+    def stats(self) -> dict:
+        return {
+            "config": asdict(self.config),
+            "customers": len(self.customers),
+            "sessions": len(self.sessions),
+            "requests": dict(self.requests),
+            "statuses": {str(code): count for code, count in sorted(self.statuses.items())},
+            "max_in_flight": self.max_in_flight,
+        }
+
+    # --- Perillas -----------------------------------------------------------------
+
+    async def simulate(self, request: Request, needs_session: bool = True):
+        """
+        Aplica a una petición el límite de tasa, la latencia, la sesión y los errores
+        configurados. Lanza SimulatedError con el status que debe responderse.
+        """
+        endpoint = f"{request.method} {request.scope['route'].path}"
+        self.requests[endpoint] += 1
+        if self._bucket is not None and not self._bucket.take():
+            raise SimulatedError(429, "Too Many Requests", {"Retry-After": "1"})
+
+        delay = latency_seconds(self.random, self.config.latency_ms, self.config.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if needs_session and self.config.session_ttl > 0:
+            expires_at = self.sessions.get(request.cookies.get(SESSION_COOKIE))
+            if expires_at is None or expires_at < time.monotonic():
+                raise SimulatedError(401, "Session expired")
+
+        if self.config.error_rate > 0 and self.random.random() < self.config.error_rate:
+            raise SimulatedError(500, "Simulated internal error")
+
+    # --- Operaciones ------------------------------------------------------------
+
+    def login(self, body: dict) -> str:
+        if self.config.username is not None and (
+            body.get("customer_id") != self.config.username or body.get("password") != self.config.password
+        ):
+            raise SimulatedError(401, "Invalid credentials")
+        token = secrets.token_hex(16)
+        now = time.monotonic()
+        self.sessions = {key: exp for key, exp in self.sessions.items() if exp >= now}
+        self.sessions[token] = now + (self.config.session_ttl or 1e9)
+        return token
+
+    def create_customer(self, body: dict) -> str:
+        customer_id = str((body.get("customer") or {}).get("customerId") or "")
+        if not customer_id:
+            raise SimulatedError(400, "customer.customerId is required")
+        if customer_id in self.customers:
+            raise SimulatedError(409, f"Customer {customer_id} already exists")
+        self.customers[customer_id] = {
+            "customer": dict(body.get("customer") or {}),
+            "customerAccount": dict(body.get("customerAccount") or {}),
+            "customerInfo": dict(body.get("customerInfo") or {}),
+            "subscribeService": _merge_services([], body.get("subscribeService") or []),
+        }
+        return customer_id
+
+    def update_customer(self, customer_id: str, body: dict) -> str:
+        stored = self._require(customer_id)
+        for section in ("customer", "customerAccount", "customerInfo"):
+            stored[section].update(body.get(section) or {})
+        if body.get("subscribeService"):
+            stored["subscribeService"] = _merge_services(stored["subscribeService"], body["subscribeService"])
+        return customer_id
+
+    def get_customer(self, customer_id: str) -> Optional[dict]:
+        stored = self.customers.get(customer_id)
+        if stored is None:
+            return None
+        account = {key: value for key, value in stored["customerAccount"].items() if key != "password"}
+        return {
+            "customer": dict(stored["customer"]),
+            "customerAccount": account,
+            "customerInfo": dict(stored["customerInfo"]),
+            "subscribeService": [dict(srv) for srv in stored["subscribeService"]],
+        }
+
+    def delete_services(self, customer_id: str) -> str:
+        stored = self._require(customer_id)
+        # Quita los paquetes; los servicios base (expireDt vacío) se conservan
+        stored["subscribeService"] = [srv for srv in stored["subscribeService"] if not srv.get("expireDt")]
+        return customer_id
+
+    def expire_services(self, days_ago: int = 1) -> int:
+        """
+        Mueve el expireDt de todos los paquetes guardados a hace `days_ago` días, como
+        si los planes hubieran vencido. Retorna cuántos paquetes se vencieron.
+        """
+        expire_dt = (date.today() - timedelta(days=days_ago)).strftime("%d/%m/%Y")
+        expired = 0
+        for stored in self.customers.values():
+            for srv in stored["subscribeService"]:
+                if srv.get("expireDt"):
+                    srv["expireDt"] = expire_dt
+                    expired += 1
+        return expired
+
+    def _require(self, customer_id: str) -> dict:
+        stored = self.customers.get(customer_id)
+        if stored is None:
+            raise SimulatedError(404, f"Customer {customer_id} not found")
+        return stored
+
+
+def _menu_id(srv: dict) -> Optional[str]:
+    menu_id = (srv.get("serviceMenu") or {}).get("serviceMenuId")
+    return str(menu_id) if menu_id is not None else None
+
+
+def _merge_services(current: list, changes: list) -> list:
+    # Como Pontis: una entrada por serviceMenuId, la última enviada reemplaza a la anterior
+    merged = {_menu_id(srv): srv for srv in current}
+    for srv in changes:
+        merged[_menu_id(srv)] = dict(srv)
+    return list(merged.values())
+
+
+def create_app(simulator: PontisSimulator = None) -> FastAPI:
+    sim = simulator or PontisSimulator()
+    app = FastAPI(title="Pontis simulator")
+    app.state.simulator = sim
+
+    @app.middleware("http")
+    async def count_in_flight(request: Request, call_next):
+        sim.in_flight += 1
+        sim.max_in_flight = max(sim.max_in_flight, sim.in_flight)
+        try:
+            response = await call_next(request)
+        finally:
+            sim.in_flight -= 1
+        if not request.url.path.startswith("/_sim"):
+            sim.statuses[response.status_code] += 1
+        return response
+
+    @app.exception_handler(SimulatedError)
+    async def simulated_error(request: Request, exc: SimulatedError):
+        return JSONResponse({"error": exc.detail}, status_code=exc.status_code, headers=exc.headers)
+
+    async def session(request: Request):
+        await sim.simulate(request)
+
+    async def no_session(request: Request):
+        await sim.simulate(request, needs_session=False)
+
+    @app.post("/auth/login", dependencies=[Depends(no_session)])
+    async def login(request: Request):
+        token = sim.login(await request.json())
+        response = JSONResponse({"response": {"token": token}})
+        response.set_cookie(SESSION_COOKIE, token, path="/")
+        return response
+
+    @app.post("/customers/create", dependencies=[Depends(session)])
+    async def create_customer(request: Request):
+        return {"response": sim.create_customer(await request.json())}
+
+    @app.put("/customers/{customer_id}", dependencies=[Depends(session)])
+    async def update_customer(customer_id: str, request: Request):
+        return {"response": sim.update_customer(customer_id, await request.json())}
+
+    @app.get("/customers/getCustomer/{customer_id}", dependencies=[Depends(session)])
+    async def get_customer(customer_id: str):
+        return {"response": sim.get_customer(customer_id)}
+
+    @app.delete("/customers/deleteServices/{customer_id}", dependencies=[Depends(session)])
+    async def delete_services(customer_id: str):
+        return {"response": sim.delete_services(customer_id)}
+
+    @app.get("/_sim/stats")
+    async def stats():
+        return sim.stats()
+
+    @app.patch("/_sim/config")
+    async def configure(request: Request):
+        body = await request.json()
+        known = {field.name for field in fields(SimulatorConfig)}
+        sim.configure(**{key: value for key, value in body.items() if key in known})
+        return asdict(sim.config)
+
+    @app.post("/_sim/expire")
+    async def expire(request: Request):
+        body = await request.json() if await request.body() else {}
+        return {"expired": sim.expire_services(int(body.get("days_ago", 1)))}
+
+    @app.post("/_sim/reset")
+    async def reset():
+        sim.reset()
+        return {"ok": True}
+
+    return app
+
+
+@contextmanager
+def run_in_thread(config: SimulatorConfig = None, host: str = "127.0.0.1", port: int = 9001):
+    """
+    Levanta el simulador en un hilo. Retorna (url, simulador) y lo detiene al salir del bloque.
+    """
+    simulator = PontisSimulator(config)
+    with serve_in_thread(create_app(simulator), host, port) as url:
+        yield url, simulator
+
+
+def add_config_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--latency-ms", type=float, default=0, help="Latencia media por petición")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Variación uniforme (+/-) de la latencia")
+    parser.add_argument("--error-rate", type=float, default=0, help="Fracción de peticiones que responden 500")
+    parser.add_argument("--rate-limit", type=float, default=0, help="Peticiones por segundo antes de responder 429 (0 = sin límite)")
+    parser.add_argument("--burst", type=int, default=0, help="Ráfaga admitida por el límite de tasa")
+    parser.add_argument("--session-ttl", type=float, default=1800, help="Segundos de validez de la sesión (0 = sin sesión)")
+    parser.add_argument("--seed", type=int, default=None, help="Semilla para latencias y errores reproducibles")
+
+
+def config_from_args(args) -> SimulatorConfig:
+    return SimulatorConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        burst=args.burst,
+        session_ttl=args.session_ttl,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9001)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(create_app(PontisSimulator(config_from_args(args))), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
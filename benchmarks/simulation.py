@@ -0,0 +1,37 @@
+"""
+Utilidades comunes de los simuladores locales (Pontis y Odoo).
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import uvicorn
+
+
+@contextmanager
+def serve_in_thread(app, host: str = "127.0.0.1", port: int = 9001):
+    """
+    Levanta una app ASGI con uvicorn en un hilo con su propio event loop. Retorna la
+    URL base y detiene el servidor al salir del bloque.
+    """
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError(f"No se pudo iniciar el simulador en {host}:{port}")
+        time.sleep(0.01)
+    try:
+        yield f"http://{host}:{port}"
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+
+
+def latency_seconds(rng: random.Random, latency_ms: float, jitter_ms: float) -> float:
+    """
+    Latencia simulada: media `latency_ms` con variación uniforme de +/- `jitter_ms`.
+    """
+    delay = latency_ms + rng.uniform(-1, 1) * jitter_ms
+    return max(0.0, delay / 1000)